@@ -6,14 +6,87 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     EMBEDDING_PROVIDER: str = "local"
+    CHUNK_UNIT: str = "chars"  # "chars" or "tokens" (sized with CHUNK_TOKENIZER)
+    CHUNK_TOKENIZER: str = "sentence-transformers/all-MiniLM-L6-v2"
+    CHUNK_MAX_TOKENS: int = 256  # embedding model's max_seq_length; longer token chunks would be truncated
+    CHUNK_STRATEGY: str = "flat"  # "small_to_big" embeds chunk_size children and answers with their parents
+    PARENT_UNIT: str = "page"  # small_to_big parents: "page" or "section"
+    PARENT_SECTION_SIZE: int = 4000  # in CHUNK_UNIT units, for PARENT_UNIT=section
+    PARENT_FANOUT: int = 4  # child hits searched per requested parent
+    PARENT_STORE_DIR: str = "parent_store"  # parent passages, one directory per collection
+    EMBED_BATCH_ENABLED: bool = True  # micro-batch concurrent query embeddings in the API
+    EMBED_BATCH_MAX_SIZE: int = 32
+    EMBED_BATCH_WAIT_MS: float = 5.0
+    OPENAI_EMBEDDING_BASE_URL: str = ""  # e.g. a local OpenAI-compatible server
+    OPENAI_EMBED_MAX_TOKENS: int = 250_000  # estimated tokens per request (API cap is 300k)
+    OPENAI_EMBED_MAX_INPUTS: int = 2048
+    OPENAI_EMBED_CONCURRENCY: int = 4  # requests in flight; halves on rate limiting
+    OPENAI_EMBED_MAX_RETRIES: int = 6
+    EXTRACT_CACHE_DIR: str = ".extract_cache"  # "" disables the PDF text cache
+    DEDUP_ENABLED: bool = False  # drop near-duplicate chunks (MinHash/LSH) before embedding
+    DEDUP_THRESHOLD: float = 0.85  # estimated Jaccard similarity of word shingles
+    DEDUP_NUM_PERM: int = 128
+    DEDUP_DIR: str = "dedup_index"  # signatures of stored chunks, one file per collection
     VECTOR_DB: str = "faiss"
+    FAISS_INDEX_FACTORY: str = "Flat"  # faiss.index_factory string, e.g. "IVF1024,Flat" or "HNSW32"
+    FAISS_MMAP: bool = False  # open the index read-only via mmap (shared across workers)
+    FAISS_SNAPSHOT_DIR: str = "faiss_snapshots"  # "" to use a single faiss.index/chunks_map.json
+    FAISS_SNAPSHOT_KEEP: int = 3
+    FAISS_COMPACT_RATIO: float = 0.1  # compact once deleted vectors exceed this share of the index
+    FAISS_DOC_INDEX: bool = True  # keep per-document centroids for two-stage search
+    SEARCH_MODE: str = "full"  # "full" or "two_stage" (nearest documents first, then their chunks)
+    SEARCH_TOP_DOCS: int = 10  # documents searched by the second stage of two_stage
+    FAISS_COLLECTIONS_DIR: str = "faiss_collections"  # named collections, one snapshot dir each
+    COLLECTION_MEMORY_MB: int = 2048  # LRU budget for loaded named collections
+    COLLECTION_MAX_LOADED: int = 64  # ...and a cap on their number (empty ones cost ~0 bytes)
+    FAISS_SHARD_DIR: str = "faiss_shards"  # used when VECTOR_DB=faiss_sharded
+    FAISS_SHARDS: int = 4
+    FAISS_SHARD_BY: str = "hash"  # "hash" (chunk id) or "source"
+    INDEX_RELOAD_INTERVAL: float = 5.0  # seconds between manifest polls, 0 disables polling
+
+    # Background ingestion of uploaded documents
+    INGEST_WORKERS: int = 2
+    INGEST_QUEUE_SIZE: int = 32
+    INGEST_BATCH_CHUNKS: int = 256
+    INGEST_BATCH_WAIT: float = 0.5
+    INGEST_UPLOAD_DIR: str = "uploads"
+    INGEST_MAX_UPLOAD_MB: int = 50
     OPENAI_API_KEY: str
     QDRANT_HOST: str = "localhost"
     QDRANT_PORT: int = 6333
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_POOL_SIZE: int = 0  # HTTP/gRPC connections per client, 0 keeps the client default
+    QDRANT_TIMEOUT: int = 10
+    QDRANT_LOCATION: str = ""  # server URL, or ":memory:" / a directory to run Qdrant in-process (sync client only)
     LLM_PROVIDER: str = "huggingface"
     HUGGINGFACE_API_KEY: str = ""
     HUGGINGFACE_MODEL: str = "meta-llama/Llama-2-7b-chat-hf"
     OPENAI_MODEL: str = "gpt-4o-mini"
+    OPENAI_BASE_URL: str = ""
+    HUGGINGFACE_API_BASE: str = "https://api-inference.huggingface.co/models"
+    LOCAL_LLM_MODEL: str = "llama3"
+    LOCAL_LLM_URL: str = "http://localhost:11434/v1"
+
+    # LLM call policy
+    LLM_FALLBACK_PROVIDER: str = ""
+    LLM_MAX_RETRIES: int = 3
+    LLM_BACKOFF_BASE: float = 0.5
+    LLM_BACKOFF_MAX: float = 8.0
+    LLM_DEADLINE: float = 60.0
+    LLM_HEDGE_AFTER: float = 0.0  # seconds, 0 disables hedged requests
+    LLM_MAX_IN_FLIGHT: int = 16  # provider calls running at once, abandoned attempts included
+    LLM_CIRCUIT_FAILURES: int = 5
+    LLM_CIRCUIT_RESET: float = 30.0
+
+    # Conversational sessions (kept in process memory, so they need a single API worker)
+    API_WORKERS: int = 1  # set by `rag_cli.py api --workers`
+    SESSION_TTL: float = 1800.0  # seconds idle before a session expires
+    SESSION_MAX: int = 1000
+    SESSION_MAX_TURNS: int = 50
+    SESSION_RECENT_TURNS: int = 3  # turns kept verbatim; older ones are summarised
+    SESSION_HISTORY_TOKENS: int = 1000
+    SESSION_CACHED_CHUNKS: int = 64
 
     class Config:
         env_file = ".env"
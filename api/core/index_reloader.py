@@ -0,0 +1,75 @@
+import threading
+import time
+
+
+class IndexReloader:
+    """
+    Keeps a VectorStore on the newest published index snapshot.
+
+    A daemon thread polls the snapshot manifest every `interval` seconds; the
+    admin endpoint can also trigger a reload directly. Loading happens off the
+    request path and a failed load leaves the previous snapshot serving.
+    """
+
+    def __init__(self, vector_store, interval=5.0):
+        self.vs = vector_store
+        self.interval = interval
+        self.last_error = None
+        self.last_reload_at = None
+        self._failed_version = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """Reload if a newer snapshot has been published. Returns the served version."""
+        latest = self.vs.latest_version()
+        if latest is None or latest == self.vs.version or latest == self._failed_version:
+            return self.vs.version
+        return self.reload()
+
+    def reload(self):
+        """Load the latest snapshot and swap it in (one reload at a time)"""
+        with self._lock:
+            target = self.vs.latest_version()
+            try:
+                version = self.vs.reload()
+            except Exception as e:
+                self._failed_version = target
+                self.last_error = str(e)
+                print(f"⚠️ Index reload failed, still serving version {self.vs.version}: {str(e)}")
+                raise
+            self._failed_version = None
+            self.last_error = None
+            self.last_reload_at = time.time()
+            print(f"🔄 Now serving index version {version}")
+            return version
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                pass  # already reported; keep polling
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="index-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def status(self):
+        return {
+            "version": self.vs.version,
+            "latest_version": self.vs.latest_version(),
+            "last_reload_at": self.last_reload_at,
+            "last_error": self.last_error,
+            "polling": self._thread is not None
+        }
@@ -0,0 +1,176 @@
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from api.core.config import settings
+from ingestion.openai_embedder import estimate_tokens
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def _summarise_turn(turn, max_chars=160):
+    """One-line extractive summary: the question and the first sentence of the answer"""
+    answer = _SENTENCE_END.split(turn["answer"].strip(), 1)[0]
+    return f"- Asked: {turn['query'][:max_chars]} | Answered: {answer[:max_chars]}"
+
+
+class Session:
+    """
+    One conversation: recent turns with the chunk keys they used, and a
+    bounded cache of chunk payloads so follow-ups only fetch new chunks.
+
+    Follow-ups are still embedded and searched every turn; the cache only
+    saves payload fetches. That is a round trip per turn on Qdrant and page
+    reads on mmap-ed FAISS payloads, but only a dict lookup on an in-memory
+    FAISS map.
+    """
+
+    def __init__(self, collection=None, max_turns=50, max_cached_chunks=64):
+        self.id = str(uuid.uuid4())
+        self.collection = collection
+        self.max_turns = max_turns
+        self.max_cached_chunks = max_cached_chunks
+        self.turns = []
+        self.chunks = OrderedDict()  # chunk key -> payload, least recently used first
+        self.created_at = self.last_access = time.time()
+        self.lock = threading.Lock()
+
+    def cached_chunks(self, keys):
+        """Cached payloads for the given keys, marking them recently used"""
+        with self.lock:
+            found = {}
+            for key in keys:
+                if key in self.chunks:
+                    self.chunks.move_to_end(key)
+                    found[key] = self.chunks[key]
+            return found
+
+    def history(self, recent_turns=3, token_budget=1000):
+        """
+        Conversation context for the prompt: the last `recent_turns` turns
+        verbatim, older turns as one-line summaries. The oldest lines are
+        dropped until everything fits in `token_budget` (estimated tokens).
+        """
+        with self.lock:
+            turns = list(self.turns)
+        split = max(len(turns) - recent_turns, 0)
+        older = [_summarise_turn(turn) for turn in turns[:split]]
+        recent = [f"User: {turn['query']}\nAssistant: {turn['answer']}" for turn in turns[split:]]
+
+        total = sum(estimate_tokens(line) for line in older + recent)
+        while total > token_budget and (older or recent):
+            dropped = older.pop(0) if older else recent.pop(0)
+            total -= estimate_tokens(dropped)
+
+        parts = []
+        if older:
+            parts.append("Earlier turns (summarised):\n" + "\n".join(older))
+        if recent:
+            parts.append("\n\n".join(recent))
+        return "\n\n".join(parts)
+
+    def add_turn(self, query, answer, chunk_keys, new_chunks, metrics):
+        with self.lock:
+            self.turns.append({
+                "query": query,
+                "answer": answer,
+                "chunk_keys": list(chunk_keys),
+                "metrics": metrics,
+                "at": time.time()
+            })
+            del self.turns[:-self.max_turns]
+            for key, chunk in new_chunks.items():
+                self.chunks[key] = chunk
+                self.chunks.move_to_end(key)
+            while len(self.chunks) > self.max_cached_chunks:
+                self.chunks.popitem(last=False)
+
+    def to_dict(self):
+        with self.lock:
+            turns = list(self.turns)
+            cached = len(self.chunks)
+        return {
+            "session_id": self.id,
+            "collection": self.collection,
+            "created_at": self.created_at,
+            "last_access": self.last_access,
+            "cached_chunks": cached,
+            "turns": turns
+        }
+
+
+class SessionStore:
+    """
+    Bounded in-memory session store. Sessions idle for longer than `ttl`
+    seconds expire; beyond `max_sessions` the least recently used is evicted.
+
+    Sessions live in one process, so the API only offers them with a single
+    worker (settings.API_WORKERS); with several, a follow-up could land on a
+    worker that never saw the session.
+    """
+
+    def __init__(self, max_sessions=1000, ttl=1800.0, max_turns=50, max_cached_chunks=64):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self.max_cached_chunks = max_cached_chunks
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._evicted = 0
+        self._expired = 0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_sessions=settings.SESSION_MAX,
+            ttl=settings.SESSION_TTL,
+            max_turns=settings.SESSION_MAX_TURNS,
+            max_cached_chunks=settings.SESSION_CACHED_CHUNKS
+        )
+
+    def _expire(self, now):
+        # Least recently used first, so stop at the first live session
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_access <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+            self._expired += 1
+
+    def create(self, collection=None):
+        session = Session(collection, self.max_turns, self.max_cached_chunks)
+        with self._lock:
+            self._expire(time.time())
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self._evicted += 1
+        return session
+
+    def get(self, session_id):
+        """The live session, or None if it is unknown or expired"""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_access = now
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self):
+        with self._lock:
+            self._expire(time.time())
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl": self.ttl,
+                "evicted": self._evicted,
+                "expired": self._expired
+            }
@@ -1,12 +1,26 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from api.routes.qa import router as qa_router
+from api.routes.qa import router as qa_router, batcher
+from api.routes.admin import router as admin_router, reloader
+from api.routes.documents import router as documents_router, pool as ingestion_pool
 from api.core.config import settings
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    reloader.start()
+    ingestion_pool.start()
+    batcher.start()
+    yield
+    batcher.stop()
+    ingestion_pool.stop()
+    reloader.stop()
+
 app = FastAPI(
     title="Multi-Document RAG API",
     description="A Retrieval Augmented Generation system for multiple documents",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -41,4 +55,6 @@ def health_check():
 
 # Include routers
 app.include_router(qa_router, prefix="/api/v1", tags=["QA"])
+app.include_router(documents_router, prefix="/api/v1", tags=["Documents"])
+app.include_router(admin_router, prefix="/api/v1/admin", tags=["Admin"])
 
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException
+from api.core.config import settings
+from api.core.index_reloader import IndexReloader
+from api.routes.qa import vs, collections, batcher
+
+router = APIRouter()
+reloader = IndexReloader(vs, interval=settings.INDEX_RELOAD_INTERVAL)
+
+@router.get("/index")
+def index_status():
+    return reloader.status()
+
+@router.post("/index/reload")
+def reload_index():
+    try:
+        version = reloader.reload()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Reload failed, still serving version {vs.version}: {str(e)}"
+        )
+    return {"status": "reloaded", "version": version}
+
+@router.get("/collections")
+def collection_stats():
+    return collections.stats()
+
+@router.get("/embedding-batcher")
+def embedding_batcher_stats():
+    return batcher.stats()
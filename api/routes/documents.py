@@ -0,0 +1,149 @@
+import uuid
+from pathlib import Path
+from typing import List, Optional
+from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile
+from api.core.config import settings
+from ingestion.chunker import resolve_chunk_size
+from ingestion.jobs import IngestionWorkerPool, QueueFullError
+from retrieval.collection_manager import CollectionNotFoundError, validate_collection
+from retrieval.vector_store import VectorStore
+
+router = APIRouter()
+pool = IngestionWorkerPool(
+    lambda collection, create=True: VectorStore(mmap=False, collection=collection, create=create),
+    workers=settings.INGEST_WORKERS,
+    queue_size=settings.INGEST_QUEUE_SIZE,
+    batch_chunks=settings.INGEST_BATCH_CHUNKS,
+    batch_wait=settings.INGEST_BATCH_WAIT,
+    dedup=settings.DEDUP_ENABLED
+)
+
+def _queue_full():
+    return HTTPException(
+        status_code=503,
+        detail="Ingestion queue is full, retry later",
+        headers={"Retry-After": "10"}
+    )
+
+def _check_collection(collection):
+    if collection:
+        try:
+            validate_collection(collection)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/documents", status_code=202)
+def upload_documents(
+    files: List[UploadFile] = File(...),
+    chunk_size: Optional[int] = Form(None),
+    chunk_overlap: int = Form(50),
+    collection: Optional[str] = Form(None)
+):
+    return _queue_uploads(files, chunk_size, chunk_overlap, collection, replace=False)
+
+@router.put("/documents", status_code=202)
+def replace_documents(
+    files: List[UploadFile] = File(...),
+    chunk_size: Optional[int] = Form(None),
+    chunk_overlap: int = Form(50),
+    collection: Optional[str] = Form(None)
+):
+    """Re-ingest documents, replacing the chunks previously stored for each filename"""
+    return _queue_uploads(files, chunk_size, chunk_overlap, collection, replace=True)
+
+@router.delete("/documents")
+def delete_document(source: str = Query(...), collection: Optional[str] = Query(None)):
+    _check_collection(collection)
+    try:
+        # Through the pool, so the delete cannot interleave with a batch being stored
+        deleted = pool.delete(source, collection)
+    except CollectionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting document: {str(e)}")
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"No chunks found for source: {source}")
+    return {"source": source, "collection": collection, "deleted": deleted}
+
+def _save_upload(upload, path, max_bytes):
+    """Copy an upload to path, enforcing max_bytes while reading (the declared size may be missing)"""
+    written = 0
+    with open(path, "wb") as f:
+        while True:
+            block = upload.file.read(1024 * 1024)
+            if not block:
+                break
+            written += len(block)
+            if written > max_bytes:
+                raise HTTPException(status_code=413, detail=f"{upload.filename} exceeds {settings.INGEST_MAX_UPLOAD_MB} MB")
+            f.write(block)
+
+def _queue_uploads(files, chunk_size, chunk_overlap, collection, replace):
+    _check_collection(collection)
+    try:
+        chunk_size = resolve_chunk_size(chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    upload_dir = Path(settings.INGEST_UPLOAD_DIR)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    max_bytes = settings.INGEST_MAX_UPLOAD_MB * 1024 * 1024
+
+    # Reject the whole request before anything is queued
+    filenames = []
+    for upload in files:
+        filename = Path(upload.filename or "upload.pdf").name
+        if not filename.lower().endswith(".pdf"):
+            raise HTTPException(status_code=400, detail=f"Only PDF files are supported: {filename}")
+        if upload.size is not None and upload.size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"{filename} exceeds {settings.INGEST_MAX_UPLOAD_MB} MB")
+        filenames.append(filename)
+    if pool.stats()["queued"] + len(files) > settings.INGEST_QUEUE_SIZE:
+        raise _queue_full()
+
+    paths = []
+    try:
+        for upload in files:
+            path = upload_dir / f"{uuid.uuid4()}.pdf"
+            paths.append(path)
+            _save_upload(upload, path, max_bytes)
+    except Exception:
+        for path in paths:
+            path.unlink(missing_ok=True)
+        raise
+
+    jobs, rejected = [], []
+    for filename, path in zip(filenames, paths):
+        try:
+            job = pool.submit(filename, str(path), chunk_size, chunk_overlap, collection, replace)
+        except QueueFullError:
+            # Concurrent uploads filled the queue after the check above; the
+            # jobs already queued are still reported
+            path.unlink(missing_ok=True)
+            rejected.append({"filename": filename, "error": "Ingestion queue is full, retry later"})
+            continue
+        jobs.append({
+            "job_id": job.id,
+            "filename": filename,
+            "collection": collection,
+            "replace": replace,
+            "stage": job.stage
+        })
+
+    if not jobs:
+        raise _queue_full()
+    response = {"jobs": jobs}
+    if rejected:
+        response["rejected"] = rejected
+    return response
+
+@router.get("/documents/jobs/{job_id}")
+def job_status(job_id: str):
+    job = pool.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job.to_dict()
+
+@router.get("/documents/jobs")
+def queue_status():
+    return pool.stats()
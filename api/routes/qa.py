@@ -1,11 +1,25 @@
+import time
+from typing import Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from retrieval.vector_store import VectorStore
+from retrieval.collection_manager import CollectionManager, CollectionNotFoundError, validate_collection
+from ingestion.embedding_batcher import EmbeddingBatcher
 from llm.llm_service import LLMService
 from api.core.config import settings
+from api.core.sessions import SessionStore
+from ingestion.openai_embedder import estimate_tokens
 
 router = APIRouter()
 vs = VectorStore()
+collections = CollectionManager(
+    lambda name: VectorStore(collection=name, create=False),
+    memory_budget=settings.COLLECTION_MEMORY_MB * 1024 * 1024,
+    max_loaded=settings.COLLECTION_MAX_LOADED,
+    reload_interval=settings.INDEX_RELOAD_INTERVAL
+)
+batcher = EmbeddingBatcher.from_settings()
+sessions = SessionStore.from_settings()
 
 # Initialize LLM service on demand to avoid startup issues
 def get_llm_service():
@@ -14,27 +28,104 @@ def get_llm_service():
 class AskRequest(BaseModel):
     query: str
     top_k: int = 3
+    collection: Optional[str] = None
+    search_mode: Optional[str] = None  # "full" or "two_stage"; defaults to SEARCH_MODE
+    top_docs: Optional[int] = None
+    session_id: Optional[str] = None
 
 class AskResponse(BaseModel):
     answer: str
     context: list
     sources: list
+    session_id: Optional[str] = None
+    metrics: Optional[dict] = None
+
+class SessionRequest(BaseModel):
+    collection: Optional[str] = None
+
+def _elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 2)
+
+def _check_sessions_supported():
+    if settings.API_WORKERS > 1:
+        raise HTTPException(
+            status_code=409,
+            detail="Sessions are kept in one worker's memory; run the API with a single worker to use them"
+        )
 
 @router.post("/ask", response_model=AskResponse)
 def ask_question(req: AskRequest):
+    if req.collection:
+        try:
+            validate_collection(req.collection)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if req.search_mode not in (None, "full", "two_stage"):
+        raise HTTPException(status_code=400, detail=f"Unknown search_mode: {req.search_mode}")
+
+    session = None
+    if req.session_id:
+        _check_sessions_supported()
+        session = sessions.get(req.session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail=f"Session not found or expired: {req.session_id}")
+        if req.collection and req.collection != session.collection:
+            raise HTTPException(status_code=400, detail=f"Session belongs to collection: {session.collection}")
+    collection = session.collection if session else req.collection
+
     try:
-        # Step 1: Retrieve relevant chunks
-        results = vs.search(req.query, top_k=req.top_k)
-        if not results:
+        started = time.perf_counter()
+        metrics = {}
+
+        # Step 1: Retrieve relevant chunk keys, then load only payloads not already cached
+        store = collections.get(collection) if collection else vs
+        hits = []
+        if req.query.strip():
+            t0 = time.perf_counter()
+            query_vector = batcher.embed(req.query)
+            metrics["embed_ms"] = _elapsed_ms(t0)
+
+            t0 = time.perf_counter()
+            # small_to_big collections search extra children to fill top_k distinct parents
+            hits = store.search_ids_by_vector(
+                query_vector, top_k=store.child_k(req.top_k), mode=req.search_mode, top_docs=req.top_docs
+            )
+            metrics["search_ms"] = _elapsed_ms(t0)
+
+            # Follow-ups are searched again; the session cache only saves payload fetches
+            t0 = time.perf_counter()
+            keys = [key for key, score in hits]
+            cached = session.cached_chunks(keys) if session else {}
+            fetched = store.get_chunks([key for key in keys if key not in cached])
+            metrics["fetch_ms"] = _elapsed_ms(t0)
+            metrics["chunks_reused"] = len(cached)
+            metrics["chunks_fetched"] = len(fetched)
+
+            payloads = {**cached, **fetched}
+            hits = [(key, score) for key, score in hits if key in payloads]
+        if not hits:
             raise HTTPException(status_code=404, detail="No relevant documents found")
         
+        results = store.expand_parents([(payloads[key], score) for key, score in hits], req.top_k)
         chunks = [chunk for chunk, score in results]
         scores = [score for chunk, score in results]
         
-        # Step 2: Generate answer
+        # Step 2: Generate answer, with earlier turns of the session as history
         context_texts = [chunk["text"] for chunk in chunks]
+        history = session.history(settings.SESSION_RECENT_TURNS, settings.SESSION_HISTORY_TOKENS) if session else ""
+        t0 = time.perf_counter()
         llm_service = get_llm_service()
-        answer = llm_service.generate_answer(req.query, context_texts)
+        answer = llm_service.generate_answer(req.query, context_texts, history)
+        metrics["llm_ms"] = _elapsed_ms(t0)
+
+        metrics["history_tokens"] = estimate_tokens(history) if history else 0
+        metrics["prompt_tokens"] = (
+            metrics["history_tokens"] + estimate_tokens(req.query) + sum(estimate_tokens(t) for t in context_texts)
+        )
+        metrics["context_chunks"] = len(context_texts)
+        metrics["total_ms"] = _elapsed_ms(started)
+        if session:
+            session.add_turn(req.query, answer, [key for key, score in hits], fetched, metrics)
         
         # Step 3: Prepare response
         sources = []
@@ -49,12 +140,56 @@ def ask_question(req: AskRequest):
         return AskResponse(
             answer=answer,
             context=context_texts,
-            sources=sources
+            sources=sources,
+            session_id=session.id if session else None,
+            metrics=metrics
         )
         
+    except HTTPException:
+        raise
+    except CollectionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
+@router.post("/sessions")
+def create_session(req: SessionRequest):
+    _check_sessions_supported()
+    if req.collection:
+        try:
+            validate_collection(req.collection)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        try:
+            collections.get(req.collection)
+        except CollectionNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    session = sessions.create(req.collection)
+    return {"session_id": session.id, "collection": session.collection, "ttl": sessions.ttl}
+
+@router.get("/sessions/{session_id}")
+def get_session(session_id: str):
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Session not found or expired: {session_id}")
+    info = session.to_dict()
+    turn_metrics = [turn["metrics"] for turn in info["turns"]]
+    info["totals"] = {
+        "turns": len(turn_metrics),
+        "chunks_reused": sum(m.get("chunks_reused", 0) for m in turn_metrics),
+        "chunks_fetched": sum(m.get("chunks_fetched", 0) for m in turn_metrics),
+        "fetch_ms": round(sum(m.get("fetch_ms", 0) for m in turn_metrics), 2),
+        "prompt_tokens": sum(m.get("prompt_tokens", 0) for m in turn_metrics),
+        "total_ms": round(sum(m.get("total_ms", 0) for m in turn_metrics), 2)
+    }
+    return info
+
+@router.delete("/sessions/{session_id}")
+def delete_session(session_id: str):
+    if not sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Session not found or expired: {session_id}")
+    return {"message": f"Deleted session {session_id}"}
+
 @router.get("/health")
 def health_check():
     llm_service = get_llm_service()
@@ -0,0 +1,82 @@
+"""
+Benchmark: native chunker vs the previous per-call LangChain splitter.
+
+Reports chunking time, chunk count and how many chunks overflow the
+embedding model's token window (256 for all-MiniLM-L6-v2, incl. 2 special tokens).
+
+Usage:
+  python -m benchmarks.bench_chunker --pdf manual.pdf
+  python -m benchmarks.bench_chunker --synthetic_pages 2000
+"""
+
+import argparse
+import random
+import time
+
+from api.core.config import settings
+from ingestion.chunker import chunk_text, get_tokenizer, max_chunk_tokens
+from ingestion.ingest import extract_pages_from_pdf
+
+
+def langchain_chunk_text(text, chunk_size, chunk_overlap):
+    # The implementation chunk_text replaced
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", " ", ""]
+    )
+    return [doc.page_content for doc in splitter.create_documents([text])]
+
+
+def synthetic_pages(n_pages):
+    rng = random.Random(0)
+    words = "the model retrieval index vector chunk query answer document page section table figure".split()
+    pages = []
+    for _ in range(n_pages):
+        paragraphs = [
+            " ".join(rng.choice(words) for _ in range(rng.randint(40, 160))) + "."
+            for _ in range(rng.randint(3, 8))
+        ]
+        pages.append("\n\n".join(paragraphs))
+    return pages
+
+
+def run(name, fn, text, window):
+    t0 = time.perf_counter()
+    chunks = fn(text)
+    elapsed = time.perf_counter() - t0
+    tokenizer = get_tokenizer()
+    overflow = sum(
+        1 for enc in tokenizer.encode_batch(chunks) if len(enc.ids) > window
+    )
+    print(f"{name:>24} | {elapsed * 1000:9.1f} ms | {len(chunks):6d} chunks"
+          f" | {overflow:5d} over {window} tokens")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunker benchmark")
+    parser.add_argument("--pdf", help="PDF to chunk (default: synthetic text)")
+    parser.add_argument("--synthetic_pages", type=int, default=1000, help="Pages of synthetic text")
+    parser.add_argument("--chunk_size", type=int, default=500, help="Chunk size in characters")
+    parser.add_argument("--chunk_overlap", type=int, default=50, help="Chunk overlap in characters")
+    parser.add_argument("--token_size", type=int, default=max_chunk_tokens(), help="Chunk size in tokens")
+    parser.add_argument("--token_overlap", type=int, default=25, help="Chunk overlap in tokens")
+    args = parser.parse_args()
+
+    pages = extract_pages_from_pdf(args.pdf) if args.pdf else synthetic_pages(args.synthetic_pages)
+    text = "\n".join(pages)
+    print(f"📄 {len(pages)} pages, {len(text)} characters\n")
+
+    # Checked with special tokens, as the embedder sees them
+    window = settings.CHUNK_MAX_TOKENS
+    get_tokenizer()  # load outside the timed runs
+    run("langchain (chars)", lambda t: langchain_chunk_text(t, args.chunk_size, args.chunk_overlap), text, window)
+    run("native (chars)", lambda t: chunk_text(t, args.chunk_size, args.chunk_overlap, "chars"), text, window)
+    run("native (tokens)", lambda t: chunk_text(t, args.token_size, args.token_overlap, "tokens"), text, window)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: cold start from chunks_map.json + faiss.index vs a snapshot file.
+
+Usage:
+  python -m benchmarks.bench_cold_start --vectors 200000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from retrieval.faiss_store import FaissVectorStore
+from retrieval.snapshot_file import SnapshotReader, export_snapshot
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    result = fn()
+    print(f"{label:>40} | {time.perf_counter() - t0:8.3f}s")
+    return result
+
+
+def size_mb(*paths):
+    return sum(Path(p).stat().st_size for p in paths if Path(p).exists()) / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument("--vectors", type=int, default=200_000, help="Number of synthetic chunks")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.random((args.vectors, args.dim), dtype="float32")
+    chunks = [
+        {"id": f"chunk-{i}", "text": f"synthetic chunk {i} " * 30, "source": f"doc-{i % 100}.pdf", "chunk_number": i}
+        for i in range(args.vectors)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = os.path.join(tmp, "faiss.index")
+        map_path = os.path.join(tmp, "chunks_map.json")
+        snapshot_path = os.path.join(tmp, "index.rsnap")
+
+        store = FaissVectorStore(index_path, map_path, mmap=False, snapshot_dir="")
+        store.store(chunks, vectors)
+        timed("export snapshot", lambda: export_snapshot(store, snapshot_path))
+        print(f"{'json map + faiss.index size':>40} | {size_mb(index_path, map_path):8.1f} MB")
+        print(f"{'snapshot file size':>40} | {size_mb(snapshot_path):8.1f} MB\n")
+
+        timed("before: read index + json.load map",
+              lambda: FaissVectorStore(index_path, map_path, mmap=False, snapshot_dir="")._load_index())
+
+        reader = timed("open snapshot (verify checksum)", lambda: SnapshotReader(snapshot_path))
+        reader.close()
+        reader = timed("open snapshot (no verify)", lambda: SnapshotReader(snapshot_path, verify=False))
+        timed("touch mmapped vector section", lambda: float(reader.vectors[::1024].sum()))
+
+        imported = FaissVectorStore(mmap=False, snapshot_dir=os.path.join(tmp, "snapshots"))
+        timed("after: import snapshot", lambda: imported.import_snapshot(reader))
+        reader.close()
+        timed("after: mmap load of imported snapshot",
+              lambda: FaissVectorStore(mmap=True, snapshot_dir=os.path.join(tmp, "snapshots"))._load_index())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Load test: query embedding throughput and latency with micro-batching on/off.
+
+Runs `--concurrency` client threads that each embed `--requests` queries
+through an EmbeddingBatcher, once with batching disabled (one forward pass per
+query) and once per configured wait window.
+
+Usage:
+  python -m benchmarks.bench_embedding_batcher --concurrency 32 --requests 50
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from ingestion.embedding import get_embedding
+from ingestion.embedding_batcher import EmbeddingBatcher
+
+
+def load_test(batcher, concurrency, requests):
+    latencies = []
+    lock = threading.Lock()
+
+    def client(worker_id):
+        local = []
+        for i in range(requests):
+            t0 = time.perf_counter()
+            batcher.embed(f"what does section {worker_id}.{i} say about retrieval latency?")
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(w,)) for w in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies) * 1000
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding micro-batching load test")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent client threads")
+    parser.add_argument("--requests", type=int, default=50, help="Queries per client")
+    parser.add_argument("--max_batch_size", type=int, default=32, help="Maximum batch size")
+    parser.add_argument("--wait_ms", type=float, nargs="+", default=[2.0, 5.0, 10.0], help="Batching windows to test")
+    args = parser.parse_args()
+
+    get_embedding("warm up")  # load the model outside the timed runs
+
+    runs = [("off", EmbeddingBatcher(enabled=False))] + [
+        (f"on, {wait:g} ms", EmbeddingBatcher(args.max_batch_size, wait)) for wait in args.wait_ms
+    ]
+    for label, batcher in runs:
+        batcher.start()
+        qps, p50, p99 = load_test(batcher, args.concurrency, args.requests)
+        batcher.stop()
+        stats = batcher.stats()
+        print(f"batching {label:>12} | {qps:8.1f} q/s | p50 {p50:7.2f} ms | p99 {p99:7.2f} ms"
+              f" | mean batch {stats['mean_batch_size']:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: per-worker memory and query latency for in-heap vs mmap FAISS loading.
+
+Builds a synthetic index, then starts N worker processes that each open it the
+way a uvicorn worker would and run random queries. RSS counts shared pages in
+every process; PSS splits them between sharers and is the number to compare.
+
+Usage:
+  python -m benchmarks.bench_faiss_mmap --vectors 200000 --workers 4
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+def _memory_kb():
+    """Return (rss_kb, pss_kb) for the current process (Linux only)"""
+    rss = pss = 0
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Rss:"):
+                    rss = int(line.split()[1])
+                elif line.startswith("Pss:"):
+                    pss = int(line.split()[1])
+    except FileNotFoundError:
+        pass
+    return rss, pss
+
+
+def build_index(directory, n_vectors, dim):
+    import faiss
+    from retrieval.payload_store import write_payloads
+
+    rng = np.random.default_rng(0)
+    vectors = rng.random((n_vectors, dim), dtype="float32")
+    ids = np.arange(n_vectors, dtype="int64")
+
+    index = faiss.IndexIDMap(faiss.IndexFlatL2(dim))
+    index.add_with_ids(vectors, ids)
+    index_path = str(Path(directory) / "faiss.index")
+    map_path = str(Path(directory) / "chunks_map.json")
+    faiss.write_index(index, index_path)
+
+    id_map = {
+        str(i): {"id": str(i), "text": f"synthetic chunk {i} " * 40, "source": "bench.pdf", "chunk_number": i}
+        for i in range(n_vectors)
+    }
+    with open(map_path, "w", encoding="utf-8") as f:
+        json.dump(id_map, f)
+    write_payloads(id_map, map_path)
+    return index_path, map_path
+
+
+def _worker(index_path, map_path, use_mmap, dim, n_queries, top_k, barrier, results):
+    from retrieval.faiss_store import FaissVectorStore
+
+    start = time.perf_counter()
+    store = FaissVectorStore(index_path, map_path, mmap=use_mmap, snapshot_dir="")
+    store._load_index()
+    load_s = time.perf_counter() - start
+
+    rng = np.random.default_rng()
+    latencies = []
+    for _ in range(n_queries):
+        q = rng.random(dim, dtype="float32")
+        t0 = time.perf_counter()
+        store.search_by_vector(q, top_k)
+        latencies.append(time.perf_counter() - t0)
+
+    # Measure while every worker still holds its copy
+    barrier.wait()
+    rss, pss = _memory_kb()
+    results.put((load_s, rss, pss, latencies))
+    barrier.wait()
+
+
+def run(index_path, map_path, use_mmap, workers, dim, n_queries, top_k):
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(index_path, map_path, use_mmap, dim, n_queries, top_k, barrier, results))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    latencies = np.array([lat for row in rows for lat in row[3]]) * 1000
+    mode = "mmap" if use_mmap else "in-heap"
+    print(f"{mode:>8} | load {np.mean([r[0] for r in rows]):7.3f}s"
+          f" | RSS/worker {np.mean([r[1] for r in rows]) / 1024:8.1f} MB"
+          f" | PSS/worker {np.mean([r[2] for r in rows]) / 1024:8.1f} MB"
+          f" | p50 {np.percentile(latencies, 50):7.2f} ms"
+          f" | p99 {np.percentile(latencies, 99):7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS in-heap vs mmap benchmark")
+    parser.add_argument("--vectors", type=int, default=200_000, help="Number of synthetic vectors")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension")
+    parser.add_argument("--workers", type=int, default=4, help="Number of worker processes")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per worker")
+    parser.add_argument("--top_k", type=int, default=3, help="Results per query")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"📦 Building index with {args.vectors} vectors (dim={args.dim})...")
+        index_path, map_path = build_index(tmp, args.vectors, args.dim)
+        for use_mmap in (False, True):
+            run(index_path, map_path, use_mmap, args.workers, args.dim, args.queries, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
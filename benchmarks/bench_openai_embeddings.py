@@ -0,0 +1,196 @@
+"""
+Benchmark: OpenAI embedding throughput against a local stub server.
+
+Starts an OpenAI-compatible /v1/embeddings server in a child process. It
+returns deterministic vectors (seeded by the text) after a simulated latency
+and answers 429 with Retry-After once a requests-per-second budget is used up.
+Compares one request per text (the old get_embedding path), sequential
+fixed-size batches (the old get_embeddings path) and OpenAIEmbedder at
+several concurrency levels, and checks every result is in input order.
+
+Usage:
+  python -m benchmarks.bench_openai_embeddings --texts 20000 --latency_ms 50 --rps 40 --concurrency 1 4 8
+"""
+
+import argparse
+import base64
+import json
+import multiprocessing
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from openai import OpenAI
+
+from ingestion.openai_embedder import OpenAIEmbedder
+
+
+def stub_vector(text, dim):
+    return np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(dim).astype("float32")
+
+
+def _serve(port, dim, latency_ms, per_input_ms, rps, max_inputs, requests, rejected):
+    """Stub server process; requests/rejected are shared counters"""
+    lock = threading.Lock()
+    window = [time.monotonic(), 0]
+
+    def admit():
+        """None if the request is within the per-second budget, else seconds to wait"""
+        with lock:
+            requests.value += 1
+            if not rps:
+                return None
+            now = time.monotonic()
+            if now - window[0] >= 1.0:
+                window[:] = [now, 0]
+            if window[1] < rps:
+                window[1] += 1
+                return None
+            rejected.value += 1
+            return window[0] + 1.0 - now
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            retry_after = admit()
+            if retry_after is not None:
+                self._reply(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                            {"retry-after": f"{retry_after:.3f}"})
+                return
+            if len(inputs) > max_inputs:
+                self._reply(400, {"error": {"message": "Too many inputs", "type": "invalid_request_error"}})
+                return
+
+            time.sleep((latency_ms + per_input_ms * len(inputs)) / 1000)
+            as_base64 = body.get("encoding_format") == "base64"
+            data = []
+            for i, text in enumerate(inputs):
+                vector = stub_vector(text, dim)
+                embedding = base64.b64encode(vector.tobytes()).decode() if as_base64 else vector.tolist()
+                data.append({"object": "embedding", "index": i, "embedding": embedding})
+            self._reply(200, {
+                "object": "list",
+                "model": body.get("model"),
+                "data": data,
+                "usage": {"prompt_tokens": 0, "total_tokens": 0}
+            })
+
+        def _reply(self, status, payload, headers=None):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    port.value = server.server_address[1]
+    server.serve_forever()
+
+
+class StubEmbeddingServer:
+    """
+    OpenAI-compatible embeddings endpoint with simulated latency and rate
+    limiting, run in its own process so it does not compete with the client
+    for the GIL.
+    """
+
+    def __init__(self, dim=256, latency_ms=50.0, per_input_ms=0.05, rps=0.0, max_inputs=2048):
+        ctx = multiprocessing.get_context("fork")
+        self._port = ctx.Value("i", 0)
+        self._requests = ctx.Value("i", 0)
+        self._rejected = ctx.Value("i", 0)
+        self._process = ctx.Process(
+            target=_serve,
+            args=(self._port, dim, latency_ms, per_input_ms, rps, max_inputs, self._requests, self._rejected),
+            daemon=True
+        )
+
+    @property
+    def requests(self):
+        return self._requests.value
+
+    @property
+    def rejected(self):
+        return self._rejected.value
+
+    def __enter__(self):
+        self._process.start()
+        while not self._port.value:
+            time.sleep(0.01)
+        self.url = f"http://127.0.0.1:{self._port.value}/v1"
+        return self
+
+    def __exit__(self, *exc):
+        self._process.terminate()
+        self._process.join()
+
+
+def check_order(texts, vectors, dim):
+    expected = np.stack([stub_vector(text, dim) for text in texts])
+    return bool(np.allclose(vectors, expected, atol=1e-5))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI embedding batching benchmark (local stub server)")
+    parser.add_argument("--texts", type=int, default=5000, help="Number of chunks to embed")
+    parser.add_argument("--chars", type=int, default=1500, help="Characters per chunk")
+    parser.add_argument("--dim", type=int, default=256, help="Stub vector dimension")
+    parser.add_argument("--latency_ms", type=float, default=50.0, help="Simulated latency per request")
+    parser.add_argument("--rps", type=float, default=40.0, help="Requests per second before 429 (0 = unlimited)")
+    parser.add_argument("--max_tokens", type=int, default=250_000, help="Estimated tokens per request")
+    parser.add_argument("--max_inputs", type=int, default=256, help="Inputs per request")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="Requests in flight to test")
+    parser.add_argument("--single_sample", type=int, default=200, help="Texts sent one per request for the baseline")
+    args = parser.parse_args()
+
+    words = "retrieval augmented generation splits documents into overlapping chunks before embedding".split()
+    texts = []
+    for i in range(args.texts):
+        body = " ".join(words[(i + j) % len(words)] for j in range(args.chars // 8))
+        texts.append(f"chunk {i}: {body}"[:args.chars])
+
+    def report(label, n, requests, seconds, ordered, extra=""):
+        print(f"{label:>22} | {n / seconds:9.0f} texts/s | {requests:6d} requests | {seconds:7.2f}s"
+              f" | ordered {ordered}{extra}")
+
+    with StubEmbeddingServer(args.dim, args.latency_ms, rps=args.rps, max_inputs=max(args.max_inputs, 2048)) as stub:
+        client = OpenAI(api_key="stub", base_url=stub.url, max_retries=0)
+
+        # Old get_embedding path: one text per request, one request at a time
+        sample = texts[:args.single_sample]
+        embedder = OpenAIEmbedder(client, concurrency=1, max_inputs=1)
+        start_requests, t0 = stub.requests, time.perf_counter()
+        vectors = np.stack([embedder.embed([text])[0] for text in sample])
+        report("1 text/request", len(sample), stub.requests - start_requests, time.perf_counter() - t0,
+               check_order(sample, vectors, args.dim))
+
+        # Old get_embeddings path: fixed batches of 64, sequential
+        embedder = OpenAIEmbedder(client, concurrency=1, max_inputs=64)
+        start_requests, t0 = stub.requests, time.perf_counter()
+        vectors = embedder.embed(texts)
+        report("64/request, serial", len(texts), stub.requests - start_requests, time.perf_counter() - t0,
+               check_order(texts, vectors, args.dim))
+
+        for concurrency in args.concurrency:
+            embedder = OpenAIEmbedder(client, max_tokens=args.max_tokens, max_inputs=args.max_inputs,
+                                      concurrency=concurrency, backoff_base=0.05)
+            start_requests, t0 = stub.requests, time.perf_counter()
+            vectors = embedder.embed(texts)
+            stats = embedder.stats()
+            report(f"packed, {concurrency} in flight", len(texts), stub.requests - start_requests,
+                   time.perf_counter() - t0, check_order(texts, vectors, args.dim),
+                   f" | 429s {stats['rate_limited']} | final limit {stats['concurrency_limit']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark: Qdrant query path in local in-process mode (QdrantClient(":memory:")).
+
+Loads synthetic chunks with realistic text payloads, then compares:
+
+  - store construction: get_collections on every __init__ (old) against the
+    cached collection metadata
+  - one search per question with the full payload (old) against payloads
+    trimmed to the fields a caller needs
+  - one search per question against a single batched multi-query search
+  - concurrent searches on the async client
+
+In-process mode has no network hop and scores every query with a plain
+numpy scan, so it mostly shows client-side overhead: batching and lean
+payloads gain little there. Pass --location with a server URL to measure
+the round trips and payload bytes they save against a real Qdrant.
+
+Usage:
+  python -m benchmarks.bench_qdrant --chunks 20000 --queries 200 --batch 16
+  python -m benchmarks.bench_qdrant --location http://localhost:6333
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import PointStruct
+
+from retrieval.qdrant_store import QdrantVectorStore
+
+LEAN_FIELDS = ["source", "chunk_number"]
+
+
+def report(label, latencies, per=1):
+    latencies = np.asarray(latencies) / per
+    print(f"{label:>40} | p50 {np.percentile(latencies, 50):7.3f} ms | p99 {np.percentile(latencies, 99):7.3f} ms")
+
+
+def timed(fn, items):
+    latencies = []
+    for item in items:
+        t0 = time.perf_counter()
+        fn(item)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return latencies
+
+
+def points_for(chunks, vectors):
+    return [
+        PointStruct(id=str(uuid.uuid5(uuid.NAMESPACE_URL, chunk["id"])), vector=vector.tolist(), payload=chunk)
+        for chunk, vector in zip(chunks, vectors)
+    ]
+
+
+async def async_bench(store, vectors_config, points, queries, concurrency, top_k):
+    """Total milliseconds for all queries with `concurrency` searches in flight on the async client"""
+    if not await store.async_client.collection_exists(store.collection_name):
+        # In-process mode: the async client has its own storage
+        await store.async_client.create_collection(collection_name=store.collection_name, vectors_config=vectors_config)
+        await store.async_client.upsert(collection_name=store.collection_name, points=points, wait=True)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(query):
+        async with semaphore:
+            await store.asearch_by_vector(query, top_k, fields=LEAN_FIELDS)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in queries))
+    return (time.perf_counter() - t0) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Qdrant query path benchmark (in-process mode)")
+    parser.add_argument("--chunks", type=int, default=20000, help="Number of synthetic chunks")
+    parser.add_argument("--text_chars", type=int, default=1500, help="Characters of text per chunk payload")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--top_k", type=int, default=10, help="Results per query")
+    parser.add_argument("--batch", type=int, default=16, help="Questions per batched search")
+    parser.add_argument("--concurrency", type=int, default=8, help="Async searches in flight")
+    parser.add_argument("--location", default=":memory:", help="\":memory:\" (in-process) or a Qdrant server URL")
+    args = parser.parse_args()
+
+    client = QdrantClient(args.location)
+    store = QdrantVectorStore("bench_chunks", client=client, async_client=AsyncQdrantClient(args.location))
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.chunks, store.dim), dtype="float32")
+    filler = ("retrieval augmented generation answers questions from retrieved document chunks " * 40)[:args.text_chars]
+    chunks = [
+        {"id": f"chunk-{i}", "text": f"{i} {filler}", "source": f"doc-{i // 100}.pdf", "chunk_number": i % 100}
+        for i in range(args.chunks)
+    ]
+    queries = rng.standard_normal((args.queries, store.dim), dtype="float32")
+
+    t0 = time.perf_counter()
+    for start in range(0, args.chunks, 1000):
+        store.store(chunks[start:start + 1000], vectors[start:start + 1000])
+    print(f"corpus: {args.chunks} chunks x {store.dim} dims, {args.text_chars}-char payloads "
+          f"(load {time.perf_counter() - t0:.1f}s)")
+
+    # Store construction
+    report("init, get_collections each time", timed(lambda _: client.get_collections(), range(200)))
+    report("init, cached metadata", timed(lambda _: QdrantVectorStore("bench_chunks", client=client), range(200)))
+
+    # Payload size
+    full = timed(lambda q: store.search_by_vector(q, args.top_k), queries)
+    lean = timed(lambda q: store.search_by_vector(q, args.top_k, fields=LEAN_FIELDS), queries)
+    report("search, full payload", full)
+    report(f"search, fields={LEAN_FIELDS}", lean)
+    print(f"{'lean payload speedup':>40} | {np.median(full) / np.median(lean):.2f}x")
+
+    # Batched multi-query search; latencies are per question
+    batches = [queries[i:i + args.batch] for i in range(0, len(queries), args.batch)]
+    single = timed(lambda batch: [store.search_by_vector(q, args.top_k, fields=LEAN_FIELDS) for q in batch], batches)
+    batched = timed(lambda batch: store.search_batch_by_vector(batch, args.top_k, fields=LEAN_FIELDS), batches)
+    report(f"{args.batch} questions, one search each", single, per=args.batch)
+    report(f"{args.batch} questions, one batch search", batched, per=args.batch)
+    print(f"{'batch speedup':>40} | {np.median(single) / np.median(batched):.2f}x")
+
+    # Results agree between the single and batched paths
+    expected = [store.search_by_vector(q, args.top_k, fields=LEAN_FIELDS) for q in queries[:args.batch]]
+    got = store.search_batch_by_vector(queries[:args.batch], args.top_k, fields=LEAN_FIELDS)
+    print(f"{'batch results match':>40} | {expected == got}")
+
+    # Async client
+    vectors_config = client.get_collection(store.collection_name).config.params.vectors
+    total_ms = asyncio.run(async_bench(store, vectors_config, points_for(chunks, vectors), queries,
+                                       args.concurrency, args.top_k))
+    print(f"{f'async, {args.concurrency} in flight':>40} | {total_ms / len(queries):7.3f} ms/query "
+          f"({len(queries) / total_ms * 1000:.0f} queries/s)")
+
+    client.delete_collection(store.collection_name)
+
+
+if __name__ == "__main__":
+    main()
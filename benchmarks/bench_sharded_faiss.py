@@ -0,0 +1,58 @@
+"""
+Benchmark: query latency of the sharded FAISS store against shard count.
+
+Stores the same synthetic vectors into 1, 2, 4, ... shards (embeddings are
+passed in, so no model is needed) and times searches by vector.
+
+Usage:
+  python -m benchmarks.bench_sharded_faiss --vectors 500000 --shards 1 2 4 8
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from retrieval.sharded_faiss_store import ShardedFaissVectorStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded FAISS latency benchmark")
+    parser.add_argument("--vectors", type=int, default=200_000, help="Number of synthetic vectors")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8], help="Shard counts to test")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--top_k", type=int, default=5, help="Results per query")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.random((args.vectors, args.dim), dtype="float32")
+    chunks = [
+        {"id": f"chunk-{i}", "text": f"synthetic chunk {i}", "source": f"doc-{i % 100}.pdf", "chunk_number": i}
+        for i in range(args.vectors)
+    ]
+    queries = rng.random((args.queries, args.dim), dtype="float32")
+
+    for num_shards in args.shards:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ShardedFaissVectorStore(root=tmp, num_shards=num_shards, shard_by="hash")
+
+            t0 = time.perf_counter()
+            store.store(chunks, vectors)
+            build_s = time.perf_counter() - t0
+
+            store.search_by_vector(queries[0], args.top_k)  # warm up
+            latencies = []
+            for q in queries:
+                t0 = time.perf_counter()
+                store.search_by_vector(q, args.top_k)
+                latencies.append((time.perf_counter() - t0) * 1000)
+
+            print(f"shards={num_shards:>3} | build {build_s:7.2f}s"
+                  f" | p50 {np.percentile(latencies, 50):7.2f} ms"
+                  f" | p99 {np.percentile(latencies, 99):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark: small-to-big retrieval against single-level chunks.
+
+Builds a synthetic multi-page corpus. Each page draws its sentences from its
+own topic vocabulary. The corpus is ingested as flat chunks (large and
+small) and as small_to_big children with page and section parents, each
+into its own FAISS collection.
+
+For every layout it reports:
+  - vectors, index size, chunk payload size and parent store size
+  - search p50/p99 latency, including parent expansion
+  - context characters handed to the LLM per question
+  - hit@k: how often the returned context contains the whole sentence the
+    query was taken from
+
+Queries are corpus sentences with words dropped. --embedder hash uses a
+hashed bag-of-words so the benchmark runs without the embedding model.
+
+Usage:
+  python -m benchmarks.bench_small_to_big --docs 50 --pages 20 --queries 300
+  python -m benchmarks.bench_small_to_big --embedder hash --child_size 200 --flat_size 1000
+"""
+
+import argparse
+import json
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+from api.core.config import settings
+from ingestion.ingest import chunk_document
+from retrieval.vector_store import VectorStore
+
+
+def hash_embed(texts, dim):
+    """Signed hashed bag-of-words vectors, L2-normalised"""
+    vectors = np.zeros((len(texts), dim), dtype="float32")
+    for row, text in enumerate(texts):
+        for word in text.lower().split():
+            h = zlib.crc32(word.strip(".,").encode("utf-8"))
+            vectors[row, h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-9)
+
+
+def build_corpus(rng, docs, pages, sentences_per_page, topic_words=30, common_words=200):
+    """Return ({source: pages}, [(source, char_start, char_end, sentence)])"""
+    common = [f"word{i}" for i in range(common_words)]
+    corpus, sentences = {}, []
+    for d in range(docs):
+        source = f"doc-{d}.pdf"
+        texts = []
+        offset = 0
+        for p in range(pages):
+            topic = [f"topic{d}x{p}w{i}" for i in range(topic_words)]
+            page = []
+            pos = offset
+            for _ in range(sentences_per_page):
+                words = [
+                    topic[rng.integers(len(topic))] if rng.random() < 0.4 else common[rng.integers(len(common))]
+                    for _ in range(rng.integers(8, 16))
+                ]
+                sentence = " ".join(words).capitalize() + "."
+                sentences.append((source, pos, pos + len(sentence), sentence))
+                page.append(sentence)
+                pos += len(sentence) + 1
+            text = " ".join(page)
+            texts.append(text)
+            offset += len(text) + 1
+        corpus[source] = texts
+    return corpus, sentences
+
+
+def covers(chunk, source, start, end):
+    return chunk.get("source") == source and chunk.get("char_start", 0) <= start and chunk.get("char_end", 0) >= end
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Small-to-big retrieval benchmark")
+    parser.add_argument("--docs", type=int, default=50, help="Synthetic documents")
+    parser.add_argument("--pages", type=int, default=20, help="Pages per document")
+    parser.add_argument("--sentences", type=int, default=25, help="Sentences per page")
+    parser.add_argument("--flat_size", type=int, default=1000, help="Large flat chunk size (chars)")
+    parser.add_argument("--flat_overlap", type=int, default=100, help="Large flat chunk overlap")
+    parser.add_argument("--child_size", type=int, default=200, help="Small chunk / child size (chars)")
+    parser.add_argument("--child_overlap", type=int, default=20, help="Small chunk / child overlap")
+    parser.add_argument("--section_size", type=int, default=2000, help="Parent size for section parents")
+    parser.add_argument("--queries", type=int, default=300, help="Number of queries")
+    parser.add_argument("--top_k", type=int, default=3, help="Contexts per question")
+    parser.add_argument("--embedder", choices=["model", "hash"], default="model",
+                        help="Configured embedding model, or hashed bag-of-words")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension for --embedder hash")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    corpus, sentences = build_corpus(rng, args.docs, args.pages, args.sentences)
+    picks = [sentences[i] for i in rng.choice(len(sentences), args.queries, replace=False)]
+    queries = []
+    for _, _, _, sentence in picks:
+        words = sentence.split()
+        keep = rng.random(len(words)) > 0.25
+        queries.append(" ".join(w for w, k in zip(words, keep) if k) or sentence)
+
+    if args.embedder == "hash":
+        embed = lambda texts: hash_embed(texts, args.dim)
+    else:
+        from ingestion.embedding import get_embeddings
+        embed = get_embeddings
+    query_vectors = embed(queries)
+
+    layouts = [
+        (f"flat {args.flat_size}", "flat", args.flat_size, args.flat_overlap, None),
+        (f"flat {args.child_size}", "flat", args.child_size, args.child_overlap, None),
+        (f"s2b {args.child_size} -> page", "small_to_big", args.child_size, args.child_overlap, "page"),
+        (f"s2b {args.child_size} -> section", "small_to_big", args.child_size, args.child_overlap, "section"),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.VECTOR_DB = "faiss"
+        settings.FAISS_COLLECTIONS_DIR = f"{tmp}/collections"
+        settings.PARENT_STORE_DIR = f"{tmp}/parents"
+        settings.PARENT_SECTION_SIZE = args.section_size
+
+        print(f"corpus: {args.docs} docs x {args.pages} pages, "
+              f"{sum(len(t) for pages in corpus.values() for t in pages) / 1e6:.1f}M chars, {args.queries} queries")
+        print(f"{'layout':>22} | {'vectors':>7} | index MB | payload MB | parent MB | p50 ms | p99 ms"
+              f" | context chars | hit@{args.top_k}")
+
+        for i, (label, strategy, size, overlap, parent_unit) in enumerate(layouts):
+            if parent_unit:
+                settings.PARENT_UNIT = parent_unit
+            chunks = [
+                chunk
+                for source, pages in corpus.items()
+                for chunk in chunk_document(pages, source, size, overlap, "chars", strategy)
+            ]
+            vectors = embed([chunk["text"] for chunk in chunks])
+            payload_bytes = sum(
+                len(json.dumps({k: v for k, v in chunk.items() if k != "parent"}).encode("utf-8")) for chunk in chunks
+            )
+
+            vs = VectorStore(mmap=False, collection=f"layout{i}")
+            vs.store(chunks, vectors)
+            index_bytes = vs.backend.index.ntotal * vectors.shape[1] * 4
+
+            vs.search_by_vector(query_vectors[0], args.top_k)  # warm up
+            latencies, context_chars, hits = [], [], 0
+            for q, (source, start, end, _) in zip(query_vectors, picks):
+                t0 = time.perf_counter()
+                results = vs.search_by_vector(q, args.top_k)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                context_chars.append(sum(len(chunk["text"]) for chunk, _ in results))
+                hits += any(covers(chunk, source, start, end) for chunk, _ in results)
+
+            print(f"{label:>22} | {len(chunks):7d} | {index_bytes / 1e6:8.2f} | {payload_bytes / 1e6:10.2f}"
+                  f" | {vs.parents.size_bytes() / 1e6:9.2f} | {np.percentile(latencies, 50):6.2f}"
+                  f" | {np.percentile(latencies, 99):6.2f} | {np.mean(context_chars):13.0f} | {hits / len(picks):.3f}")
+
+
+if __name__ == "__main__":
+    main()
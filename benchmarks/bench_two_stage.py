@@ -0,0 +1,76 @@
+"""
+Benchmark: two-stage (documents, then their chunks) search against a full scan.
+
+Builds a synthetic corpus of many documents whose chunks cluster around a
+per-document topic vector, then compares latency and recall@k of
+mode="two_stage" (for several top_docs values) with mode="full". Recall is
+measured against the full (exact) search results.
+
+Usage:
+  python -m benchmarks.bench_two_stage --docs 2000 --chunks_per_doc 100 --top_docs 5 10 20 50
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from retrieval.faiss_store import FaissVectorStore
+
+
+def timed_search(store, queries, top_k, **kwargs):
+    store.search_by_vector(queries[0], top_k, **kwargs)  # warm up (builds the document index)
+    latencies, results = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        hits = store.search_by_vector(q, top_k, **kwargs)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        results.append({chunk["id"] for chunk, _ in hits})
+    return latencies, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Two-stage search latency/recall benchmark")
+    parser.add_argument("--docs", type=int, default=1000, help="Number of synthetic documents")
+    parser.add_argument("--chunks_per_doc", type=int, default=100, help="Chunks per document")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension")
+    parser.add_argument("--spread", type=float, default=0.5, help="Chunk noise around the document topic")
+    parser.add_argument("--top_docs", type=int, nargs="+", default=[5, 10, 20, 50], help="top_docs values to test")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--top_k", type=int, default=5, help="Results per query")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    topics = rng.standard_normal((args.docs, args.dim), dtype="float32")
+    doc_of = np.repeat(np.arange(args.docs), args.chunks_per_doc)
+    vectors = topics[doc_of] + args.spread * rng.standard_normal((len(doc_of), args.dim), dtype="float32")
+    chunks = [
+        {"id": f"chunk-{i}", "text": f"synthetic chunk {i}", "source": f"doc-{d}.pdf", "chunk_number": i}
+        for i, d in enumerate(doc_of)
+    ]
+    # Queries are perturbed chunks, so their nearest neighbours span a few documents
+    picks = rng.integers(0, len(vectors), args.queries)
+    queries = vectors[picks] + args.spread * rng.standard_normal((args.queries, args.dim), dtype="float32")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FaissVectorStore(f"{tmp}/faiss.index", f"{tmp}/chunks_map.json", mmap=False, snapshot_dir="")
+        t0 = time.perf_counter()
+        store.store(chunks, vectors)
+        print(f"corpus: {args.docs} docs x {args.chunks_per_doc} chunks = {len(chunks)} vectors "
+              f"(build {time.perf_counter() - t0:.1f}s)")
+
+        full_lat, truth = timed_search(store, queries, args.top_k, mode="full")
+        print(f"{'full':>16} | p50 {np.percentile(full_lat, 50):7.2f} ms"
+              f" | p99 {np.percentile(full_lat, 99):7.2f} ms | recall@{args.top_k} 1.000")
+
+        for top_docs in args.top_docs:
+            lat, found = timed_search(store, queries, args.top_k, mode="two_stage", top_docs=top_docs)
+            recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth) if t])
+            print(f"{f'two_stage n={top_docs}':>16} | p50 {np.percentile(lat, 50):7.2f} ms"
+                  f" | p99 {np.percentile(lat, 99):7.2f} ms | recall@{args.top_k} {recall:.3f}"
+                  f" | speedup {np.median(full_lat) / np.median(lat):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Chunk files for splitting chunking from embedding.
+
+The format follows the file extension:
+
+    .jsonl       one JSON chunk per line
+    .jsonl.zst   the same, zstd-compressed
+    .json        legacy pretty-printed JSON array
+
+All three are written incrementally. JSONL files are also read back as a
+stream in fixed-size batches, each paired with the position to resume from.
+"""
+
+import io
+import json
+
+import zstandard
+
+
+def chunk_format(path):
+    path = str(path)
+    if path.endswith(".jsonl.zst"):
+        return "jsonl.zst"
+    if path.endswith(".jsonl"):
+        return "jsonl"
+    return "json"
+
+
+class ChunkWriter:
+    """Append chunks to a chunk file one at a time (use as a context manager)"""
+
+    def __init__(self, path, level=3):
+        self.path = str(path)
+        self.format = chunk_format(path)
+        self.count = 0
+        raw = open(self.path, "wb")
+        if self.format == "jsonl.zst":
+            self._file = zstandard.ZstdCompressor(level=level).stream_writer(raw)
+        else:
+            self._file = raw
+        if self.format == "json":
+            self._file.write(b"[")
+
+    def write(self, chunk):
+        if self.format == "json":
+            prefix = b",\n" if self.count else b"\n"
+            self._file.write(prefix + json.dumps(chunk, indent=4, ensure_ascii=False).encode("utf-8"))
+        else:
+            self._file.write(json.dumps(chunk, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.count += 1
+
+    def write_all(self, chunks):
+        for chunk in chunks:
+            self.write(chunk)
+
+    def close(self):
+        if self.format == "json":
+            self._file.write(b"\n]" if self.count else b"]")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _open_lines(path, start):
+    """Binary line reader positioned at byte `start` of the (decompressed) stream"""
+    raw = open(path, "rb")
+    if chunk_format(path) == "jsonl":
+        raw.seek(start)
+        return raw
+
+    reader = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+    # zstd streams cannot seek; decompress and discard up to the resume point
+    remaining = start
+    while remaining:
+        skipped = len(reader.read(min(remaining, 1 << 20)))
+        if not skipped:
+            break
+        remaining -= skipped
+    return reader
+
+
+def iter_chunk_batches(path, batch_size=256, start=0):
+    """
+    Stream chunks from a chunk file in batches.
+
+    Args:
+        path (str): .jsonl, .jsonl.zst or legacy .json file
+        batch_size (int): Chunks per batch
+        start (int): Position returned with an earlier batch, to resume after it.
+            A byte offset for JSONL (into the decompressed stream for .zst);
+            a chunk index for legacy .json, which has to be loaded whole
+
+    Yields:
+        tuple: (list of chunks, position just after the batch)
+    """
+    if chunk_format(path) == "json":
+        with open(path, "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+        for i in range(start, len(chunks), batch_size):
+            yield chunks[i:i + batch_size], min(i + batch_size, len(chunks))
+        return
+
+    position = start
+    batch = []
+    with _open_lines(str(path), start) as f:
+        for line in f:
+            position += len(line)
+            if not line.strip():
+                continue
+            batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                yield batch, position
+                batch = []
+    if batch:
+        yield batch, position
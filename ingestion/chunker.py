@@ -1,26 +1,236 @@
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from bisect import bisect_left, bisect_right
+from api.core.config import settings
 
-def chunk_text(text, chunk_size=500, chunk_overlap=50):
+# Preferred break points, strongest first
+SEPARATORS = ["\n\n", "\n", ". ", " "]
+
+# Default chunk_size in characters
+DEFAULT_CHUNK_CHARS = 500
+# [CLS] and [SEP], added by the embedding model inside its window
+SPECIAL_TOKENS = 2
+
+_tokenizer = None
+
+def get_tokenizer():
+    """Load (once) the fast tokenizer used for token-based chunk sizing"""
+    global _tokenizer
+    if _tokenizer is None:
+        from tokenizers import Tokenizer
+        _tokenizer = Tokenizer.from_pretrained(settings.CHUNK_TOKENIZER)
+    return _tokenizer
+
+def max_chunk_tokens():
+    """Largest token chunk_size the embedding model embeds without truncation"""
+    return settings.CHUNK_MAX_TOKENS - SPECIAL_TOKENS
+
+def resolve_chunk_size(chunk_size=None, unit=None):
+    """
+    Return the chunk size to embed with: chunk_size, or the default for unit
+    (500 characters, or the model's token window). Raises ValueError if a
+    token chunk_size does not fit the window.
+    """
+    unit = unit or settings.CHUNK_UNIT
+    if unit == "tokens":
+        if chunk_size is None:
+            return max_chunk_tokens()
+        if chunk_size > max_chunk_tokens():
+            raise ValueError(
+                f"chunk_size {chunk_size} exceeds the embedding model's window of {settings.CHUNK_MAX_TOKENS} tokens "
+                f"({max_chunk_tokens()} without special tokens); longer chunks would be truncated"
+            )
+        return chunk_size
+    return DEFAULT_CHUNK_CHARS if chunk_size is None else chunk_size
+
+def _break_before(text, start, end):
+    """
+    Return the best offset in (start, end] to end a chunk at: just after the
+    strongest separator in the second half of the window, else end.
+    """
+    lo = start + (end - start) // 2
+    for sep in SEPARATORS:
+        i = text.rfind(sep, lo, end)
+        if i != -1:
+            return i + len(sep)
+    return end
+
+def _char_spans(text, chunk_size, chunk_overlap):
+    n = len(text)
+    pos = 0
+    while pos < n:
+        while pos < n and text[pos].isspace():
+            pos += 1
+        if pos >= n:
+            break
+
+        end = min(pos + chunk_size, n)
+        if end < n:
+            end = _break_before(text, pos, end)
+
+        stop = end
+        while stop > pos and text[stop - 1].isspace():
+            stop -= 1
+        yield pos, stop
+
+        if end >= n:
+            break
+        next_pos = max(end - chunk_overlap, pos + 1)
+        if chunk_overlap and not text[next_pos - 1].isspace():
+            # Don't start the overlap mid-word; drop it if no word fits
+            while next_pos < end and not text[next_pos].isspace():
+                next_pos += 1
+        pos = next_pos
+
+def _token_spans(text, chunk_size, chunk_overlap):
+    offsets = get_tokenizer().encode(text, add_special_tokens=False).offsets
+    starts = [s for s, _ in offsets]
+    n = len(offsets)
+    i = 0
+    while i < n:
+        j = min(i + chunk_size, n)
+        if j < n:
+            lo = i + max(1, (j - i) // 2)
+            # Prefer a separator between token lo and token j, else a word boundary
+            for sep in SEPARATORS[:-1]:
+                k = text.rfind(sep, starts[lo], starts[j])
+                if k != -1:
+                    j = bisect_left(starts, k + len(sep), lo, j)
+                    break
+            else:
+                for k in range(j, lo, -1):
+                    if text[starts[k] - 1].isspace():
+                        j = k
+                        break
+        yield offsets[i][0], offsets[j - 1][1]
+        if j >= n:
+            break
+        i = max(j - chunk_overlap, i + 1)
+
+def chunk_spans(text, chunk_size=500, chunk_overlap=50, unit=None):
+    """
+    Yield (start, end) character offsets of chunks without copying text.
+
+    Args:
+        text (str): Input text to split
+        chunk_size (int): Maximum size of each chunk, in `unit`s
+        chunk_overlap (int): Overlap between consecutive chunks, in `unit`s
+        unit (str): "chars" or "tokens" (embedding model tokenizer);
+            defaults to settings.CHUNK_UNIT
+    """
+    unit = unit or settings.CHUNK_UNIT
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap must be smaller than chunk_size")
+    if unit == "chars":
+        return _char_spans(text, chunk_size, chunk_overlap)
+    elif unit == "tokens":
+        return _token_spans(text, chunk_size, chunk_overlap)
+    else:
+        raise ValueError(f"Unknown chunk unit: {unit}")
+
+def chunk_text(text, chunk_size=None, chunk_overlap=50, unit=None):
     """
-    Split text into chunks using recursive character splitting.
-    
+    Split text into chunks, breaking at paragraph, line, sentence or word
+    boundaries where possible.
+
     Args:
         text (str): Input text to split
-        chunk_size (int): Maximum size of each chunk
+        chunk_size (int): Maximum size of each chunk; see resolve_chunk_size
         chunk_overlap (int): Overlap between chunks
-    
+        unit (str): "chars" or "tokens"; defaults to settings.CHUNK_UNIT
+
     Returns:
         list: List of text chunks
     """
+    chunk_size = resolve_chunk_size(chunk_size, unit)
     if not text or not text.strip():
         return []
-    
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len,
-        separators=["\n\n", "\n", " ", ""]
-    )
-    
-    chunks = text_splitter.create_documents([text])
-    return [chunk.page_content for chunk in chunks]
\ No newline at end of file
+
+    return [text[s:e] for s, e in chunk_spans(text, chunk_size, chunk_overlap, unit)]
+
+def _page_offsets(pages):
+    """Start offset of each page in the newline-joined document text"""
+    offsets = []
+    pos = 0
+    for page in pages:
+        offsets.append(pos)
+        pos += len(page) + 1
+    return offsets
+
+def _describe_span(text, page_offsets, s, e):
+    return {
+        "text": text[s:e],
+        "page_start": bisect_right(page_offsets, s),
+        "page_end": bisect_right(page_offsets, e - 1),
+        "char_start": s,
+        "char_end": e
+    }
+
+def chunk_pages(pages, chunk_size=None, chunk_overlap=50, unit=None):
+    """
+    Chunk a document given as per-page text, recording where each chunk came from.
+
+    Pages are joined with a newline so chunks may span a page break.
+
+    Args:
+        pages (list): Text of each page, in order
+        chunk_size (int): Maximum size of each chunk; see resolve_chunk_size
+        chunk_overlap (int): Overlap between chunks
+        unit (str): "chars" or "tokens"; defaults to settings.CHUNK_UNIT
+
+    Returns:
+        list: Dicts with text, page_start, page_end (1-based), char_start and
+            char_end (offsets into the joined document text)
+    """
+    chunk_size = resolve_chunk_size(chunk_size, unit)
+    text = "\n".join(pages)
+    if not text.strip():
+        return []
+
+    page_offsets = _page_offsets(pages)
+    return [
+        _describe_span(text, page_offsets, s, e)
+        for s, e in chunk_spans(text, chunk_size, chunk_overlap, unit)
+    ]
+
+def chunk_pages_small_to_big(pages, chunk_size=200, chunk_overlap=20, parent_unit="page", parent_size=4000, unit=None):
+    """
+    Split a document into parent passages and the small child chunks that get embedded.
+
+    Children never cross a parent boundary, so each belongs to exactly one parent.
+
+    Args:
+        pages (list): Text of each page, in order
+        chunk_size (int): Maximum size of each child chunk (must fit the
+            embedding model's window in tokens; parents need not)
+        chunk_overlap (int): Overlap between child chunks of the same parent
+        parent_unit (str): "page" (one parent per non-empty page) or "section"
+            (consecutive parent_size spans of the joined text)
+        parent_size (int): Section size, in `unit`s
+        unit (str): "chars" or "tokens"; defaults to settings.CHUNK_UNIT
+
+    Returns:
+        tuple: (parents, children); both are dicts like chunk_pages returns,
+            and each child also has "parent", the index of its parent
+    """
+    chunk_size = resolve_chunk_size(chunk_size, unit)
+    text = "\n".join(pages)
+    if not text.strip():
+        return [], []
+
+    page_offsets = _page_offsets(pages)
+    if parent_unit == "page":
+        parent_spans = [
+            (start, start + len(page)) for start, page in zip(page_offsets, pages) if page.strip()
+        ]
+    elif parent_unit == "section":
+        parent_spans = chunk_spans(text, parent_size, 0, unit)
+    else:
+        raise ValueError(f"Unknown parent unit: {parent_unit}")
+
+    parents, children = [], []
+    for s, e in parent_spans:
+        for cs, ce in chunk_spans(text[s:e], chunk_size, chunk_overlap, unit):
+            child = _describe_span(text, page_offsets, s + cs, s + ce)
+            child["parent"] = len(parents)
+            children.append(child)
+        parents.append(_describe_span(text, page_offsets, s, e))
+    return parents, children
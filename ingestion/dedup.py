@@ -0,0 +1,269 @@
+import json
+import re
+import threading
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from api.core.config import settings
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD_RE = re.compile(r"\w+")
+
+
+def _lsh_params(threshold, num_perm):
+    """Pick (bands, rows) with bands * rows == num_perm whose S-curve knee is closest to threshold"""
+    best = None
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        knee = (1 / bands) ** (1 / rows)
+        if best is None or abs(knee - threshold) < best[0]:
+            best = (abs(knee - threshold), bands, rows)
+    return best[1], best[2]
+
+
+class MinHasher:
+    """MinHash signatures over word shingles, stable across processes"""
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def _shingle_hashes(self, text):
+        words = _WORD_RE.findall(text.lower())
+        k = self.shingle_size
+        if len(words) <= k:
+            shingles = [" ".join(words)]
+        else:
+            shingles = [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+        return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in set(shingles)), dtype=np.uint64)
+
+    def signature(self, text):
+        hv = self._shingle_hashes(text)
+        # Universal hashing (a*x + b) mod p, wrapping in uint64 like datasketch
+        with np.errstate(over="ignore"):
+            phv = ((self._a[:, None] * hv[None, :] + self._b[:, None]) % _MERSENNE_PRIME) & _MAX_HASH
+        return phv.min(axis=1).astype(np.uint32)
+
+
+class DedupIndex:
+    """
+    LSH index over MinHash signatures of canonical (kept) chunks.
+
+    Candidates share at least one LSH band; a candidate counts as a
+    near-duplicate when its estimated Jaccard similarity reaches `threshold`.
+    Lookups touch only the chunk's own buckets, so deduplicating n chunks is
+    roughly linear instead of quadratic. The index persists to an .npz file so
+    later ingests are checked against what is already stored.
+
+    Dropped duplicates from other sources are kept in `duplicates` under their
+    canonical chunk, so deleting the canonical chunk's source can promote one
+    of them in its place instead of losing the content. Their sources are
+    also recorded on the canonical chunk as "alt_sources": set directly on
+    chunks about to be stored, and returned by pop_alt_source_updates() for
+    chunks already in the store.
+    """
+
+    def __init__(self, path=None, threshold=0.85, num_perm=128):
+        self.path = Path(path) if path else None
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = _lsh_params(threshold, num_perm)
+        self.ids = []
+        self.sources = []
+        self.signatures = []
+        self.duplicates = {}  # canonical chunk id -> dropped duplicates, one per other source
+        self._stale = {}  # stored canonical chunk id -> source, whose alt_sources changed
+        self._buckets = [dict() for _ in range(self.bands)]
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            self._load()
+
+    def _band_keys(self, sig):
+        return [sig[b * self.rows:(b + 1) * self.rows].tobytes() for b in range(self.bands)]
+
+    def _load(self):
+        data = np.load(self.path, allow_pickle=False)
+        for chunk_id, source, sig in zip(data["ids"], data["sources"], data["signatures"]):
+            self._insert(str(chunk_id), str(source), sig)
+        if "duplicates" in data.files:
+            self.duplicates = json.loads(str(data["duplicates"]))
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.stem + ".tmp.npz")
+        np.savez(
+            tmp_path,
+            ids=np.array(self.ids, dtype=str),
+            sources=np.array(self.sources, dtype=str),
+            signatures=np.array(self.signatures, dtype=np.uint32).reshape(-1, self.hasher.num_perm),
+            duplicates=np.array(json.dumps(self.duplicates, ensure_ascii=False))
+        )
+        tmp_path.replace(self.path)
+
+    def _insert(self, chunk_id, source, sig):
+        row = len(self.ids)
+        self.ids.append(chunk_id)
+        self.sources.append(source)
+        self.signatures.append(sig)
+        for bucket, key in zip(self._buckets, self._band_keys(sig)):
+            bucket.setdefault(key, []).append(row)
+
+    def query(self, sig):
+        """Return the row of the most similar canonical chunk at or above threshold, or None"""
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(sig)):
+            candidates.update(bucket.get(key, ()))
+        best, best_score = None, self.threshold
+        for row in candidates:
+            score = float(np.mean(self.signatures[row] == sig))
+            if score >= best_score:
+                best, best_score = row, score
+        return best
+
+    def alt_sources(self, chunk_id):
+        """Sources of the near-duplicates dropped in favour of a canonical chunk"""
+        return [dup.get("source", "") for dup in self.duplicates.get(chunk_id, [])]
+
+    def pop_alt_source_updates(self):
+        """
+        Payload updates for stored chunks whose alt_sources changed since the
+        last call, as [{"id", "source", "alt_sources"}] (see update_payloads
+        on the vector stores).
+        """
+        with self._lock:
+            stale, self._stale = self._stale, {}
+            return [
+                {"id": chunk_id, "source": source, "alt_sources": self.alt_sources(chunk_id)}
+                for chunk_id, source in stale.items()
+            ]
+
+    def remove_source(self, source):
+        """
+        Forget canonical chunks of a deleted source (they can no longer absorb
+        duplicates). A removed chunk that absorbed duplicates from other
+        sources is replaced by the first of them, which becomes canonical and
+        must be stored by the caller, since it was never embedded.
+
+        Returns:
+            tuple: (number of canonical chunks and recorded duplicates
+                forgotten, chunks to store)
+        """
+        with self._lock:
+            canonical_sources = dict(zip(self.ids, self.sources))
+            duplicates, forgotten = {}, 0
+            for chunk_id, dups in self.duplicates.items():
+                kept = [dup for dup in dups if dup.get("source", "") != source]
+                forgotten += len(dups) - len(kept)
+                if kept:
+                    duplicates[chunk_id] = kept
+                if len(kept) < len(dups) and canonical_sources.get(chunk_id, source) != source:
+                    self._stale[chunk_id] = canonical_sources[chunk_id]
+
+            rows, promoted = [], []
+            for chunk_id, src, sig in zip(self.ids, self.sources, self.signatures):
+                if src != source:
+                    rows.append((chunk_id, src, sig))
+                    continue
+                # Deleted with its source, so there is no payload left to update
+                self._stale.pop(chunk_id, None)
+                dups = duplicates.pop(chunk_id, None)
+                if dups:
+                    first, *rest = dups
+                    promoted.append(first)
+                    rows.append((first["id"], first.get("source", ""), self.hasher.signature(first["text"])))
+                    if rest:
+                        duplicates[first["id"]] = rest
+                        first["alt_sources"] = [dup.get("source", "") for dup in rest]
+
+            removed = len(self.ids) - len(rows) + len(promoted)
+            self.duplicates = duplicates
+            if removed:
+                self.ids, self.sources, self.signatures = [], [], []
+                self._buckets = [dict() for _ in range(self.bands)]
+                for chunk_id, src, sig in rows:
+                    self._insert(chunk_id, src, sig)
+            return removed + forgotten, promoted
+
+    def deduplicate(self, chunks):
+        """
+        Drop near-duplicate chunks, keeping the first occurrence as canonical.
+
+        A duplicate from another source than its canonical chunk is recorded
+        in `duplicates` (see remove_source), and its source is added to the
+        canonical chunk's "alt_sources": on the kept chunk itself when it is
+        in this batch, otherwise through pop_alt_source_updates().
+
+        Returns:
+            tuple: (kept chunks, stats dict)
+        """
+        kept = []
+        recorded = []
+        changed = {}  # canonical chunk id -> source
+        dropped = 0
+        with self._lock:
+            for chunk in chunks:
+                sig = self.hasher.signature(chunk["text"])
+                row = self.query(sig)
+                if row is None:
+                    self._insert(chunk["id"], chunk.get("source", ""), sig)
+                    kept.append(chunk)
+                    continue
+
+                dropped += 1
+                source = chunk.get("source", "")
+                dups = self.duplicates.setdefault(self.ids[row], [])
+                if source != self.sources[row] and all(dup.get("source", "") != source for dup in dups):
+                    dup = {k: v for k, v in chunk.items() if k != "parent"}
+                    dups.append(dup)
+                    recorded.append(dup)
+                    changed[self.ids[row]] = self.sources[row]
+                if not dups:
+                    del self.duplicates[self.ids[row]]
+
+            for chunk in kept:
+                if changed.pop(chunk["id"], None) is not None:
+                    chunk["alt_sources"] = self.alt_sources(chunk["id"])
+            self._stale.update(changed)
+
+        # A dropped small_to_big chunk may be the one carrying its parent passage;
+        # hand it to the first kept sibling (a parent with no kept children is not needed)
+        carried = {chunk["parent_id"]: chunk["parent"] for chunk in chunks if "parent" in chunk}
+        for chunk in kept:
+            parent = carried.pop(chunk.get("parent_id"), None)
+            if parent is not None:
+                chunk["parent"] = parent
+        # ...unless a recorded duplicate is promoted later
+        for dup in recorded:
+            parent = carried.pop(dup.get("parent_id"), None)
+            if parent is not None:
+                dup["parent"] = parent
+
+        total = len(chunks)
+        return kept, {
+            "input": total,
+            "kept": len(kept),
+            "dropped": dropped,
+            "dedup_ratio": dropped / total if total else 0.0
+        }
+
+
+def dedup_index_path(collection=None):
+    return Path(settings.DEDUP_DIR) / f"{collection or 'default'}.npz"
+
+
+def get_dedup_index(collection=None):
+    return DedupIndex(
+        dedup_index_path(collection),
+        threshold=settings.DEDUP_THRESHOLD,
+        num_perm=settings.DEDUP_NUM_PERM
+    )
@@ -1,42 +1,97 @@
 import json
+from pathlib import Path
+from ingestion.chunk_io import iter_chunk_batches
+from ingestion.embedding import get_embeddings
 from retrieval.vector_store import VectorStore
 
-def load_chunks_and_store(json_path="chunks.json"):
+def _checkpoint_path(json_path):
+    return Path(f"{json_path}.offset")
+
+def load_chunks_and_store(json_path="chunks.json", batch_size=256, store_every=100_000, start=None, resume=False):
     """
-    Load chunks from JSON and store in vector database.
+    Stream chunks from a chunk file, embed them in batches and store them.
+    
+    Embedded batches are added to the index held in memory (see
+    VectorStore.append) and published as one snapshot every store_every
+    chunks and at the end, so the index is not reloaded and rewritten per
+    batch. After each publish the resume position is written to
+    `<json_path>.offset`, so a crashed run continues with resume=True;
+    chunks after the last publish are embedded again. Chunks without an id
+    or text are skipped.
     
     Args:
-        json_path (str): Path to JSON file with chunks
+        json_path (str): Chunk file (.jsonl, .jsonl.zst or legacy .json)
+        batch_size (int): Chunks read and embedded per batch
+        store_every (int): Chunks per published snapshot (and checkpoint);
+            0 publishes once at the end
+        start (int): Explicit position to resume from (see iter_chunk_batches)
+        resume (bool): Resume from the saved checkpoint, if any
     """
+    checkpoint = _checkpoint_path(json_path)
+    stored = 0
+    if start is None:
+        start = 0
+        if resume and checkpoint.exists():
+            saved = json.loads(checkpoint.read_text())
+            start, stored = saved["offset"], saved["stored"]
+            print(f"↩️ Resuming {json_path} from position {start} ({stored} chunks already stored)")
+
     try:
-        with open(json_path, "r", encoding="utf-8") as f:
-            chunks = json.load(f)
-        
-        if not chunks:
-            print("❌ No chunks found in JSON file")
+        vs = VectorStore(mmap=False)
+        pending = 0
+        skipped = 0
+        position = start
+
+        def flush():
+            nonlocal stored, pending
+            vs.flush()
+            stored += pending
+            pending = 0
+            checkpoint.write_text(json.dumps({"offset": position, "stored": stored}))
+            print(f"💾 Published {stored} chunks (position {position})")
+
+        for batch, position in iter_chunk_batches(json_path, batch_size, start):
+            valid = [chunk for chunk in batch if chunk.get("id") and (chunk.get("text") or "").strip()]
+            skipped += len(batch) - len(valid)
+            if valid:
+                pending += vs.append(valid, get_embeddings([chunk["text"] for chunk in valid]))
+            if store_every and pending >= store_every:
+                flush()
+        if pending:
+            flush()
+
+        if skipped:
+            print(f"⚠️ Skipped {skipped} chunks without an id or text")
+        if not stored:
+            print("❌ No chunks found in chunk file")
             return
-        
-        vs = VectorStore()
-        vs.store(chunks)
-        print(f"✅ Stored {len(chunks)} chunks in vector database")
+        checkpoint.unlink(missing_ok=True)
+        print(f"✅ Stored {stored} chunks in vector database")
         
     except FileNotFoundError:
-        print(f"❌ JSON file not found: {json_path}")
+        print(f"❌ Chunk file not found: {json_path}")
     except Exception as e:
         print(f"❌ Error storing chunks: {str(e)}")
+        if checkpoint.exists():
+            print(f"   Re-run with --resume to continue from {checkpoint}")
 
-def ingest_from_json(json_path="chunks.json"):
+def ingest_from_json(json_path="chunks.json", batch_size=256, store_every=100_000, start=None, resume=False):
     """
-    Complete ingestion pipeline from JSON to vector store.
+    Complete ingestion pipeline from a chunk file to vector store.
     """
     print(f"📦 Loading chunks from {json_path}...")
-    load_chunks_and_store(json_path)
+    load_chunks_and_store(json_path, batch_size, store_every, start, resume)
 
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description="Embed and Store Pipeline")
-    parser.add_argument("--input", "-i", default="chunks.json", help="Input JSON file")
+    parser.add_argument("--input", "-i", default="chunks.json", help="Input chunk file (.json, .jsonl or .jsonl.zst)")
+    parser.add_argument("--batch_size", type=int, default=256, help="Chunks read and embedded per batch")
+    parser.add_argument("--store_every", type=int, default=100_000,
+                        help="Chunks per published snapshot and checkpoint (0: publish once at the end)")
+    parser.add_argument("--start", type=int, help="Position to start from (byte offset, or chunk index for .json)")
+    parser.add_argument("--resume", action="store_true", help="Resume from the last checkpoint")
     
     args = parser.parse_args()
-    ingest_from_json(args.input)
\ No newline at end of file
+    ingest_from_json(args.input, args.batch_size, args.store_every, args.start, args.resume)
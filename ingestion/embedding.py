@@ -2,10 +2,12 @@ import numpy as np
 from sentence_transformers import SentenceTransformer
 from openai import OpenAI
 from api.core.config import settings
+from ingestion.openai_embedder import OpenAIEmbedder
 
 # Cache models and clients
 _local_model = None
 _openai_client = None
+_openai_embedder = None
 
 def get_embedding_dim():
     """Return the correct embedding dimension based on provider"""
@@ -16,6 +18,58 @@ def get_embedding_dim():
     else:
         raise ValueError(f"Unknown embedding provider: {settings.EMBEDDING_PROVIDER}")
 
+def _get_local_model():
+    global _local_model
+    if _local_model is None:
+        _local_model = SentenceTransformer("all-MiniLM-L6-v2")
+    return _local_model
+
+def _get_openai_client():
+    global _openai_client
+    if not settings.OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY is required for OpenAI embeddings")
+    if _openai_client is None:
+        _openai_client = OpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_EMBEDDING_BASE_URL or None,
+            max_retries=0  # retries are owned by OpenAIEmbedder
+        )
+    return _openai_client
+
+def _get_openai_embedder():
+    global _openai_embedder
+    if _openai_embedder is None:
+        _openai_embedder = OpenAIEmbedder.from_settings(_get_openai_client())
+    return _openai_embedder
+
+def get_embeddings(texts, batch_size=64):
+    """
+    Generate embeddings for many texts with batched model/API calls.
+    
+    Args:
+        texts (list[str]): Input texts to embed
+        batch_size (int): Texts per forward pass (local model). OpenAI
+            requests are packed by OPENAI_EMBED_MAX_TOKENS/MAX_INPUTS instead
+            and sent OPENAI_EMBED_CONCURRENCY at a time
+    
+    Returns:
+        np.array: Array of shape (len(texts), dim)
+    """
+    if any(not text or not text.strip() for text in texts):
+        raise ValueError("Text cannot be empty for embedding")
+    if not texts:
+        return np.zeros((0, get_embedding_dim()), dtype="float32")
+    
+    if settings.EMBEDDING_PROVIDER == "local":
+        embs = _get_local_model().encode(list(texts), batch_size=batch_size)
+        return np.asarray(embs, dtype="float32")
+    
+    elif settings.EMBEDDING_PROVIDER == "openai":
+        return _get_openai_embedder().embed(texts)
+    
+    else:
+        raise ValueError(f"Unknown embedding provider: {settings.EMBEDDING_PROVIDER}")
+
 def get_embedding(text: str):
     """
     Generate embedding for text using configured provider.
@@ -26,34 +80,15 @@ def get_embedding(text: str):
     Returns:
         np.array: Embedding vector
     """
-    global _local_model, _openai_client
-    
     if not text or not text.strip():
         raise ValueError("Text cannot be empty for embedding")
     
     if settings.EMBEDDING_PROVIDER == "local":
-        if _local_model is None:
-            _local_model = SentenceTransformer("all-MiniLM-L6-v2")
-        emb = _local_model.encode([text])[0]
+        emb = _get_local_model().encode([text])[0]
         return np.array(emb, dtype="float32")
     
     elif settings.EMBEDDING_PROVIDER == "openai":
-        if not settings.OPENAI_API_KEY:
-            raise ValueError("OPENAI_API_KEY is required for OpenAI embeddings")
-        
-        if _openai_client is None:
-            _openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        
-        try:
-            resp = _openai_client.embeddings.create(
-                model="text-embedding-3-small",
-                input=text,
-                encoding_format="float"
-            )
-            emb = resp.data[0].embedding
-            return np.array(emb, dtype="float32")
-        except Exception as e:
-            raise ValueError(f"OpenAI embedding error: {str(e)}")
+        return _get_openai_embedder().embed([text])[0]
     
     else:
         raise ValueError(f"Unknown embedding provider: {settings.EMBEDDING_PROVIDER}")
\ No newline at end of file
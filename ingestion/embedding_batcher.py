@@ -0,0 +1,103 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from ingestion.embedding import get_embedding, get_embeddings
+from api.core.config import settings
+
+
+class EmbeddingBatcher:
+    """
+    Dynamic micro-batching of embedding requests from concurrent callers.
+
+    Callers block in embed() while a single background thread collects the
+    texts that arrive within `max_wait_ms` of the first one (up to
+    `max_batch_size`), runs one batched encode and hands each caller its row.
+    With batching disabled, embed() just calls get_embedding directly.
+    """
+
+    def __init__(self, max_batch_size=32, max_wait_ms=5.0, enabled=True, encode_fn=get_embeddings):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.enabled = enabled
+        self.encode_fn = encode_fn
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self.batches = 0
+        self.items = 0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_batch_size=settings.EMBED_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBED_BATCH_WAIT_MS,
+            enabled=settings.EMBED_BATCH_ENABLED
+        )
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def embed(self, text):
+        """Return the embedding for text, batched with concurrent callers"""
+        if self._thread is None:
+            return get_embedding(text)
+        if not text or not text.strip():
+            raise ValueError("Text cannot be empty for embedding")
+
+        future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def _collect(self):
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                vectors = self.encode_fn([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def stats(self):
+        return {
+            "enabled": self._thread is not None,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0
+        }
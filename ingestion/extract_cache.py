@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+import zstandard
+
+from api.core.config import settings
+
+# Bump when extraction output changes so stale entries are not reused
+EXTRACTOR_VERSION = f"pymupdf-{fitz.VersionBind}-text-v1"
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Hash a file's content in fixed-size blocks"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Persistent cache of per-page PDF text, keyed by file content hash and
+    extractor version. Entries are zstd-compressed JSON.
+    """
+
+    def __init__(self, cache_dir, level=3):
+        self.cache_dir = Path(cache_dir)
+        self.level = level
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+        self._lock = threading.Lock()
+
+    def _entry_path(self, digest):
+        return self.cache_dir / digest[:2] / f"{digest}-{EXTRACTOR_VERSION}.json.zst"
+
+    def get(self, digest):
+        """Return (pages, extract_seconds) for a cached entry, or None"""
+        path = self._entry_path(digest)
+        try:
+            with open(path, "rb") as f:
+                entry = json.loads(zstandard.ZstdDecompressor().decompress(f.read()))
+            return entry["pages"], entry.get("extract_seconds", 0.0)
+        except (FileNotFoundError, ValueError, KeyError, zstandard.ZstdError):
+            return None
+
+    def put(self, digest, pages, extract_seconds):
+        path = self._entry_path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({
+            "version": EXTRACTOR_VERSION,
+            "extract_seconds": extract_seconds,
+            "pages": pages
+        }, ensure_ascii=False).encode("utf-8")
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(zstandard.ZstdCompressor(level=self.level).compress(data))
+        os.replace(tmp_path, path)
+
+    def extract_pages(self, pdf_path, extract_fn):
+        """
+        Return per-page text for pdf_path, calling extract_fn only on a miss.
+
+        Args:
+            pdf_path (str): Path to PDF file
+            extract_fn (callable): Uncached extractor, e.g. extract_pages_from_pdf
+        """
+        start = time.perf_counter()
+        digest = file_sha256(pdf_path)
+        cached = self.get(digest)
+        if cached is not None:
+            pages, extract_seconds = cached
+            with self._lock:
+                self.hits += 1
+                self.seconds_saved += max(0.0, extract_seconds - (time.perf_counter() - start))
+            return pages
+
+        extract_start = time.perf_counter()
+        pages = extract_fn(pdf_path)
+        self.put(digest, pages, time.perf_counter() - extract_start)
+        with self._lock:
+            self.misses += 1
+        return pages
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "seconds_saved": self.seconds_saved
+        }
+
+
+_cache = None
+
+def get_extraction_cache():
+    """Shared ExtractionCache, or None when EXTRACT_CACHE_DIR is empty"""
+    global _cache
+    if _cache is None and settings.EXTRACT_CACHE_DIR:
+        _cache = ExtractionCache(settings.EXTRACT_CACHE_DIR)
+    return _cache
@@ -1,38 +1,66 @@
 import fitz  # PyMuPDF
-import json
 import uuid
 from pathlib import Path
-from ingestion.chunker import chunk_text
+from ingestion.chunker import chunk_pages, chunk_pages_small_to_big
+from ingestion.chunk_io import ChunkWriter
+from ingestion.extract_cache import get_extraction_cache
+from api.core.config import settings
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+def extract_pages_from_pdf(pdf_path: str) -> list:
     """
-    Extract all text from a PDF using PyMuPDF.
+    Extract the text of each page of a PDF using PyMuPDF.
     
     Args:
         pdf_path (str): Path to PDF file
     
     Returns:
-        str: Extracted text
+        list: Text of each page, in order
     """
     if not Path(pdf_path).exists():
         raise FileNotFoundError(f"PDF file not found: {pdf_path}")
     
     try:
-        doc = fitz.open(pdf_path)
-        text = ""
-        for page in doc:
-            text += page.get_text("text") + "\n"
-        doc.close()
-        return text.strip()
+        with fitz.open(pdf_path) as doc:
+            return [page.get_text("text") for page in doc]
     except Exception as e:
         raise ValueError(f"Error reading PDF {pdf_path}: {str(e)}")
 
+def extract_pages_cached(pdf_path: str, use_cache=True) -> list:
+    """
+    Extract per-page text, reusing the persistent extraction cache when enabled.
+    
+    Args:
+        pdf_path (str): Path to PDF file
+        use_cache (bool): Set False to always re-parse the PDF
+    
+    Returns:
+        list: Text of each page, in order
+    """
+    cache = get_extraction_cache() if use_cache else None
+    if cache is None:
+        return extract_pages_from_pdf(pdf_path)
+    if not Path(pdf_path).exists():
+        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+    return cache.extract_pages(pdf_path, extract_pages_from_pdf)
+
+def extract_text_from_pdf(pdf_path: str) -> str:
+    """
+    Extract all text from a PDF using PyMuPDF.
+    
+    Args:
+        pdf_path (str): Path to PDF file
+    
+    Returns:
+        str: Extracted text
+    """
+    return "\n".join(extract_pages_from_pdf(pdf_path)).strip()
+
 def create_chunk_list(chunks, filename, metadata=None):
     """
     Create a list of chunk dictionaries with metadata.
     
     Args:
-        chunks (list): List of text chunks
+        chunks (list): List of text chunks, or chunk dicts from chunk_pages
         filename (str): Source filename
         metadata (dict): Additional metadata
     
@@ -43,9 +71,11 @@ def create_chunk_list(chunks, filename, metadata=None):
     metadata = metadata or {}
     
     for i, chunk in enumerate(chunks):
+        if isinstance(chunk, str):
+            chunk = {"text": chunk}
         chunk_dict = {
             "id": str(uuid.uuid4()),
-            "text": chunk,
+            **chunk,
             "chunk_number": i + 1,
             "source": filename,
             **metadata
@@ -54,30 +84,73 @@ def create_chunk_list(chunks, filename, metadata=None):
     
     return chunk_list
 
+def chunk_document(pages, filename, chunk_size=None, chunk_overlap=50, chunk_unit=None, strategy=None):
+    """
+    Chunk a document's pages into chunk dictionaries ready to embed.
+    
+    Args:
+        pages (list): Text of each page, in order
+        filename (str): Source filename
+        chunk_size (int): Chunk size; the child chunk size for small_to_big.
+            None picks the default for chunk_unit (see resolve_chunk_size)
+        chunk_overlap (int): Chunk overlap
+        chunk_unit (str): "chars" or "tokens"; defaults to settings.CHUNK_UNIT
+        strategy (str): "flat" or "small_to_big"; defaults to settings.CHUNK_STRATEGY.
+            small_to_big chunks carry a "parent_id", and the first chunk of
+            each parent also carries the parent passage itself as "parent"
+    
+    Returns:
+        list: List of chunk dictionaries
+    """
+    strategy = strategy or settings.CHUNK_STRATEGY
+    if strategy == "flat":
+        return create_chunk_list(chunk_pages(pages, chunk_size, chunk_overlap, chunk_unit), filename)
+    if strategy != "small_to_big":
+        raise ValueError(f"Unknown chunk strategy: {strategy}")
+    
+    parents, children = chunk_pages_small_to_big(
+        pages, chunk_size, chunk_overlap, settings.PARENT_UNIT, settings.PARENT_SECTION_SIZE, chunk_unit
+    )
+    # Numeric ids so the parent store can keep a sorted offset table
+    parent_ids = [str(uuid.uuid4().int >> 65) for _ in parents]
+    chunk_list = create_chunk_list([{k: v for k, v in child.items() if k != "parent"} for child in children], filename)
+    carried = set()
+    for chunk, child in zip(chunk_list, children):
+        chunk["parent_id"] = parent_ids[child["parent"]]
+        if child["parent"] not in carried:
+            chunk["parent"] = parents[child["parent"]]
+            carried.add(child["parent"])
+    return chunk_list
+
 def save_to_json(chunk_list, output_file="chunks.json"):
     """
-    Save chunks to JSON file.
+    Save chunks to a chunk file, writing them one at a time.
     
     Args:
-        chunk_list (list): List of chunk dictionaries
-        output_file (str): Output JSON file path
+        chunk_list (iterable): Chunk dictionaries (a generator is fine)
+        output_file (str): Output path; .jsonl and .jsonl.zst write
+            line-delimited (optionally compressed) JSON, anything else
+            the legacy JSON array
     """
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(chunk_list, f, indent=4, ensure_ascii=False)
+        with ChunkWriter(output_file) as writer:
+            writer.write_all(chunk_list)
         print(f"✅ Chunks saved to {output_file}")
     except Exception as e:
         raise ValueError(f"Error saving to JSON: {str(e)}")
 
-def process_pdf(pdf_path, output_file=None, chunk_size=500, chunk_overlap=50):
+def process_pdf(pdf_path, output_file=None, chunk_size=None, chunk_overlap=50, chunk_unit=None, use_cache=True, strategy=None):
     """
     Complete PDF processing pipeline.
     
     Args:
         pdf_path (str): Path to PDF file
-        output_file (str): Output JSON file path
-        chunk_size (int): Chunk size
+        output_file (str): Output chunk file path (.json, .jsonl or .jsonl.zst)
+        chunk_size (int): Chunk size; None picks the default for chunk_unit
         chunk_overlap (int): Chunk overlap
+        chunk_unit (str): "chars" or "tokens"; defaults to settings.CHUNK_UNIT
+        use_cache (bool): Reuse cached page text for unchanged PDFs
+        strategy (str): "flat" or "small_to_big"; defaults to settings.CHUNK_STRATEGY
     
     Returns:
         list: Processed chunks
@@ -85,15 +158,12 @@ def process_pdf(pdf_path, output_file=None, chunk_size=500, chunk_overlap=50):
     print(f"📄 Processing {pdf_path}...")
     
     # Extract text
-    raw_text = extract_text_from_pdf(pdf_path)
-    print(f"   Extracted {len(raw_text)} characters")
-    
-    # Chunk text
-    chunks = chunk_text(raw_text, chunk_size, chunk_overlap)
-    print(f"   Created {len(chunks)} chunks")
+    pages = extract_pages_cached(pdf_path, use_cache)
+    print(f"   Extracted {sum(len(page) for page in pages)} characters from {len(pages)} pages")
     
-    # Create chunk list
-    chunk_list = create_chunk_list(chunks, str(pdf_path))
+    # Chunk text into chunk list
+    chunk_list = chunk_document(pages, str(pdf_path), chunk_size, chunk_overlap, chunk_unit, strategy)
+    print(f"   Created {len(chunk_list)} chunks")
     
     # Save to JSON if output file specified
     if output_file:
@@ -106,14 +176,17 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description="PDF Ingestion Pipeline")
     parser.add_argument("pdf_path", help="Path to PDF file")
-    parser.add_argument("--output", "-o", default="chunks.json", help="Output JSON file")
-    parser.add_argument("--chunk_size", type=int, default=500, help="Chunk size")
+    parser.add_argument("--output", "-o", default="chunks.json", help="Output chunk file (.json, .jsonl or .jsonl.zst)")
+    parser.add_argument("--chunk_size", type=int,
+                        help="Chunk size (default: 500 chars, or the embedding model's window in tokens)")
     parser.add_argument("--chunk_overlap", type=int, default=50, help="Chunk overlap")
+    parser.add_argument("--chunk_unit", choices=["chars", "tokens"], help="Measure chunk size in characters or model tokens")
+    parser.add_argument("--strategy", choices=["flat", "small_to_big"], help="Chunking strategy (default: CHUNK_STRATEGY)")
     
     args = parser.parse_args()
     
     try:
-        process_pdf(args.pdf_path, args.output, args.chunk_size, args.chunk_overlap)
+        process_pdf(args.pdf_path, args.output, args.chunk_size, args.chunk_overlap, args.chunk_unit, strategy=args.strategy)
         print("✅ Ingestion completed successfully!")
     except Exception as e:
         print(f"❌ Error: {str(e)}")
@@ -0,0 +1,314 @@
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from ingestion.ingest import extract_pages_cached, chunk_document
+from ingestion.embedding import get_embeddings
+from ingestion.dedup import get_dedup_index
+
+STAGES = ["queued", "extracting", "chunking", "embedding", "storing", "done"]
+
+
+class QueueFullError(Exception):
+    """Raised when the ingestion queue has no room for another job"""
+
+
+class IngestJob:
+    def __init__(self, filename, path, chunk_size=None, chunk_overlap=50, collection=None, replace=False):
+        self.id = str(uuid.uuid4())
+        self.filename = filename
+        self.collection = collection
+        self.replace = replace
+        self.path = path
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.stage = "queued"
+        self.error = None
+        self.chunks = []
+        self.promoted = []  # duplicates from other sources to store in place of the replaced ones
+        self.progress = {"pages": 0, "characters": 0, "chunks": 0, "deduplicated": 0, "embedded": 0, "stored": 0}
+        self.created_at = time.time()
+        self.stage_started_at = {"queued": self.created_at}
+        self.finished_at = None
+
+    def set_stage(self, stage):
+        self.stage = stage
+        self.stage_started_at[stage] = time.time()
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "collection": self.collection,
+            "replace": self.replace,
+            "stage": self.stage,
+            "stage_index": STAGES.index(self.stage) if self.stage in STAGES else None,
+            "stages": STAGES,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "stage_started_at": self.stage_started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class IngestionWorkerPool:
+    """
+    In-process ingestion pipeline for uploaded PDFs.
+
+    `workers` threads take jobs from a bounded queue and run extraction and
+    chunking. Chunked jobs are handed to a single embed-and-store thread that
+    packs chunks from several jobs into shared embedding batches of up to
+    `batch_chunks` and writes each batch with one store call per collection.
+    A full queue raises QueueFullError so callers can apply backpressure.
+    Deletes go through delete(), which shares that thread's write lock.
+
+    `vector_store_factory(collection, create=True)` builds the store a
+    collection's chunks are written to (collection is None for the default
+    one); delete() passes create=False so it never creates a collection. With
+    `dedup`, near-duplicate chunks are dropped before embedding.
+    """
+
+    def __init__(self, vector_store_factory, workers=2, queue_size=32,
+                 batch_chunks=256, batch_wait=0.5, max_jobs=1000, dedup=False):
+        self.vector_store_factory = vector_store_factory
+        self.dedup = dedup
+        self.workers = workers
+        self.batch_chunks = batch_chunks
+        self.batch_wait = batch_wait
+        self.max_jobs = max_jobs
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._chunked = queue.Queue()
+        self._jobs = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._threads = []
+        self._stop = threading.Event()
+        # Serializes store writes: the embed thread's batches and delete()
+        self._write_lock = threading.Lock()
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            self._threads.append(threading.Thread(target=self._extract_loop, name=f"ingest-{i}", daemon=True))
+        self._threads.append(threading.Thread(target=self._embed_loop, name="ingest-embed", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def submit(self, filename, path, chunk_size=None, chunk_overlap=50, collection=None, replace=False):
+        """
+        Queue a PDF for ingestion. With replace=True the document's existing
+        chunks (same source) are swapped out. Raises QueueFullError when the
+        queue is full.
+        """
+        job = IngestJob(filename, path, chunk_size, chunk_overlap, collection, replace)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise QueueFullError(f"Ingestion queue is full ({self._queue.maxsize} jobs)")
+        with self._jobs_lock:
+            self._jobs[job.id] = job
+            self._evict_finished()
+        return job
+
+    def delete(self, source, collection=None):
+        """
+        Delete a document's chunks from a collection. Runs under the same
+        lock as the embed-and-store thread, so it waits for the batch being
+        written instead of publishing over it. Returns the number deleted.
+        """
+        with self._write_lock:
+            return self.vector_store_factory(collection, create=False).delete(source)
+
+    def get(self, job_id):
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._jobs_lock:
+            stages = {}
+            for job in self._jobs.values():
+                stages[job.stage] = stages.get(job.stage, 0) + 1
+        return {
+            "queued": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "awaiting_embedding": self._chunked.qsize(),
+            "jobs_by_stage": stages
+        }
+
+    def _evict_finished(self):
+        # Forget the oldest finished jobs once we track more than max_jobs
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].stage in ("done", "failed"):
+                del self._jobs[job_id]
+
+    def _fail(self, job, error):
+        job.error = str(error)
+        job.set_stage("failed")
+        job.finished_at = time.time()
+        job.chunks = []
+        job.promoted = []
+        print(f"❌ Ingestion job {job.id} ({job.filename}) failed: {job.error}")
+
+    def _cleanup(self, job):
+        try:
+            Path(job.path).unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def _extract_loop(self):
+        while not self._stop.is_set():
+            try:
+                job = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                job.set_stage("extracting")
+                pages = extract_pages_cached(job.path)
+                job.progress["pages"] = len(pages)
+                job.progress["characters"] = sum(len(page) for page in pages)
+
+                job.set_stage("chunking")
+                job.chunks = chunk_document(pages, job.filename, job.chunk_size, job.chunk_overlap)
+                job.progress["chunks"] = len(job.chunks)
+                if not job.chunks:
+                    raise ValueError("No text could be extracted from the PDF")
+
+                job.set_stage("embedding")
+                self._chunked.put(job)
+            except Exception as e:
+                self._fail(job, e)
+                self._cleanup(job)
+            finally:
+                self._queue.task_done()
+
+    def _next_batch(self):
+        """Collect chunked jobs until batch_chunks is reached or batch_wait elapses"""
+        try:
+            jobs = [self._chunked.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        size = len(jobs[0].chunks)
+        deadline = time.monotonic() + self.batch_wait
+        while size < self.batch_chunks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._chunked.get(timeout=remaining)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            size += len(job.chunks)
+        return jobs
+
+    def _embed_loop(self):
+        while not self._stop.is_set():
+            jobs = self._next_batch()
+            if not jobs:
+                continue
+            # Dedup indexes are loaded before embedding and saved after storing,
+            # so the whole batch runs as one write
+            with self._write_lock:
+                self._run_batch(jobs)
+
+    def _run_batch(self, jobs):
+        dedup_indexes = self._deduplicate(jobs) if self.dedup else {}
+        try:
+            all_chunks = [chunk for job in jobs for chunk in job.chunks]
+            vectors = []
+            for start in range(0, len(all_chunks), self.batch_chunks):
+                batch = all_chunks[start:start + self.batch_chunks]
+                vectors.extend(get_embeddings([chunk["text"] for chunk in batch]))
+                self._report_embedded(jobs, start + len(batch))
+        except Exception as e:
+            for job in jobs:
+                self._fail(job, e)
+                self._cleanup(job)
+            return
+
+        # One store call per collection (replacements go one document at a
+        # time), sharing the embedding batch above
+        groups = {}
+        pos = 0
+        for job in jobs:
+            key = (job.collection, job.filename if job.replace else None)
+            group = groups.setdefault(key, ([], [], []))
+            group[0].append(job)
+            group[1].extend(job.chunks)
+            group[2].extend(vectors[pos:pos + len(job.chunks)])
+            pos += len(job.chunks)
+
+        failed = set()
+        for (collection, replace_source), (group_jobs, chunks, group_vectors) in groups.items():
+            try:
+                for job in group_jobs:
+                    job.set_stage("storing")
+                # Stores reload the latest snapshot themselves, so nothing is cached
+                vs = self.vector_store_factory(collection)
+                promoted = [chunk for job in group_jobs for chunk in job.promoted]
+                if promoted:
+                    vs.store(promoted)
+                if replace_source is not None:
+                    if chunks:
+                        vs.replace_document(replace_source, chunks, group_vectors)
+                    else:
+                        vs.delete(replace_source, dedup=collection not in dedup_indexes)
+                elif chunks:
+                    vs.store(chunks, group_vectors)
+
+                for job in group_jobs:
+                    job.progress["stored"] = len(job.chunks)
+                    job.set_stage("done")
+                    job.finished_at = time.time()
+                    job.chunks = []
+                    job.promoted = []
+                    print(f"✅ Ingested {job.filename}: {job.progress['stored']} chunks")
+            except Exception as e:
+                failed.add(collection)
+                for job in group_jobs:
+                    self._fail(job, e)
+            finally:
+                for job in group_jobs:
+                    self._cleanup(job)
+
+        # Only remember signatures of chunks that actually reached the store
+        for collection, index in dedup_indexes.items():
+            if collection not in failed:
+                self.vector_store_factory(collection).sync_alt_sources(index)
+                index.save()
+
+    def _deduplicate(self, jobs):
+        """Drop near-duplicate chunks from jobs in place. Returns the indexes used, by collection."""
+        indexes = {}
+        for job in jobs:
+            try:
+                if job.collection not in indexes:
+                    indexes[job.collection] = get_dedup_index(job.collection)
+                index = indexes[job.collection]
+                if job.replace:
+                    # The old version must not absorb the new one as a duplicate
+                    _, job.promoted = index.remove_source(job.filename)
+                job.chunks, stats = index.deduplicate(job.chunks)
+                job.progress["deduplicated"] = stats["dropped"]
+            except Exception as e:
+                print(f"⚠️ Dedup skipped for {job.filename}: {e}")
+        return indexes
+
+    def _report_embedded(self, jobs, embedded):
+        """Spread the number of embedded chunks over jobs in batch order"""
+        for job in jobs:
+            job.progress["embedded"] = min(len(job.chunks), max(0, embedded))
+            embedded -= len(job.chunks)
@@ -0,0 +1,192 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from openai import APIConnectionError
+
+from api.core.config import settings
+
+
+def estimate_tokens(text):
+    """
+    Cheap upper-bound token estimate. English averages ~4 bytes per token;
+    dividing by 3 leaves headroom for other scripts without a tokenizer.
+    """
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def pack_requests(texts, max_tokens, max_inputs):
+    """
+    Split texts into consecutive (start, end) ranges that each fit one
+    request: at most max_inputs texts and max_tokens estimated tokens.
+    """
+    ranges = []
+    start, tokens = 0, 0
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text)
+        if i > start and (tokens + cost > max_tokens or i - start >= max_inputs):
+            ranges.append((start, i))
+            start, tokens = i, 0
+        tokens += cost
+    if start < len(texts):
+        ranges.append((start, len(texts)))
+    return ranges
+
+
+def _retry_after(error):
+    """Seconds to wait from Retry-After / retry-after-ms headers, if present"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit for in-flight requests. Rate limiting halves the limit
+    and pauses every sender for the server's Retry-After; the limit grows
+    back by one after `limit` consecutive successes (AIMD).
+    """
+
+    def __init__(self, max_limit):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self.in_flight = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause > 0:
+                    self._cond.wait(pause)
+                elif self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                else:
+                    self._cond.wait()
+
+    def release(self, rate_limited=False, retry_after=None):
+        with self._cond:
+            self.in_flight -= 1
+            if rate_limited:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+                if retry_after:
+                    self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            else:
+                self._successes += 1
+                if self.limit < self.max_limit and self._successes >= self.limit:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+
+class OpenAIEmbedder:
+    """
+    Embeds many texts through the OpenAI embeddings API.
+
+    Texts are packed into requests under a per-request token and input cap,
+    and up to `concurrency` requests are in flight at once. 429 and 5xx
+    responses are retried with exponential backoff and full jitter, and rate
+    limiting also shrinks the number of concurrent requests. Results come
+    back in input order.
+    """
+
+    def __init__(self, client, model="text-embedding-3-small", max_tokens=250_000, max_inputs=2048,
+                 concurrency=4, max_retries=6, backoff_base=0.5, backoff_max=30.0):
+        self.client = client
+        self.model = model
+        self.max_tokens = max_tokens
+        self.max_inputs = max_inputs
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter = AdaptiveLimiter(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="openai-embed")
+        self._stats = {"requests": 0, "retries": 0, "rate_limited": 0}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, client):
+        return cls(
+            client,
+            max_tokens=settings.OPENAI_EMBED_MAX_TOKENS,
+            max_inputs=settings.OPENAI_EMBED_MAX_INPUTS,
+            concurrency=settings.OPENAI_EMBED_CONCURRENCY,
+            max_retries=settings.OPENAI_EMBED_MAX_RETRIES
+        )
+
+    def _count(self, key):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _request(self, texts):
+        """One embeddings request, retried on rate limits and transient errors"""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                self._count("requests")
+                # Without encoding_format the client requests base64 and decodes it,
+                # which is a fraction of the size of JSON floats
+                resp = self.client.embeddings.create(model=self.model, input=texts)
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                rate_limited = status == 429
+                retryable = rate_limited or (status is not None and status >= 500) or isinstance(e, APIConnectionError)
+                retry_after = _retry_after(e)
+                self.limiter.release(rate_limited, retry_after)
+                if not retryable or attempt == self.max_retries:
+                    raise ValueError(f"OpenAI embedding error: {str(e)}")
+
+                self._count("retries")
+                if rate_limited:
+                    self._count("rate_limited")
+                # Retry-After is honoured by the limiter's shared pause
+                time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt))))
+                continue
+
+            self.limiter.release()
+            return [item.embedding for item in sorted(resp.data, key=lambda d: d.index)]
+
+    def embed(self, texts):
+        """
+        Embed texts, keeping several packed requests in flight.
+
+        Args:
+            texts (list[str]): Input texts
+
+        Returns:
+            np.array: Array of shape (len(texts), dim), in input order
+        """
+        texts = list(texts)
+        futures = [
+            self._executor.submit(self._request, texts[start:end])
+            for start, end in pack_requests(texts, self.max_tokens, self.max_inputs)
+        ]
+        vectors = []
+        try:
+            for future in futures:
+                vectors.extend(future.result())
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+        return np.array(vectors, dtype="float32")
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["concurrency_limit"] = self.limiter.limit
+        return stats
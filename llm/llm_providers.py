@@ -8,18 +8,47 @@ from openai import OpenAI
 from api.core.config import settings
 import requests
 import json
-import time
+
+
+class LLMProviderError(Exception):
+    """Raised by a provider when a generation call fails.
+
+    ``retryable`` marks transient failures (timeouts, 429, 5xx, model loading)
+    that the call policy may retry; ``retry_after`` is a server hint in seconds.
+    ``status_code`` is the provider's HTTP status, if it answered.
+    """
+
+    def __init__(self, message, retryable=False, retry_after=None, status_code=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+    @property
+    def client_error(self):
+        """True for a request the provider rejected (4xx other than 429), which retrying cannot fix"""
+        return not self.retryable and self.status_code is not None and 400 <= self.status_code < 500
+
+
+def _is_retryable_status(status_code):
+    return status_code == 429 or status_code >= 500
+
+
+def _history_block(history):
+    """Prompt section with earlier conversation turns (empty for stateless calls)"""
+    return f"Conversation so far:\n{history}\n\n" if history else ""
+
 
 class HuggingFaceService:
     def __init__(self):
         self.api_key = settings.HUGGINGFACE_API_KEY
         self.model_name = settings.HUGGINGFACE_MODEL
-        self.api_url = f"https://api-inference.huggingface.co/models/{self.model_name}"
+        self.api_url = f"{settings.HUGGINGFACE_API_BASE.rstrip('/')}/{self.model_name}"
         
         if not self.api_key:
             raise ValueError("HUGGINGFACE_API_KEY is required for Hugging Face provider")
 
-    def generate_answer(self, query: str, context_chunks: list[str]) -> str:
+    def generate_answer(self, query: str, context_chunks: list[str], history: str = "") -> str:
         if not context_chunks:
             return "I don't have enough information to answer this question based on the provided documents."
         
@@ -38,7 +67,7 @@ Be concise and factual. Do not make up information.
 Context Information:
 {context_text}
 
-Question: {query}
+{_history_block(history)}Question: {query}
 
 Answer: [/INST]"""
         
@@ -71,24 +100,45 @@ Answer: [/INST]"""
                     return result[0].get('generated_text', '').strip()
                 return str(result)
             elif response.status_code == 503:
-                # Model is loading, wait and retry
-                time.sleep(10)
-                return self.generate_answer(query, context_chunks)
+                # Model is loading; let the call policy decide whether to wait
+                retry_after = None
+                try:
+                    retry_after = float(response.json().get("estimated_time"))
+                except Exception:
+                    pass
+                raise LLMProviderError(
+                    "Hugging Face model is loading (HTTP 503)",
+                    retryable=True,
+                    retry_after=retry_after
+                )
             else:
-                return f"Hugging Face API error (HTTP {response.status_code}): {response.text}"
-                
+                raise LLMProviderError(
+                    f"Hugging Face API error (HTTP {response.status_code}): {response.text}",
+                    retryable=_is_retryable_status(response.status_code),
+                    status_code=response.status_code
+                )
+
+        except LLMProviderError:
+            raise
+        except requests.RequestException as e:
+            raise LLMProviderError(f"Error calling Hugging Face API: {str(e)}", retryable=True)
         except Exception as e:
-            return f"Error calling Hugging Face API: {str(e)}"
+            raise LLMProviderError(f"Error calling Hugging Face API: {str(e)}")
 
             
 class OpenAIService:
     def __init__(self):
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY is required for OpenAI provider")
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = OpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL or None,
+            timeout=settings.LLM_DEADLINE,  # abandoned attempts must not outlive the call deadline
+            max_retries=0  # retries are owned by LLMCallPolicy
+        )
         self.model_name = settings.OPENAI_MODEL
 
-    def generate_answer(self, query: str, context_chunks: list[str]) -> str:
+    def generate_answer(self, query: str, context_chunks: list[str], history: str = "") -> str:
         context_text = "\n\n".join([
             f"[Context {i+1}]: {chunk}" 
             for i, chunk in enumerate(context_chunks)
@@ -99,7 +149,7 @@ class OpenAIService:
 Context Information:
 {context_text}
 
-Question: {query}
+{_history_block(history)}Question: {query}
 
 Instructions:
 1. Answer based ONLY on the provided context
@@ -129,14 +179,21 @@ Answer:"""
             return response.choices[0].message.content.strip()
             
         except Exception as e:
-            return f"Error generating answer: {str(e)}"
+            # openai.APIStatusError carries status_code; connection and
+            # timeout errors don't and are always worth retrying
+            status_code = getattr(e, "status_code", None)
+            raise LLMProviderError(
+                f"Error generating answer: {str(e)}",
+                retryable=status_code is None or _is_retryable_status(status_code),
+                status_code=status_code
+            )
 
 class LocalLLMService:
     def __init__(self):
         self.model_name = settings.LOCAL_LLM_MODEL
         self.api_url = settings.LOCAL_LLM_URL
 
-    def generate_answer(self, query: str, context_chunks: list[str]) -> str:
+    def generate_answer(self, query: str, context_chunks: list[str], history: str = "") -> str:
         if not context_chunks:
             return "I don't have enough information to answer this question based on the provided documents."
         
@@ -150,7 +207,7 @@ class LocalLLMService:
 Context:
 {context_text}
 
-Question: {query}
+{_history_block(history)}Question: {query}
 
 Answer:"""
         
@@ -173,13 +230,21 @@ Answer:"""
             if response.status_code == 200:
                 return response.json()["choices"][0]["message"]["content"].strip()
             else:
-                return f"Local LLM error: {response.text}"
+                raise LLMProviderError(
+                    f"Local LLM error: {response.text}",
+                    retryable=_is_retryable_status(response.status_code),
+                    status_code=response.status_code
+                )
                 
+        except LLMProviderError:
+            raise
+        except requests.RequestException as e:
+            raise LLMProviderError(f"Error calling local LLM: {str(e)}", retryable=True)
         except Exception as e:
-            return f"Error calling local LLM: {str(e)}"
+            raise LLMProviderError(f"Error calling local LLM: {str(e)}")
 
 class MockLLMService:
-    def generate_answer(self, query: str, context_chunks: list[str]) -> str:
+    def generate_answer(self, query: str, context_chunks: list[str], history: str = "") -> str:
         """Mock service for testing without any LLM"""
         if not context_chunks:
             return "I don't have enough information to answer this question."
@@ -1,21 +1,263 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from api.core.config import settings
-from .llm_providers import OpenAIService, HuggingFaceService, MockLLMService
+from .llm_providers import (
+    OpenAIService, HuggingFaceService, LocalLLMService, MockLLMService, LLMProviderError
+)
+
+
+class CircuitOpenError(LLMProviderError):
+    """Raised when a provider's circuit breaker is rejecting calls"""
+
+
+class CircuitBreaker:
+    """Per-provider circuit breaker (closed -> open -> half-open)."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._half_open_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        """Return True if a call may go through. Half-open admits one probe."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._half_open_in_flight:
+                self._half_open_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._half_open_in_flight = False
+
+    def release(self):
+        """End a half-open probe without counting it as a success or a failure"""
+        with self._lock:
+            self._half_open_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._half_open_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._half_open_in_flight = False
+
+
+# LLMService is built per request, so breakers must outlive it
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+# Shared pool for provider calls; abandoned attempts (deadline hit, losing
+# hedges) finish here. A slot is held until the call really ends, so calls
+# never queue behind abandoned ones.
+_executor = ThreadPoolExecutor(max_workers=settings.LLM_MAX_IN_FLIGHT, thread_name_prefix="llm-call")
+_slots = threading.BoundedSemaphore(settings.LLM_MAX_IN_FLIGHT)
+
+
+def _submit(fn, timeout):
+    """Start fn on the shared pool once a slot is free; None if none frees up within timeout"""
+    if not _slots.acquire(timeout=max(timeout, 0)):
+        return None
+    future = _executor.submit(fn)
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def get_circuit_breaker(provider):
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(
+                failure_threshold=settings.LLM_CIRCUIT_FAILURES,
+                reset_timeout=settings.LLM_CIRCUIT_RESET
+            )
+        return _breakers[provider]
+
+
+class LLMCallPolicy:
+    """
+    Bounded retries with exponential backoff and full jitter, an overall
+    deadline, optional hedged second requests and a per-provider circuit breaker.
+    """
+
+    def __init__(self, max_retries=3, backoff_base=0.5, backoff_max=8.0,
+                 deadline=60.0, hedge_after=0.0):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_retries=settings.LLM_MAX_RETRIES,
+            backoff_base=settings.LLM_BACKOFF_BASE,
+            backoff_max=settings.LLM_BACKOFF_MAX,
+            deadline=settings.LLM_DEADLINE,
+            hedge_after=settings.LLM_HEDGE_AFTER
+        )
+
+    def _backoff(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def _attempt(self, fn, timeout):
+        """Run fn once, hedging with a second copy if it is slow (and a slot is free)."""
+        deadline_at = time.monotonic() + timeout
+        future = _submit(fn, timeout)
+        if future is None:
+            raise LLMProviderError(f"No free LLM call slot within {timeout:.1f}s", retryable=True)
+        futures = [future]
+        hedged = not self.hedge_after
+        error = None
+
+        while futures:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            wait_for = remaining if hedged else min(remaining, self.hedge_after)
+            done, pending = wait(futures, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    return future.result()
+                except LLMProviderError as e:
+                    error = e
+                except Exception as e:
+                    error = LLMProviderError(str(e))
+
+            futures = list(pending)
+            if not done and not hedged:
+                # Never wait for a hedge slot: under load hedging would only add calls
+                hedge = _submit(fn, 0)
+                if hedge is not None:
+                    futures.append(hedge)
+                hedged = True
+
+        for future in futures:
+            future.cancel()
+        if error is not None and not futures:
+            raise error
+        raise LLMProviderError(f"LLM call timed out after {timeout:.1f}s", retryable=True)
+
+    def call(self, provider, fn):
+        """
+        Call fn under this policy.
+
+        Args:
+            provider (str): Provider name, used to pick the circuit breaker
+            fn (callable): Zero-argument function performing one provider call
+
+        Returns:
+            Whatever fn returns on the first successful attempt
+
+        Raises:
+            LLMProviderError: When retries or the deadline are exhausted,
+                the error is not retryable, or the circuit is open
+        """
+        breaker = get_circuit_breaker(provider)
+        deadline_at = time.monotonic() + self.deadline
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for LLM provider '{provider}'")
+
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+
+            try:
+                result = self._attempt(fn, remaining)
+                breaker.record_success()
+                return result
+            except LLMProviderError as e:
+                if e.client_error:
+                    # The provider answered; a rejected request says nothing about its health
+                    breaker.release()
+                else:
+                    breaker.record_failure()
+                last_error = e
+                if not e.retryable:
+                    raise
+
+            if attempt == self.max_retries:
+                break
+            delay = self._backoff(attempt, last_error.retry_after)
+            if time.monotonic() + delay >= deadline_at:
+                break
+            time.sleep(delay)
+
+        raise last_error or LLMProviderError(
+            f"LLM call to '{provider}' exceeded {self.deadline:.1f}s deadline", retryable=True
+        )
+
+
+def _build_provider(name):
+    if name == "openai":
+        return OpenAIService()
+    elif name == "huggingface":
+        return HuggingFaceService()
+    elif name == "local":
+        return LocalLLMService()
+    else:
+        return MockLLMService()
+
 
 class LLMService:
-    def __init__(self):
+    def __init__(self, policy=None):
         self.provider = settings.LLM_PROVIDER.lower()
-        
-        if self.provider == "openai":
-            self.service = OpenAIService()
-        elif self.provider == "huggingface":
-            self.service = HuggingFaceService()
-        else:
-            self.service = MockLLMService()
+        self.service = _build_provider(self.provider)
+        self.policy = policy or LLMCallPolicy.from_settings()
+
+        self.fallback_provider = settings.LLM_FALLBACK_PROVIDER.lower() or None
+        self.fallback_service = None
+        if self.fallback_provider and self.fallback_provider != self.provider:
+            try:
+                self.fallback_service = _build_provider(self.fallback_provider)
+            except ValueError as e:
+                print(f"⚠️ Fallback LLM provider unavailable: {str(e)}")
         
         print(f"✅ Using LLM provider: {self.provider}")
 
-    def generate_answer(self, query: str, context_chunks: list[str]) -> str:
-        return self.service.generate_answer(query, context_chunks)
+    def generate_answer(self, query: str, context_chunks: list[str], history: str = "") -> str:
+        try:
+            return self.policy.call(
+                self.provider,
+                lambda: self.service.generate_answer(query, context_chunks, history)
+            )
+        except LLMProviderError as e:
+            if self.fallback_service is None:
+                return f"Error generating answer: {str(e)}"
+            print(f"⚠️ {self.provider} failed ({str(e)}), falling back to {self.fallback_provider}")
+
+        try:
+            return self.policy.call(
+                self.fallback_provider,
+                lambda: self.fallback_service.generate_answer(query, context_chunks, history)
+            )
+        except LLMProviderError as e:
+            return f"Error generating answer: {str(e)}"
 
     def is_available(self):
         return self.provider in ["openai", "huggingface"]
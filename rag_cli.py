@@ -6,10 +6,14 @@ Usage:
   python rag_cli.py ingest <pdf_files>...
   python rag_cli.py query "your question"
   python rag_cli.py api
+  python rag_cli.py export <snapshot_file>
+  python rag_cli.py import <snapshot_file>
+  python rag_cli.py tune-index --target_recall 0.95
 """
 
 import argparse
 import json
+import os
 import sys
 from pathlib import Path
 import uvicorn
@@ -17,15 +21,29 @@ import uvicorn
 # Add project root to Python path
 sys.path.append(str(Path(__file__).parent))
 
-from ingestion.ingest import process_pdf, save_to_json
+from ingestion.ingest import process_pdf
+from ingestion.chunk_io import ChunkWriter
+from ingestion.extract_cache import get_extraction_cache
+from ingestion.dedup import get_dedup_index
+from ingestion.embedding import get_embeddings
 from retrieval.vector_store import VectorStore
+from retrieval.faiss_store import FaissVectorStore
 from llm.llm_service import LLMService
 from api.core.config import settings
 
 
-def ingest_documents(pdf_paths, output_file=None, chunk_size=500, chunk_overlap=50):
+def ingest_documents(pdf_paths, output_file=None, chunk_size=None, chunk_overlap=50, chunk_unit=None, use_cache=True, dedup=None,
+                     strategy=None, collection=None):
     """Ingest PDF documents and store in vector database"""
+    dedup = settings.DEDUP_ENABLED if dedup is None else dedup
     all_chunks = []
+    # Chunks are written out as each PDF is processed
+    writer = None
+    if output_file:
+        try:
+            writer = ChunkWriter(output_file)
+        except Exception as e:
+            print(f"❌ Error opening {output_file}: {str(e)}")
     
     for pdf_path in pdf_paths:
         path_obj = Path(pdf_path)
@@ -38,31 +56,54 @@ def ingest_documents(pdf_paths, output_file=None, chunk_size=500, chunk_overlap=
                 str(path_obj), 
                 None,  # Don't save individual files
                 chunk_size, 
-                chunk_overlap
+                chunk_overlap,
+                chunk_unit,
+                use_cache,
+                strategy
             )
             all_chunks.extend(chunks)
+            if writer is not None:
+                writer.write_all(chunks)
             print(f"✅ Processed {path_obj.name}: {len(chunks)} chunks")
             
         except Exception as e:
             print(f"❌ Error processing {path_obj.name}: {str(e)}")
             continue
     
+    if writer is not None:
+        writer.close()
+        print(f"✅ Saved {writer.count} chunks to {output_file}")
+    
+    cache = get_extraction_cache()
+    if use_cache and cache is not None:
+        stats = cache.stats()
+        print(f"📦 Extraction cache: {stats['hits']}/{stats['hits'] + stats['misses']} hits "
+              f"({stats['hit_ratio']:.0%}), saved {stats['seconds_saved']:.1f}s of PDF parsing")
+    
     if not all_chunks:
         print("❌ No chunks were processed successfully")
         return False
     
-    # Save combined chunks to JSON if requested
-    if output_file:
-        try:
-            save_to_json(all_chunks, output_file)
-            print(f"✅ Saved {len(all_chunks)} chunks to {output_file}")
-        except Exception as e:
-            print(f"❌ Error saving to JSON: {str(e)}")
+    # Drop near-duplicates (within this run and against stored chunks) before embedding
+    dedup_index = None
+    if dedup:
+        dedup_index = get_dedup_index(collection)
+        all_chunks, stats = dedup_index.deduplicate(all_chunks)
+        print(f"🧬 Dedup: dropped {stats['dropped']}/{stats['input']} near-duplicate chunks "
+              f"(ratio {stats['dedup_ratio']:.1%})")
+        if not all_chunks:
+            print("✅ Every chunk is a near-duplicate of stored content, nothing to store")
+            VectorStore(mmap=False, collection=collection).sync_alt_sources(dedup_index)
+            dedup_index.save()
+            return True
     
     # Store in vector database
     try:
-        vs = VectorStore()
+        vs = VectorStore(mmap=False, collection=collection)
         vs.store(all_chunks)
+        if dedup_index is not None:
+            vs.sync_alt_sources(dedup_index)
+            dedup_index.save()
         print(f"✅ Stored {len(all_chunks)} chunks in vector database")
         return True
         
@@ -70,54 +111,179 @@ def ingest_documents(pdf_paths, output_file=None, chunk_size=500, chunk_overlap=
         print(f"❌ Error storing in vector database: {str(e)}")
         return False
 
-def query_rag(query, top_k=3):
+def query_rag(query, top_k=3, mode=None, top_docs=None, collection=None):
     """Query the RAG system and return answer with sources"""
+    return query_rag_batch([query], top_k, mode, top_docs, collection)[0]
+
+def query_rag_batch(queries, top_k=3, mode=None, top_docs=None, collection=None):
+    """
+    Answer several questions, embedding them together and retrieving for
+    all of them in one batched search.
+
+    Returns:
+        list: (answer, sources) per question, in order
+    """
     try:
         # Retrieve relevant chunks
-        vs = VectorStore()
-        results = vs.search(query, top_k=top_k)
-        
-        if not results:
-            return "No relevant information found.", []
-        
-        chunks = [chunk for chunk, score in results]
-        scores = [score for chunk, score in results]
-        
-        # Generate answer
+        vs = VectorStore(collection=collection, create=False)
+        batch = [query for query in queries if query.strip()]
+        vectors = get_embeddings(batch) if batch else []
+        batch_results = iter(vs.search_batch_by_vector(vectors, top_k=top_k, mode=mode, top_docs=top_docs))
         llm = LLMService()
-        answer = llm.generate_answer(query, [chunk["text"] for chunk in chunks])
-        
-        # Prepare sources with scores
-        sources = []
-        for chunk, score in zip(chunks, scores):
-            sources.append({
-                "score": float(score),
-                "text": chunk["text"][:200] + "..." if len(chunk["text"]) > 200 else chunk["text"],
-                "source": chunk.get("source", "unknown"),
-                "chunk_number": chunk.get("chunk_number", "N/A")
-            })
-        
-        return answer, sources
-        
     except Exception as e:
-        return f"Error: {str(e)}", []
+        return [(f"Error: {str(e)}", []) for _ in queries]
 
-def run_api():
+    answers = []
+    for query in queries:
+        try:
+            results = next(batch_results) if query.strip() else []
+            if not results:
+                answers.append(("No relevant information found.", []))
+                continue
+            
+            chunks = [chunk for chunk, score in results]
+            scores = [score for chunk, score in results]
+            
+            # Generate answer
+            answer = llm.generate_answer(query, [chunk["text"] for chunk in chunks])
+            
+            # Prepare sources with scores
+            sources = []
+            for chunk, score in zip(chunks, scores):
+                sources.append({
+                    "score": float(score),
+                    "text": chunk["text"][:200] + "..." if len(chunk["text"]) > 200 else chunk["text"],
+                    "source": chunk.get("source", "unknown"),
+                    "chunk_number": chunk.get("chunk_number", "N/A")
+                })
+            
+            answers.append((answer, sources))
+            
+        except Exception as e:
+            answers.append((f"Error: {str(e)}", []))
+    return answers
+
+def run_api(workers=1):
     """Start the FastAPI server"""
     print("🚀 Starting RAG API server...")
     print(f"   Vector DB: {settings.VECTOR_DB}")
     print(f"   Embedding: {settings.EMBEDDING_PROVIDER}")
     print("   API available at: http://localhost:8000")
     print("   Docs available at: http://localhost:8000/docs")
+    if workers > 1:
+        print(f"   Workers: {workers} (FAISS mmap: {settings.FAISS_MMAP}; conversational sessions disabled)")
+    # Worker processes read it from the environment; sessions refuse to run with more than one
+    os.environ["API_WORKERS"] = str(workers)
     
     uvicorn.run(
         "api.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=workers == 1,  # uvicorn can't reload with multiple workers
+        workers=workers,
         log_level="info"
     )
 
+def replace_document(pdf_path, source=None, chunk_size=None, chunk_overlap=50, chunk_unit=None, collection=None, dedup=None,
+                     strategy=None):
+    """Re-ingest one PDF, replacing the chunks previously stored for its source"""
+    dedup = settings.DEDUP_ENABLED if dedup is None else dedup
+    source = source or str(Path(pdf_path))
+    chunks = process_pdf(str(Path(pdf_path)), None, chunk_size, chunk_overlap, chunk_unit, strategy=strategy)
+    for chunk in chunks:
+        chunk["source"] = source
+    vs = VectorStore(mmap=False, collection=collection)
+
+    dedup_index = None
+    promoted = []
+    if dedup:
+        # The old version must not absorb the new one as a duplicate
+        dedup_index = get_dedup_index(collection)
+        _, promoted = dedup_index.remove_source(source)
+        chunks, stats = dedup_index.deduplicate(chunks)
+        print(f"🧬 Dedup: dropped {stats['dropped']}/{stats['input']} near-duplicate chunks "
+              f"(ratio {stats['dedup_ratio']:.1%})")
+
+    if promoted:
+        # Duplicates from other documents that were kept only through the old version
+        vs.store(promoted)
+    if chunks:
+        vs.replace_document(source, chunks)
+    else:
+        vs.delete(source, dedup=dedup_index is None)
+    if dedup_index is not None:
+        vs.sync_alt_sources(dedup_index)
+        dedup_index.save()
+
+def export_index(path, level=3, collection=None):
+    """Export the FAISS index and payloads to a single snapshot file"""
+    from retrieval.snapshot_file import export_snapshot
+
+    vs = VectorStore(mmap=False, collection=collection, create=False)
+    if not isinstance(vs.backend, FaissVectorStore):
+        raise ValueError("export requires VECTOR_DB=faiss")
+    header = export_snapshot(vs.backend, path, level, vs.parents)
+    size_mb = Path(path).stat().st_size / 1024 / 1024
+    print(f"✅ Exported {header['count']} chunks and {header['parents']} parent passages to {path} ({size_mb:.1f} MB)")
+
+def import_index(path, verify=True, collection=None):
+    """Import a snapshot file as the live FAISS index"""
+    from retrieval.snapshot_file import SnapshotReader
+
+    vs = VectorStore(mmap=False, collection=collection)
+    if not isinstance(vs.backend, FaissVectorStore):
+        raise ValueError("import requires VECTOR_DB=faiss")
+    reader = SnapshotReader(path, verify=verify)
+    try:
+        vs.backend.import_snapshot(reader)
+        # The old index's parents go with it
+        vs.parents.clear()
+        batch = []
+        for parent in reader.iter_parents():
+            batch.append(parent)
+            if len(batch) == 10_000:
+                vs.parents.add(batch)
+                batch = []
+        vs.parents.add(batch)
+        if reader.parent_count:
+            print(f"✅ Imported {reader.parent_count} parent passages")
+    finally:
+        reader.close()
+
+def tune_index(target_recall=0.95, k=10, num_queries=200, collection=None):
+    """Persist the fastest FAISS search setting that reaches target_recall@k"""
+    vs = VectorStore(mmap=False, collection=collection, create=False)
+    stores = getattr(vs.backend, "shards", None) or [vs.backend]
+    if not isinstance(stores[0], FaissVectorStore):
+        raise ValueError("tune-index requires VECTOR_DB=faiss or faiss_sharded")
+
+    for i, store in enumerate(stores):
+        label = f"shard {i}" if len(stores) > 1 else "index"
+        try:
+            best, frontier = store.tune_search_params(target_recall, k, num_queries)
+        except ValueError as e:
+            print(f"⚠️ {label}: {e}")
+            continue
+        if not frontier:
+            print(f"✅ {label}: {settings.FAISS_INDEX_FACTORY} is exact, nothing to tune")
+            continue
+
+        print(f"\n📈 {label} ({settings.FAISS_INDEX_FACTORY}): recall@{k} / latency frontier")
+        for point in frontier:
+            # A point is on the frontier if nothing is both faster and at least as accurate
+            dominated = any(
+                other["latency_ms"] < point["latency_ms"] and other["recall"] >= point["recall"]
+                for other in frontier
+            )
+            marker = "←" if point is best else ("*" if not dominated else " ")
+            (name, value), = point["params"].items()
+            print(f"  {marker} {name}={value:<5} recall {point['recall']:.3f}  {point['latency_ms']:.3f} ms/query")
+
+        if best:
+            print(f"✅ {label}: saved {best['params']} (recall@{k} {best['recall']:.3f})")
+        else:
+            print(f"⚠️ {label}: no setting reached recall@{k} >= {target_recall}; kept the previous setting")
+
 def main():
     parser = argparse.ArgumentParser(
         description="Multi-Document RAG CLI",
@@ -125,8 +291,13 @@ def main():
         epilog="""
 Examples:
   python rag_cli.py ingest document1.pdf document2.pdf
+  python rag_cli.py ingest contracts/*.pdf --collection legal
   python rag_cli.py query "What is machine learning?"
+  python rag_cli.py query "What is RAG?" "How are chunks embedded?"
   python rag_cli.py api
+  python rag_cli.py export index.rsnap
+  python rag_cli.py import index.rsnap
+  python rag_cli.py tune-index --target_recall 0.95 --k 10
         """
     )
     
@@ -135,20 +306,74 @@ Examples:
     # Ingest command
     ingest_parser = subparsers.add_parser("ingest", help="Ingest PDF documents")
     ingest_parser.add_argument("pdf_files", nargs="+", help="PDF files to ingest")
-    ingest_parser.add_argument("--output", "-o", help="Output JSON file")
-    ingest_parser.add_argument("--chunk_size", type=int, default=500, help="Chunk size")
+    ingest_parser.add_argument("--output", "-o", help="Output chunk file (.json, .jsonl or .jsonl.zst)")
+    ingest_parser.add_argument("--chunk_size", type=int,
+                               help="Chunk size (default: 500 chars, or the embedding model's window in tokens)")
     ingest_parser.add_argument("--chunk_overlap", type=int, default=50, help="Chunk overlap")
+    ingest_parser.add_argument("--chunk_unit", choices=["chars", "tokens"], help="Measure chunk size in characters or model tokens")
+    ingest_parser.add_argument("--strategy", choices=["flat", "small_to_big"],
+                               help="small_to_big embeds --chunk_size children and answers with their page/section (default: CHUNK_STRATEGY)")
+    ingest_parser.add_argument("--no_cache", action="store_true", help="Re-parse PDFs instead of using the extraction cache")
+    ingest_parser.add_argument("--dedup", action=argparse.BooleanOptionalAction, default=None,
+                               help="Drop near-duplicate chunks before embedding (default: DEDUP_ENABLED)")
+    ingest_parser.add_argument("--collection", help="Named collection")
     
     # Query command
     query_parser = subparsers.add_parser("query", help="Query the RAG system")
-    query_parser.add_argument("query", help="Your question")
+    query_parser.add_argument("query", nargs="+", help="Your question(s); several are retrieved in one batch")
     query_parser.add_argument("--top_k", type=int, default=3, help="Number of results to return")
+    query_parser.add_argument("--mode", choices=["full", "two_stage"], help="Search mode (default: SEARCH_MODE)")
+    query_parser.add_argument("--top_docs", type=int, help="Documents searched in two_stage mode")
+    query_parser.add_argument("--collection", help="Named collection")
     
     # API command
     api_parser = subparsers.add_parser("api", help="Start the API server")
+    api_parser.add_argument("--workers", type=int, default=1, help="Number of uvicorn worker processes")
     
     # Clear command
     clear_parser = subparsers.add_parser("clear", help="Clear the vector database")
+    clear_parser.add_argument("--collection", help="Named collection")
+    
+    # Delete / replace commands
+    delete_parser = subparsers.add_parser("delete", help="Delete a document's chunks by source")
+    delete_parser.add_argument("--source", required=True, help="Source to delete (as stored, e.g. the PDF path)")
+    delete_parser.add_argument("--collection", help="Named collection")
+    delete_parser.add_argument("--compact", action="store_true", help="Compact the FAISS index now")
+    
+    replace_parser = subparsers.add_parser("replace", help="Re-ingest a PDF, replacing its old chunks")
+    replace_parser.add_argument("pdf_file", help="PDF file to re-ingest")
+    replace_parser.add_argument("--source", help="Source to replace (defaults to the PDF path)")
+    replace_parser.add_argument("--collection", help="Named collection")
+    replace_parser.add_argument("--chunk_size", type=int,
+                                help="Chunk size (default: 500 chars, or the embedding model's window in tokens)")
+    replace_parser.add_argument("--chunk_overlap", type=int, default=50, help="Chunk overlap")
+    replace_parser.add_argument("--chunk_unit", choices=["chars", "tokens"], help="Measure chunk size in characters or model tokens")
+    replace_parser.add_argument("--strategy", choices=["flat", "small_to_big"], help="Chunking strategy (default: CHUNK_STRATEGY)")
+    replace_parser.add_argument("--dedup", action=argparse.BooleanOptionalAction, default=None,
+                                help="Drop near-duplicate chunks before embedding (default: DEDUP_ENABLED)")
+    
+    # Snapshot export/import commands
+    export_parser = subparsers.add_parser("export", help="Export the index to a snapshot file")
+    export_parser.add_argument("path", help="Snapshot file to write")
+    export_parser.add_argument("--level", type=int, default=3, help="zstd compression level")
+    export_parser.add_argument("--collection", help="Named collection")
+    
+    import_parser = subparsers.add_parser("import", help="Import a snapshot file as the live index")
+    import_parser.add_argument("path", help="Snapshot file to read")
+    import_parser.add_argument("--no_verify", action="store_true", help="Skip checksum verification")
+    import_parser.add_argument("--collection", help="Named collection")
+    
+    # Tune index command
+    tune_parser = subparsers.add_parser("tune-index", help="Tune FAISS search parameters for a target recall")
+    tune_parser.add_argument("--target_recall", type=float, default=0.95, help="Minimum recall@k")
+    tune_parser.add_argument("--k", type=int, default=10, help="Neighbours compared against exact search")
+    tune_parser.add_argument("--queries", type=int, default=200, help="Stored chunks sampled as queries")
+    tune_parser.add_argument("--collection", help="Named collection")
+    
+    # Rebuild shard command
+    rebuild_parser = subparsers.add_parser("rebuild-shard", help="Rebuild one shard (VECTOR_DB=faiss_sharded)")
+    rebuild_parser.add_argument("shard", type=int, help="Shard number")
+    rebuild_parser.add_argument("--collection", help="Named collection")
     
     args = parser.parse_args()
     
@@ -157,38 +382,95 @@ Examples:
             args.pdf_files, 
             args.output, 
             args.chunk_size, 
-            args.chunk_overlap
+            args.chunk_overlap,
+            args.chunk_unit,
+            not args.no_cache,
+            args.dedup,
+            args.strategy,
+            args.collection
         )
         exit(0 if success else 1)
         
     elif args.command == "query":
-        answer, sources = query_rag(args.query, args.top_k)
-        
-        print(f"\n🤖 Question: {args.query}")
-        print(f"✅ Answer: {answer}")
-        
-        if sources:
-            print(f"\n📚 Sources (top {len(sources)}):")
-            for i, source in enumerate(sources, 1):
-                print(f"{i}. Score: {source['score']:.4f}")
-                print(f"   From: {source['source']} (chunk {source['chunk_number']})")
-                print(f"   Text: {source['text']}")
-                print()
-        else:
-            print("\n❌ No sources found")
+        for query, (answer, sources) in zip(args.query, query_rag_batch(args.query, args.top_k, args.mode, args.top_docs, args.collection)):
+            print(f"\n🤖 Question: {query}")
+            print(f"✅ Answer: {answer}")
+            
+            if sources:
+                print(f"\n📚 Sources (top {len(sources)}):")
+                for i, source in enumerate(sources, 1):
+                    print(f"{i}. Score: {source['score']:.4f}")
+                    print(f"   From: {source['source']} (chunk {source['chunk_number']})")
+                    print(f"   Text: {source['text']}")
+                    print()
+            else:
+                print("\n❌ No sources found")
             
     elif args.command == "api":
-        run_api()
+        run_api(args.workers)
         
     elif args.command == "clear":
         try:
-            vs = VectorStore()
+            vs = VectorStore(mmap=False, collection=args.collection)
             vs.clear()
             print("✅ Vector database cleared")
         except Exception as e:
             print(f"❌ Error clearing database: {str(e)}")
             exit(1)
             
+    elif args.command == "delete":
+        try:
+            vs = VectorStore(mmap=False, collection=args.collection, create=False)
+            deleted = vs.delete(args.source, compact=args.compact and settings.VECTOR_DB.startswith("faiss"))
+            if not deleted:
+                print(f"⚠️ No chunks found for source: {args.source}")
+        except Exception as e:
+            print(f"❌ Error deleting document: {str(e)}")
+            exit(1)
+            
+    elif args.command == "replace":
+        try:
+            replace_document(
+                args.pdf_file,
+                args.source,
+                args.chunk_size,
+                args.chunk_overlap,
+                args.chunk_unit,
+                args.collection,
+                args.dedup,
+                args.strategy
+            )
+        except Exception as e:
+            print(f"❌ Error replacing document: {str(e)}")
+            exit(1)
+            
+    elif args.command in ("export", "import"):
+        try:
+            if args.command == "export":
+                export_index(args.path, args.level, args.collection)
+            else:
+                import_index(args.path, not args.no_verify, args.collection)
+        except Exception as e:
+            print(f"❌ Error during {args.command}: {str(e)}")
+            exit(1)
+            
+    elif args.command == "tune-index":
+        try:
+            tune_index(args.target_recall, args.k, args.queries, args.collection)
+        except Exception as e:
+            print(f"❌ Error tuning index: {str(e)}")
+            exit(1)
+            
+    elif args.command == "rebuild-shard":
+        try:
+            vs = VectorStore(mmap=False, collection=args.collection, create=False)
+            if not hasattr(vs.backend, "rebuild_shard"):
+                raise ValueError("rebuild-shard requires VECTOR_DB=faiss_sharded")
+            vs.backend.rebuild_shard(args.shard)
+        except Exception as e:
+            print(f"❌ Error rebuilding shard: {str(e)}")
+            exit(1)
+            
     else:
         parser.print_help()
         exit(1)
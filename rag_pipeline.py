@@ -1,81 +1,175 @@
 import argparse
-import atexit
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
 
 from ingestion.ingest import process_pdf as load_pdf
+from ingestion.extract_cache import file_sha256
+from ingestion.embedding import get_embedding
 
-from retrieval.faiss_store import FaissVectorStore as FaissStore
+from retrieval.vector_store import VectorStore
+from retrieval.collection_manager import collection_dir
 from llm.llm_service import LLMService
-import os
-
 
 
 class RAGPipeline:
-    def __init__(self, pdf_paths):
-        # 1. Load + chunk PDFs once
-        all_chunks = []
-        for pdf_path in pdf_paths:
+    """
+    Interactive RAG over a set of PDFs, backed by a persisted collection.
+
+    The collection keeps a manifest of the content hash of every PDF it was
+    built from. On start only new or changed PDFs are extracted and embedded;
+    unchanged ones are reused as is. Indexed PDFs that are not passed stay in
+    the collection unless `prune` is set (removing them means embedding them
+    again on a later run that passes them).
+    That sync and the embedding model/index warm-up run in a background
+    thread, so questions can be typed straight away; ask() waits until the
+    index is ready.
+    """
+
+    def __init__(self, pdf_paths, collection="pipeline", background=True, prune=False):
+        self.pdf_paths = [str(Path(p).resolve()) for p in pdf_paths]
+        self.collection = collection
+        self.prune = prune
+        self.manifest_path = collection_dir(collection) / "pipeline_manifest.json"
+        self.store = VectorStore(mmap=False, collection=collection)
+        self.llm = None
+        self._ready = threading.Event()
+        self._error = None
+
+        if background:
+            threading.Thread(target=self._warm_up, name="rag-warmup", daemon=True).start()
+        else:
+            self._warm_up()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_name(f"{self.manifest_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def sync(self):
+        """
+        Bring the collection in line with self.pdf_paths.
+
+        Returns:
+            dict: Counts of added, changed, unchanged, removed and kept
+                (indexed but not passed) PDFs
+        """
+        manifest = self._load_manifest()
+        counts = {"added": 0, "changed": 0, "unchanged": 0, "removed": 0, "kept": 0}
+
+        extra = [s for s in manifest if s not in self.pdf_paths]
+        if extra and not self.prune:
+            counts["kept"] = len(extra)
+            print(f"⚠️ {len(extra)} indexed PDFs were not passed and stay searchable "
+                  f"(--prune removes them): {', '.join(extra)}")
+            extra = []
+        for source in extra:
+            print(f"🗑️ Removing {source} from the index (it will be re-embedded if passed again)")
+            self.store.delete(source)
+            del manifest[source]
+            # Saved after every file so an interrupted sync resumes where it stopped
+            self._save_manifest(manifest)
+            counts["removed"] += 1
+
+        for pdf_path in self.pdf_paths:
+            digest = file_sha256(pdf_path)
+            if manifest.get(pdf_path) == digest:
+                counts["unchanged"] += 1
+                continue
+
             print(f"📄 Loading: {pdf_path}")
             chunks = load_pdf(pdf_path)
-            print(f"✅ Extracted {len(chunks)} chunks from {pdf_path}")
-            all_chunks.extend(chunks)
-
-        # 2. Embed + store once
-        self.store = FaissStore()
-        self.store.store(all_chunks)
-        print(f"✅ Stored {len(all_chunks)} chunks in FAISS")
-
-        # 3. Setup LLM
-        self.llm = LLMService()
+            if chunks:
+                self.store.replace_document(pdf_path, chunks)
+            else:
+                self.store.delete(pdf_path)
+            counts["changed" if pdf_path in manifest else "added"] += 1
+            manifest[pdf_path] = digest
+            self._save_manifest(manifest)
+
+        return counts
+
+    def _warm_up(self):
+        try:
+            counts = self.sync()
+            # Load the index and embedding model now rather than on the first question
+            self.store.load()
+            get_embedding("warm up")
+            self.llm = LLMService()
+            print(f"\n✅ Index ready ({counts['unchanged']} unchanged, {counts['added']} added, "
+                  f"{counts['changed']} re-embedded, {counts['removed']} removed, {counts['kept']} not passed but kept)")
+        except Exception as e:
+            self._error = e
+            print(f"\n❌ Error preparing index: {e}")
+        finally:
+            self._ready.set()
+
+    def wait_ready(self):
+        if not self._ready.is_set():
+            print("⏳ Waiting for the index to finish loading...")
+            self._ready.wait()
+        if self._error is not None:
+            raise ValueError(f"Index is unavailable: {self._error}")
 
     def ask(self, query, top_k=3):
+        self.wait_ready()
+
         # Retrieve
         retrieved = self.store.search(query, top_k=top_k)
 
         print(f"🔍 Retrieved {len(retrieved)} relevant chunks")
 
-        context = "\n".join(doc['text'] for doc, _ in retrieved)
+        context = [doc['text'] for doc, _ in retrieved]
 
         answer = self.llm.generate_answer(query, context)
         return answer
 
-    def cleanup(self):
-        if hasattr(self.store, "reset"):
-            self.store.reset()
-            print("🧹 FAISS index cleared from memory.")
-
-        files_to_delete = [
-            "C:\\Users\\YASEEN\\OneDrive\\Desktop\\Projects\\rag-multidoc\\chunks_map.json",
-            "C:\\Users\\YASEEN\\OneDrive\\Desktop\\Projects\\rag-multidoc\\faiss.index"
-        ]
-
-        for file_path in files_to_delete:
-            try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    print(f"🗑️ Deleted: {file_path}")
-                else:
-                    print(f"⚠️ File not found (skipped): {file_path}")
-            except Exception as e:
-                print(f"❌ Error deleting {file_path}: {e}")
+    def drop_index(self):
+        """Delete the persisted collection and its manifest"""
+        self._ready.wait()
+        self.store.clear()
+        shutil.rmtree(collection_dir(self.collection), ignore_errors=True)
+        print(f"🗑️ Dropped collection: {self.collection}")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run RAG pipeline on PDFs")
     parser.add_argument("--pdfs", nargs="+", required=True, help="Path(s) to PDF files")
     parser.add_argument("--top_k", type=int, default=3, help="Number of chunks to retrieve")
+    parser.add_argument("--collection", default="pipeline", help="Collection the index is persisted in")
+    parser.add_argument("--prune", action="store_true", help="Remove indexed PDFs that are not passed this run")
+    parser.add_argument("--drop_index", action="store_true", help="Delete the persisted index on exit")
     args = parser.parse_args()
 
-    pipeline = RAGPipeline(args.pdfs)
-    atexit.register(pipeline.cleanup)
+    pipeline = RAGPipeline(args.pdfs, collection=args.collection, prune=args.prune)
 
     # Interactive Q&A loop
-    while True:
-        query = input("\n❓ Enter your question (or 'exit' to quit): ")
-        if query.lower() in ["exit", "quit", "q"]:
-            break
-
-        answer = pipeline.ask(query, top_k=args.top_k)
+    try:
+        while True:
+            query = input("\n❓ Enter your question (or 'exit' to quit): ")
+            if query.lower() in ["exit", "quit", "q"]:
+                break
 
-        print("\n==============================")
-        print(f"💡 Question: {query}")
-        print(f"🤖 Answer: {answer}")
\ No newline at end of file
+            try:
+                answer = pipeline.ask(query, top_k=args.top_k)
+            except ValueError as e:
+                print(f"❌ {e}")
+                break
+
+            print("\n==============================")
+            print(f"💡 Question: {query}")
+            print(f"🤖 Answer: {answer}")
+    finally:
+        if args.drop_index:
+            pipeline.drop_index()
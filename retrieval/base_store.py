@@ -1,17 +1,65 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional
+
+
+def select_fields(chunk: Dict, fields: Optional[List[str]]) -> Dict:
+    """Keep only the requested payload fields (None keeps the whole chunk)"""
+    if fields is None:
+        return chunk
+    return {field: chunk[field] for field in fields if field in chunk}
+
 
 class BaseVectorStore(ABC):
     """Abstract base class for vector store implementations"""
     
     @abstractmethod
-    def store(self, chunks: List[Dict]) -> None:
-        """Store chunks in the vector database"""
+    def store(self, chunks: List[Dict], vectors: Any = None) -> None:
+        """Store chunks (with optional precomputed embeddings) in the vector database"""
+        pass
+    
+    @abstractmethod
+    def search(self, query: str, top_k: int = 3, mode: str = None, top_docs: int = None) -> List[Tuple[Dict, float]]:
+        """Search for similar chunks ("full" or "two_stage" mode, where supported)"""
+        pass
+    
+    @abstractmethod
+    def search_by_vector(self, vector: Any, top_k: int = 3, mode: str = None, top_docs: int = None,
+                         fields: Optional[List[str]] = None) -> List[Tuple[Dict, float]]:
+        """Search for chunks similar to a precomputed query embedding, returning only `fields` of each payload"""
+        pass
+    
+    def search_batch_by_vector(self, vectors: Any, top_k: int = 3, mode: str = None, top_docs: int = None,
+                               fields: Optional[List[str]] = None) -> List[List[Tuple[Dict, float]]]:
+        """Search several query embeddings at once; backends with a native batch search override this"""
+        return [self.search_by_vector(vector, top_k, mode, top_docs, fields) for vector in vectors]
+    
+    @abstractmethod
+    def search_ids_by_vector(self, vector: Any, top_k: int = 3, mode: str = None, top_docs: int = None) -> List[Tuple[str, float]]:
+        """Search returning (chunk key, score) pairs without loading payloads"""
+        pass
+    
+    @abstractmethod
+    def get_chunks(self, keys: List[str], fields: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Payloads (or just `fields` of them) for chunk keys returned by search_ids_by_vector"""
+        pass
+    
+    @abstractmethod
+    def delete(self, source: str) -> int:
+        """Delete every chunk of a source document; returns the number deleted"""
+        pass
+    
+    @abstractmethod
+    def replace_document(self, source: str, chunks: List[Dict], vectors: Any = None) -> None:
+        """Replace a source document's chunks with new ones"""
         pass
     
     @abstractmethod
-    def search(self, query: str, top_k: int = 3) -> List[Tuple[Dict, float]]:
-        """Search for similar chunks"""
+    def update_payloads(self, updates: List[Dict]) -> int:
+        """Merge fields into stored chunks; each update holds the chunk's "id", "source" and the fields to set. Returns the number updated"""
+        pass
+    
+    def close(self) -> None:
+        """Release threads or connections held by the store; it may still be used afterwards"""
         pass
     
     @abstractmethod
@@ -0,0 +1,137 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from api.core.config import settings
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class CollectionNotFoundError(ValueError):
+    """Raised when a read path names a collection that was never created"""
+
+
+def validate_collection(name):
+    """Return name if it is a safe collection name, else raise ValueError"""
+    if not _NAME_RE.match(name or ""):
+        raise ValueError(f"Invalid collection name: {name!r} (use 1-64 letters, digits, '_' or '-')")
+    return name
+
+
+def collection_dir(name):
+    """Directory holding a named FAISS collection's snapshots"""
+    return Path(settings.FAISS_COLLECTIONS_DIR) / validate_collection(name)
+
+
+class CollectionManager:
+    """
+    Lazily loaded named collections kept under a memory budget.
+
+    Stores are opened on first use, loaded outside the global lock (one
+    loader per collection) and evicted least-recently-used first once the
+    summed memory_bytes() of loaded collections exceeds `memory_budget`, or
+    more than `max_loaded` are loaded (so unknown or empty collections, which
+    take almost no memory, cannot pile up).
+    Loaded collections pick up newly published snapshots at most every
+    `reload_interval` seconds. `factory` should open existing collections
+    only (raising CollectionNotFoundError); this is a read path.
+    """
+
+    def __init__(self, factory, memory_budget, reload_interval=5.0, max_loaded=64):
+        self.factory = factory
+        self.memory_budget = memory_budget
+        self.max_loaded = max_loaded
+        self.reload_interval = reload_interval
+        self._stores = OrderedDict()  # name -> [vector_store, bytes, last_checked]
+        self._loading = {}
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "loads": 0, "load_failures": 0, "evictions": 0, "reloads": 0, "load_seconds": 0.0}
+
+    def get(self, name):
+        """Return the VectorStore for a collection, loading it if needed"""
+        validate_collection(name)
+        with self._lock:
+            entry = self._stores.get(name)
+            if entry is not None:
+                self._stores.move_to_end(name)
+                self.metrics["hits"] += 1
+            else:
+                loading_lock = self._loading.setdefault(name, threading.Lock())
+
+        if entry is not None:
+            self._maybe_reload(name, entry)
+            return entry[0]
+
+        with loading_lock:
+            with self._lock:
+                entry = self._stores.get(name)
+            if entry is not None:
+                return entry[0]
+
+            start = time.perf_counter()
+            try:
+                vs = self.factory(name)
+                vs.load()
+            except Exception:
+                with self._lock:
+                    self._loading.pop(name, None)
+                    self.metrics["load_failures"] += 1
+                raise
+            size = vs.backend.memory_bytes()
+
+            with self._lock:
+                self._stores[name] = [vs, size, time.monotonic()]
+                self._loading.pop(name, None)
+                self.metrics["loads"] += 1
+                self.metrics["load_seconds"] += time.perf_counter() - start
+                self._evict()
+            print(f"📂 Loaded collection '{name}' ({size / 1024 / 1024:.1f} MB)")
+            return vs
+
+    def _maybe_reload(self, name, entry):
+        vs, _, last_checked = entry
+        if self.reload_interval <= 0 or time.monotonic() - last_checked < self.reload_interval:
+            return
+        entry[2] = time.monotonic()
+        latest = vs.latest_version()
+        if latest is None or latest == vs.version:
+            return
+        try:
+            vs.reload()
+        except Exception as e:
+            print(f"⚠️ Reload of collection '{name}' failed, keeping version {vs.version}: {str(e)}")
+            return
+        with self._lock:
+            entry[1] = vs.backend.memory_bytes()
+            self.metrics["reloads"] += 1
+            self._evict()
+
+    def _evict(self):
+        # Caller holds self._lock; never evict the most recently used collection
+        total = sum(entry[1] for entry in self._stores.values())
+        while (total > self.memory_budget or len(self._stores) > self.max_loaded) and len(self._stores) > 1:
+            name, (vs, size, _) = self._stores.popitem(last=False)
+            vs.close()
+            total -= size
+            self.metrics["evictions"] += 1
+            print(f"♻️ Evicted collection '{name}' ({size / 1024 / 1024:.1f} MB)")
+
+    def evict(self, name):
+        """Drop a collection from memory (e.g. after it was cleared)"""
+        with self._lock:
+            entry = self._stores.pop(name, None)
+            if entry is not None:
+                entry[0].close()
+                self.metrics["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self.metrics,
+                "loaded": list(self._stores),
+                "loaded_bytes": sum(entry[1] for entry in self._stores.values()),
+                "memory_budget_bytes": self.memory_budget,
+                "max_loaded": self.max_loaded
+            }
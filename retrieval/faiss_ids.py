@@ -0,0 +1,42 @@
+import faiss
+import numpy as np
+
+
+def id_map_vectors(index):
+    """
+    Return (ids, vectors) stored in an IndexIDMap, row-aligned.
+
+    Works for every inner index that can reconstruct vectors; IVF indexes
+    get a direct map first, since they cannot reconstruct by position
+    without one.
+    """
+    ids = faiss.vector_to_array(index.id_map).astype("int64")
+    if not index.ntotal:
+        return ids, np.zeros((0, index.d), dtype="float32")
+    ivf = faiss.try_extract_index_ivf(index.index)
+    if ivf is not None:
+        ivf.make_direct_map()
+    vectors = index.index.reconstruct_n(0, index.ntotal)
+    return ids, np.asarray(vectors, dtype="float32")
+
+
+def without_ids(index, remove):
+    """
+    Rebuild an IndexIDMap without the given ids. Returns (index, removed count).
+
+    IndexIDMap.remove_ids renumbers its id map as if the inner index dropped
+    rows in place, which only holds for flat indexes; on IVF the labels go
+    out of sync and searches return -1. Instead, the live vectors are added
+    again to an emptied clone of the inner index, which keeps its training.
+
+    Raises:
+        RuntimeError: If the inner index cannot reconstruct its vectors
+    """
+    ids, vectors = id_map_vectors(index)
+    keep = ~np.isin(ids, remove)
+    inner = faiss.clone_index(index.index)
+    inner.reset()
+    rebuilt = faiss.IndexIDMap(inner)
+    if keep.any():
+        rebuilt.add_with_ids(vectors[keep], ids[keep])
+    return rebuilt, int(len(ids) - keep.sum())
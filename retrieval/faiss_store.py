@@ -1,19 +1,66 @@
 import json
 import hashlib
+import time
+from contextlib import contextmanager
 import numpy as np
 import faiss
 from pathlib import Path
-from .base_store import BaseVectorStore
-from ingestion.embedding import get_embedding
+from .base_store import BaseVectorStore, select_fields
+from .payload_store import MmapPayloadStore, payload_paths, write_payloads, write_payload_records
+from .snapshots import SnapshotManager, file_lock
+from .faiss_ids import id_map_vectors, without_ids
+from ingestion.embedding import get_embedding, get_embeddings
 from api.core.config import settings
 
 class FaissVectorStore(BaseVectorStore):
-    def __init__(self, index_path="faiss.index", map_path="chunks_map.json"):
+    def __init__(self, index_path="faiss.index", map_path="chunks_map.json", mmap=None, snapshot_dir=None):
         self.dim = 384 if settings.EMBEDDING_PROVIDER == "local" else 1536
         self.index_path = index_path
         self.map_path = map_path
+        self.mmap = settings.FAISS_MMAP if mmap is None else mmap
         self.index = None
         self.id_map = {}
+        # Deleted ids still physically in the index, excluded from searches
+        self.tombstones = np.zeros(0, dtype="int64")
+        self._selector = None
+        self._sources = None
+        # Document-level index for two-stage search: source -> [sum of chunk vectors, chunk ids]
+        self._docs = None
+        self._doc_search = None
+        # Search-time parameters applied from tune_search_params (e.g. {"nprobe": 16})
+        self.search_params = {}
+
+        # Versioned snapshots; "" falls back to the single index_path/map_path pair
+        snapshot_dir = settings.FAISS_SNAPSHOT_DIR if snapshot_dir is None else snapshot_dir
+        self.snapshots = SnapshotManager(snapshot_dir, keep=settings.FAISS_SNAPSHOT_KEEP) if snapshot_dir else None
+        self.version = None
+
+    def _resolve_snapshot(self):
+        """Point index_path/map_path at the live snapshot, if there is one"""
+        if self.snapshots is None:
+            return
+        manifest = self.snapshots.current()
+        if manifest:
+            snapshot_path = self.snapshots.root / manifest["path"]
+            self.index_path = str(snapshot_path / "faiss.index")
+            self.map_path = str(snapshot_path / "chunks_map.json")
+            self.version = manifest["version"]
+
+    def memory_bytes(self):
+        """Rough in-process footprint of the loaded index and payloads"""
+        if self.index is None:
+            return 0
+        size = self.index.ntotal * self.dim * 4
+        if isinstance(self.id_map, dict):
+            for path in (self.map_path, payload_paths(self.map_path)[0]):
+                if Path(path).exists():
+                    size += Path(path).stat().st_size
+                    break
+        return size
+
+    def latest_version(self):
+        """Newest published snapshot version on disk (None if unversioned)"""
+        return self.snapshots.current_version() if self.snapshots else None
 
     def _get_numeric_id(self, text_id: str) -> int:
         """Convert text ID to numeric ID for FAISS"""
@@ -21,59 +68,380 @@ class FaissVectorStore(BaseVectorStore):
 
     def _load_index(self):
         """Load index from file or create new"""
-        if Path(self.index_path).exists():
+        self._resolve_snapshot()
+        self._sources = None
+        self._selector = None
+        tombstone_path = self._tombstone_path()
+        self.tombstones = np.load(tombstone_path) if Path(tombstone_path).exists() else np.zeros(0, dtype="int64")
+        self._docs = self._load_docs()
+        self._doc_search = None
+
+        if self.mmap:
+            self._load_index_mmap()
+        elif Path(self.index_path).exists():
             self.index = faiss.read_index(self.index_path)
             if Path(self.map_path).exists():
                 with open(self.map_path, "r", encoding="utf-8") as f:
                     self.id_map = json.load(f)
+            elif payload_paths(self.map_path)[0].exists():
+                # Imported snapshots only carry the payload store
+                payloads = MmapPayloadStore(self.map_path)
+                self.id_map = payloads.to_dict()
+                payloads.close()
         else:
-            self.index = faiss.IndexIDMap(faiss.IndexFlatL2(self.dim))
+            self.index = self._new_index()
             self.id_map = {}
 
-    def store(self, chunks):
-        """Store chunks in FAISS index"""
-        self._load_index()
+        self._apply_tuned_params()
+
+    def _new_index(self):
+        return faiss.IndexIDMap(faiss.index_factory(self.dim, settings.FAISS_INDEX_FACTORY))
+
+    def _load_index_mmap(self):
+        """
+        Open the index read-only through FAISS's mmap IO flag and payloads
+        through MmapPayloadStore, so worker processes share the page cache.
+        """
+        if not Path(self.index_path).exists():
+            # Nothing ingested yet; serve an empty index until a snapshot appears
+            self.index = self._new_index()
+            self.id_map = {}
+            return
+
+        # IO_FLAG_MMAP_IFC maps flat code arrays (IndexFlat*); older builds only
+        # support IO_FLAG_MMAP, which covers IVF inverted lists
+        flags = faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+        self.index = faiss.read_index(self.index_path, flags)
+
+        try:
+            self.id_map = MmapPayloadStore(self.map_path)
+        except FileNotFoundError:
+            # Index written before payload files existed; build them once
+            with open(self.map_path, "r", encoding="utf-8") as f:
+                write_payloads(json.load(f), self.map_path)
+            self.id_map = MmapPayloadStore(self.map_path)
+
+    def _save(self):
+        """Persist the index, the JSON map and the mmap-able payload files"""
+        self._publish(self._write_files, chunks=len(self.id_map))
+
+    @contextmanager
+    def _writing(self):
+        """
+        Hold the writer lock across load -> mutate -> publish, so concurrent
+        writers (API, CLI, other workers) apply their changes one after another
+        """
+        self._check_writable()
+        lock = self.snapshots.writer_lock() if self.snapshots is not None else file_lock(f"{self.index_path}.lock")
+        with lock:
+            yield
+
+    def _publish(self, write_fn, replace=False, **manifest):
+        """
+        Run write_fn against a fresh snapshot (or the legacy paths) and publish it.
+
+        Unless replace (the new snapshot does not build on the loaded one),
+        refuses to publish when another writer published after this store loaded.
+        """
+        if self.snapshots is not None:
+            current = self.snapshots.current_version()
+            if not replace and current != self.version:
+                raise ValueError(f"Snapshot v{current} was published after v{self.version} was loaded; reload and retry")
+            # Write a complete new snapshot, then flip the manifest to it
+            version, snapshot_path = self.snapshots.prepare()
+            self.index_path = str(snapshot_path / "faiss.index")
+            self.map_path = str(snapshot_path / "chunks_map.json")
+            write_fn()
+            self.snapshots.publish(version, **manifest)
+            self.version = version
+            return
+
+        write_fn()
+
+    def _tombstone_path(self):
+        return str(Path(self.index_path).with_name("tombstones.npy"))
+
+    def _doc_index_path(self):
+        return str(Path(self.index_path).with_name("doc_index.npz"))
+
+    def _write_files(self):
+        faiss.write_index(self.index, self.index_path)
+        if len(self.tombstones):
+            np.save(self._tombstone_path(), self.tombstones)
+        else:
+            Path(self._tombstone_path()).unlink(missing_ok=True)
+        if self._docs is not None:
+            self._write_docs()
+        else:
+            Path(self._doc_index_path()).unlink(missing_ok=True)
+        with open(self.map_path, "w", encoding="utf-8") as f:
+            json.dump(self.id_map, f, ensure_ascii=False)
+        write_payloads(self.id_map, self.map_path)
+
+    def import_snapshot(self, reader):
+        """
+        Publish the contents of an exported snapshot file as the live index.
+
+        The FAISS section is written out byte-for-byte (no deserialization)
+        and payloads are streamed into the payload store, so the whole corpus
+        is never held in memory.
+
+        Args:
+            reader (SnapshotReader): Opened snapshot file
+        """
+        if reader.dim != self.dim:
+            raise ValueError(f"Snapshot dimension {reader.dim} does not match embedding dimension {self.dim}")
+
+        def write():
+            with open(self.index_path, "wb") as f:
+                f.write(reader.faiss_bytes)
+            write_payload_records(reader.iter_payload_records(), self.map_path, count=reader.count)
+            # A stale JSON map or tombstone list would shadow the imported data
+            Path(self.map_path).unlink(missing_ok=True)
+            Path(self._tombstone_path()).unlink(missing_ok=True)
+            # Rebuilt from the index on first two-stage search
+            Path(self._doc_index_path()).unlink(missing_ok=True)
+
+        with self._writing():
+            self._publish(write, replace=True, chunks=reader.count, imported_from=str(reader.path))
+        self.index = None
+        self.id_map = {}
+        self._docs = None
+        print(f"✅ Imported {reader.count} chunks from {reader.path}")
+
+    def _check_writable(self):
+        if self.mmap:
+            raise ValueError("FAISS store is opened read-only in mmap serving mode")
+
+    def store(self, chunks, vectors=None):
+        """
+        Store chunks in FAISS index.
+
+        Args:
+            chunks (list): Chunk dictionaries
+            vectors (np.array): Optional precomputed embeddings aligned with chunks
+        """
+        with self._writing():
+            self._load_index()
+            added = self._add(chunks, vectors)
+            self._save()
         
+        print(f"✅ Stored {added} chunks in FAISS")
+
+    def append(self, chunks, vectors=None):
+        """
+        Add chunks to the index held in memory without publishing them, for
+        bulk loads; flush() publishes everything appended so far as one
+        snapshot. Returns the number added.
+        """
+        self._check_writable()
+        if self.index is None:
+            self._load_index()
+        return self._add(chunks, vectors)
+
+    def flush(self):
+        """
+        Publish chunks added with append(). Raises ValueError if another
+        writer published since the index was loaded.
+        """
+        with self._writing():
+            self._save()
+
+    def _add(self, chunks, vectors=None):
+        """Embed (if needed) and add chunks to the loaded index. Returns the count."""
         if not chunks:
             raise ValueError("No chunks to store")
         
         # Prepare vectors and IDs
-        vectors = []
+        valid = [i for i, chunk in enumerate(chunks) if chunk.get("id") and chunk.get("text")]
+        if not valid:
+            raise ValueError("No valid chunks to store")
+        
+        if vectors is None:
+            vectors_np = get_embeddings([chunks[i]["text"] for i in valid])
+        else:
+            vectors_np = np.asarray(vectors, dtype="float32")[valid]
+        
         ids = []
         new_id_map = {}
-        
-        for chunk in chunks:
-            if not chunk.get("id") or not chunk.get("text"):
-                continue
-                
-            vector = get_embedding(chunk["text"])
-            numeric_id = self._get_numeric_id(chunk["id"])
-            
-            vectors.append(vector)
+        for i in valid:
+            numeric_id = self._get_numeric_id(chunks[i]["id"])
             ids.append(numeric_id)
-            new_id_map[str(numeric_id)] = chunk
-        
-        if not vectors:
-            raise ValueError("No valid chunks to store")
+            new_id_map[str(numeric_id)] = chunks[i]
         
-        # Convert to numpy arrays
-        vectors_np = np.array(vectors).astype("float32")
         ids_np = np.array(ids, dtype="int64")
+
+        # A deleted chunk stored again (e.g. a re-run chunk file) must not stay hidden
+        # behind its tombstone, and a later compaction must not remove the new vector
+        reused = ids_np[np.isin(ids_np, self.tombstones)]
+        if len(reused):
+            try:
+                self.index, _ = without_ids(self.index, reused)
+            except RuntimeError:
+                # Inner index cannot reconstruct; the stale vector resurfaces next to the new one
+                pass
+            self.tombstones = np.setdiff1d(self.tombstones, reused)
+            self._selector = None
+
+        # Before the index changes, so a lazy rebuild only sees existing chunks
+        if settings.FAISS_DOC_INDEX:
+            self._add_to_docs([chunks[i].get("source") or "" for i in valid], vectors_np, ids_np)
+        else:
+            self._docs = None
+        
+        if not self.index.is_trained:
+            # IVF-style indexes learn their partitions from the first batch
+            try:
+                self.index.train(vectors_np)
+            except RuntimeError as e:
+                raise ValueError(f"Cannot train {settings.FAISS_INDEX_FACTORY} index on {len(vectors_np)} vectors: {e}")
         
         # Add to index
         self.index.add_with_ids(vectors_np, ids_np)
         
         # Update ID map
         self.id_map.update(new_id_map)
+        if self._sources is not None:
+            for key, chunk in new_id_map.items():
+                self._sources.setdefault(chunk.get("source"), []).append(int(key))
         
-        # Save to files
-        faiss.write_index(self.index, self.index_path)
-        with open(self.map_path, "w", encoding="utf-8") as f:
-            json.dump(self.id_map, f, indent=2, ensure_ascii=False)
-        
-        print(f"✅ Stored {len(vectors)} chunks in FAISS")
+        return len(ids)
+
+    def _source_index(self):
+        """source -> numeric ids, built once per load and kept up to date"""
+        if self._sources is None:
+            self._sources = {}
+            for key, chunk in self.id_map.items():
+                self._sources.setdefault(chunk.get("source"), []).append(int(key))
+        return self._sources
+
+    def _remove_source(self, source):
+        """Tombstone a source's vectors and drop its payloads. Returns the count."""
+        ids = self._source_index().pop(source, [])
+        for numeric_id in ids:
+            self.id_map.pop(str(numeric_id), None)
+        if ids:
+            self.tombstones = np.union1d(self.tombstones, np.array(ids, dtype="int64"))
+            self._selector = None
+        if self._docs is not None:
+            self._docs.pop(source, None)
+            self._doc_search = None
+        return len(ids)
+
+    def _load_docs(self):
+        """Load the persisted document index, or None if there is none"""
+        path = self._doc_index_path()
+        if not Path(path).exists():
+            return None
+        data = np.load(path)
+        sums, offsets, ids = data["sums"], data["offsets"], data["ids"]
+        return {
+            str(source): [sums[i], ids[offsets[i]:offsets[i + 1]]]
+            for i, source in enumerate(data["sources"])
+        }
+
+    def _write_docs(self):
+        sources = list(self._docs)
+        ids = [self._docs[source][1] for source in sources]
+        np.savez(
+            self._doc_index_path(),
+            sources=np.array(sources, dtype=str),
+            sums=np.array([self._docs[source][0] for source in sources], dtype="float32").reshape(-1, self.dim),
+            offsets=np.concatenate([[0], np.cumsum([len(i) for i in ids], dtype="int64")]).astype("int64"),
+            ids=np.concatenate(ids) if ids else np.zeros(0, dtype="int64")
+        )
+
+    def _doc_index(self):
+        """source -> [sum of chunk vectors, chunk ids], rebuilt from the index if it was not persisted"""
+        if self._docs is None:
+            docs = {}
+            if self.index is not None and self.index.ntotal:
+                ids, vectors = id_map_vectors(self.index)
+                position = {int(numeric_id): row for row, numeric_id in enumerate(ids)}
+                for source, chunk_ids in self._source_index().items():
+                    rows = [position[i] for i in chunk_ids if i in position]
+                    if rows:
+                        docs[source or ""] = [vectors[rows].sum(axis=0), np.array(chunk_ids, dtype="int64")]
+            self._docs = docs
+        return self._docs
+
+    def _add_to_docs(self, sources, vectors, ids):
+        docs = self._doc_index()
+        groups = {}
+        for row, source in enumerate(sources):
+            groups.setdefault(source, []).append(row)
+        for source, rows in groups.items():
+            entry = docs.setdefault(source, [np.zeros(self.dim, dtype="float32"), np.zeros(0, dtype="int64")])
+            entry[0] = entry[0] + vectors[rows].sum(axis=0)
+            entry[1] = np.concatenate([entry[1], ids[rows]])
+        self._doc_search = None
+
+    def _maybe_compact(self, force=False):
+        """Physically remove tombstoned vectors once they exceed FAISS_COMPACT_RATIO"""
+        if not len(self.tombstones):
+            return
+        if force or len(self.tombstones) > settings.FAISS_COMPACT_RATIO * max(self.index.ntotal, 1):
+            try:
+                self.index, removed = without_ids(self.index, self.tombstones)
+            except RuntimeError:
+                # Inner index cannot reconstruct; deleted vectors stay tombstoned and filtered out of searches
+                print(f"⚠️ {settings.FAISS_INDEX_FACTORY} index does not support removal, keeping tombstones")
+                return
+            print(f"🧹 Compacted FAISS index: removed {removed} deleted vectors")
+            self.tombstones = np.zeros(0, dtype="int64")
+            self._selector = None
+
+    def delete(self, source, compact=False):
+        """
+        Delete every chunk of a source document.
+
+        Vectors are tombstoned (excluded from searches) and physically
+        removed once tombstones exceed FAISS_COMPACT_RATIO of the index.
+
+        Returns:
+            int: Number of chunks deleted
+        """
+        with self._writing():
+            self._load_index()
+            removed = self._remove_source(source)
+            if removed or compact:
+                self._maybe_compact(force=compact)
+                self._save()
+        print(f"✅ Deleted {removed} chunks of {source} from FAISS")
+        return removed
+
+    def update_payloads(self, updates):
+        """
+        Merge fields into stored chunks' payloads (one snapshot). Each update
+        holds the chunk "id" and the fields to set; unknown ids are skipped.
 
-    def search(self, query, top_k=3):
+        Returns:
+            int: Number of chunks updated
+        """
+        with self._writing():
+            self._load_index()
+            updated = 0
+            for update in updates:
+                key = str(self._get_numeric_id(update["id"]))
+                chunk = self.id_map.get(key)
+                if chunk is not None:
+                    self.id_map[key] = {**chunk, **update}
+                    updated += 1
+            if updated:
+                self._save()
+        return updated
+
+    def replace_document(self, source, chunks, vectors=None):
+        """Atomically swap a source's chunks for new ones (one snapshot)"""
+        with self._writing():
+            self._load_index()
+            removed = self._remove_source(source)
+            added = self._add(chunks, vectors)
+            self._maybe_compact()
+            self._save()
+        print(f"✅ Replaced {source} in FAISS: {removed} chunks removed, {added} added")
+
+    def search(self, query, top_k=3, mode=None, top_docs=None):
         """Search for similar chunks"""
         if self.index is None:
             self._load_index()
@@ -82,27 +450,233 @@ class FaissVectorStore(BaseVectorStore):
             return []
         
         # Generate query embedding
-        qvec = np.array([get_embedding(query)]).astype("float32")
-        
-        # Search
-        distances, ids = self.index.search(qvec, top_k)
-        
-        results = []
-        for j, idx in enumerate(ids[0]):
-            if idx != -1:  # FAISS returns -1 for missing results
-                chunk = self.id_map.get(str(idx))
-                if chunk:
-                    results.append((chunk, float(distances[0][j])))
+        return self.search_by_vector(get_embedding(query), top_k, mode, top_docs)
+
+    def search_by_vector(self, vector, top_k=3, mode=None, top_docs=None, fields=None):
+        """
+        Search for the chunks nearest to an already computed embedding.
+
+        Args:
+            vector: Query embedding
+            top_k (int): Number of results
+            mode (str): "full" scans every chunk; "two_stage" first picks the
+                top_docs documents whose centroid is nearest to the query and
+                searches only their chunks. Defaults to settings.SEARCH_MODE
+            top_docs (int): Documents kept by the first stage;
+                defaults to settings.SEARCH_TOP_DOCS
+            fields (list): Payload fields to return; None returns whole chunks
+
+        Returns:
+            list: (chunk, L2 distance) pairs, nearest first
+        """
+        hits = self.search_ids_by_vector(vector, top_k, mode, top_docs)
+        chunks = self.get_chunks([key for key, _ in hits], fields)
+        return [(chunks[key], distance) for key, distance in hits if key in chunks]
+
+    def search_ids_by_vector(self, vector, top_k=3, mode=None, top_docs=None):
+        """Like search_by_vector, but returns (chunk key, distance) pairs without loading payloads"""
+        if self.index is None:
+            self._load_index()
+
+        qvec = np.asarray(vector, dtype="float32").reshape(1, -1)
+        mode = mode or settings.SEARCH_MODE
+        if mode == "two_stage":
+            # The selector must outlive the search; SearchParameters only holds a pointer
+            params, _selector = self._two_stage_params(qvec, top_docs or settings.SEARCH_TOP_DOCS)
+        elif mode == "full":
+            params = self._search_params()
+        else:
+            raise ValueError(f"Unknown search mode: {mode}")
+        if params is not None:
+            distances, ids = self.index.search(qvec, top_k, params=params)
+        else:
+            distances, ids = self.index.search(qvec, top_k)
         
-        return results
+        # FAISS returns -1 for missing results
+        return [(str(idx), float(distances[0][j])) for j, idx in enumerate(ids[0]) if idx != -1]
+
+    def get_chunks(self, keys, fields=None):
+        """Payloads for chunk keys from search_ids_by_vector, as {key: chunk} (unknown keys omitted)"""
+        if self.index is None:
+            self._load_index()
+        chunks = {}
+        for key in keys:
+            chunk = self.id_map.get(key)
+            if chunk:
+                chunks[key] = select_fields(chunk, fields)
+        return chunks
+
+    def _search_params(self):
+        """Search parameters excluding tombstoned ids, or None if there are none"""
+        if not len(self.tombstones):
+            return None
+        if self._selector is None:
+            batch = faiss.IDSelectorBatch(self.tombstones)
+            # Keep the inner selector alive: IDSelectorNot only holds a pointer
+            self._selector = (batch, faiss.IDSelectorNot(batch))
+        return self._typed_params(self._selector[1])
+
+    def _typed_params(self, sel):
+        """SearchParameters carrying sel; IVF indexes need their own type, with nprobe"""
+        ivf = faiss.try_extract_index_ivf(self.index.index)
+        if ivf is not None:
+            return faiss.SearchParametersIVF(sel=sel, nprobe=ivf.nprobe)
+        return faiss.SearchParameters(sel=sel)
+
+    def _two_stage_params(self, qvec, top_docs):
+        """
+        Search parameters restricted to the chunks of the top_docs documents
+        nearest to the query. Returns (params, selector).
+        """
+        docs = self._doc_index()
+        if len(docs) <= top_docs:
+            # Nothing to prune
+            return self._search_params(), None
+
+        doc_search = self._doc_search
+        if doc_search is None:
+            sources = list(docs)
+            centroids = np.array([docs[s][0] / len(docs[s][1]) for s in sources], dtype="float32")
+            doc_index = faiss.IndexFlatL2(self.dim)
+            doc_index.add(centroids)
+            doc_search = self._doc_search = (sources, doc_index)
+
+        sources, doc_index = doc_search
+        _, rows = doc_index.search(qvec, top_docs)
+        ids = np.concatenate([docs[sources[row]][1] for row in rows[0] if row != -1])
+        # Deleted sources are no longer in docs, so tombstones need no extra filter
+        selector = faiss.IDSelectorBatch(ids)
+        return self._typed_params(selector), selector
+
+    def _search_params_path(self):
+        root = self.snapshots.root if self.snapshots is not None else Path(self.index_path).parent
+        return Path(root) / "search_params.json"
+
+    def _apply_tuned_params(self):
+        """Apply search-time parameters persisted by tune_search_params, if they match this index"""
+        self.search_params = {}
+        path = self._search_params_path()
+        if not path.exists():
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            tuned = json.load(f)
+        if tuned.get("factory") != settings.FAISS_INDEX_FACTORY:
+            return
+        space = faiss.ParameterSpace()
+        for name, value in tuned["params"].items():
+            space.set_index_parameter(self.index, name, value)
+        self.search_params = tuned["params"]
+
+    def _tunable_parameter(self):
+        """(name, candidate values) of the index's search-time knob, or (None, []) for exact indexes"""
+        ivf = faiss.try_extract_index_ivf(self.index.index)
+        if ivf is not None:
+            return "nprobe", [v for v in (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024) if v <= ivf.nlist]
+        if isinstance(faiss.downcast_index(self.index.index), faiss.IndexHNSW):
+            return "efSearch", [16, 24, 32, 48, 64, 96, 128, 256, 512]
+        return None, []
+
+    def tune_search_params(self, target_recall=0.95, k=10, num_queries=200, seed=0):
+        """
+        Sweep the index's search-time parameter (nprobe for IVF, efSearch for
+        HNSW) and persist the fastest value that reaches target_recall@k.
+
+        Queries are sampled from the stored vectors; ground truth comes from
+        an exact flat search over the same (non-deleted) vectors. The setting
+        is saved next to the snapshots and applied whenever the index loads.
+
+        Args:
+            target_recall (float): Minimum mean recall@k
+            k (int): Number of neighbours compared
+            num_queries (int): Stored vectors sampled as queries
+            seed (int): Sampling seed
+
+        Returns:
+            tuple: (chosen point or None, every measured point); each point is
+                a dict with params, recall and latency_ms. Both are empty for
+                exact indexes, which have nothing to tune.
+        """
+        self._load_index()
+        name, values = self._tunable_parameter()
+        if name is None:
+            return None, []
+
+        ids, vectors = id_map_vectors(self.index)
+        live = ~np.isin(ids, self.tombstones)
+        ids, vectors = ids[live], vectors[live]
+        if not len(ids):
+            raise ValueError("Index is empty, nothing to tune")
+
+        rng = np.random.default_rng(seed)
+        queries = vectors[rng.choice(len(ids), min(num_queries, len(ids)), replace=False)]
+        exact = faiss.IndexFlatL2(self.dim)
+        exact.add(vectors)
+        _, rows = exact.search(queries, k)
+        truth = [set(ids[r[r != -1]]) for r in rows]
+
+        space = faiss.ParameterSpace()
+        frontier = []
+        for value in values:
+            space.set_index_parameter(self.index, name, value)
+            params = self._search_params()
+            found = []
+            self.index.search(queries[:1], k, params=params)  # warm up
+            t0 = time.perf_counter()
+            for q in queries:
+                _, hits = self.index.search(q.reshape(1, -1), k, params=params)
+                found.append(set(hits[0][hits[0] != -1]))
+            latency_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+            recall = float(np.mean([len(f & t) / len(t) for f, t in zip(found, truth) if t]))
+            frontier.append({"params": {name: value}, "recall": recall, "latency_ms": latency_ms})
+
+        passing = [point for point in frontier if point["recall"] >= target_recall]
+        best = min(passing, key=lambda point: point["latency_ms"]) if passing else None
+        if best is not None:
+            path = self._search_params_path()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "factory": settings.FAISS_INDEX_FACTORY,
+                    "params": best["params"],
+                    "recall": best["recall"],
+                    "latency_ms": best["latency_ms"],
+                    "k": k,
+                    "target_recall": target_recall,
+                    "queries": len(queries),
+                    "tuned_at": time.time()
+                }, f, indent=2)
+            tmp_path.replace(path)
+        # Leave the index on the persisted (or previous) setting
+        self._apply_tuned_params()
+        return best, frontier
+
+    def _reset(self):
+        """Replace the loaded index with an empty one in memory"""
+        self.index = self._new_index()
+        self._apply_tuned_params()
+        self.id_map = {}
+        self.tombstones = np.zeros(0, dtype="int64")
+        self._selector = None
+        self._sources = None
+        self._docs = {} if settings.FAISS_DOC_INDEX else None
+        self._doc_search = None
 
     def clear(self):
         """Clear the index"""
-        self.index = faiss.IndexIDMap(faiss.IndexFlatL2(self.dim))
-        self.id_map = {}
+        self._check_writable()
+        self._reset()
+
+        if self.snapshots is not None:
+            # Publish an empty snapshot so running APIs pick up the clear
+            with self._writing():
+                self._publish(self._write_files, replace=True, chunks=0)
+            print("✅ FAISS index cleared")
+            return
         
         # Remove files
-        for path in [self.index_path, self.map_path]:
+        for path in [self.index_path, self.map_path, self._tombstone_path(), self._doc_index_path(),
+                     *payload_paths(self.map_path)]:
             if Path(path).exists():
                 Path(path).unlink()
         
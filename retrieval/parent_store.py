@@ -0,0 +1,207 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from api.core.config import settings
+
+
+def parent_store_path(collection=None):
+    return Path(settings.PARENT_STORE_DIR) / (collection or "default")
+
+
+class ParentStore:
+    """
+    Parent passages for small-to-big retrieval, addressed by numeric id.
+
+    Records are JSON appended to a data file; parents.index.npz holds the
+    sorted (id, offset, length) table plus the data file's name, and
+    parents.sources.json the ids of each source. Lookups read only the
+    requested records. The table is replaced atomically after the data it
+    points to is written, and other processes pick up changes on their next
+    lookup. Deleted records stay in the data file until they make up half of
+    it; it is then rewritten under a new name, so open readers are unaffected.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.index_path = self.root / "parents.index.npz"
+        self.sources_path = self.root / "parents.sources.json"
+        self.data_name = "parents-0.dat"
+        self.offsets = np.zeros((3, 0), dtype="int64")
+        self.sources = {}
+        self._stamp = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """Reload the table (and reopen the data file) if another writer changed it"""
+        try:
+            stat = self.index_path.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except FileNotFoundError:
+            stamp = None
+        if stamp == self._stamp:
+            return
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if stamp is None:
+            self.data_name = "parents-0.dat"
+            self.offsets = np.zeros((3, 0), dtype="int64")
+            self.sources = {}
+        else:
+            with np.load(self.index_path) as index:
+                self.offsets = index["offsets"]
+                self.data_name = str(index["data"])
+            with open(self.sources_path, "r", encoding="utf-8") as f:
+                self.sources = json.load(f)
+            self._file = open(self.root / self.data_name, "rb")
+        self._stamp = stamp
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return self.offsets.shape[1]
+
+    def _write_table(self, offsets, sources, data_name):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_sources = self.sources_path.with_name(self.sources_path.name + ".tmp")
+        with open(tmp_sources, "w", encoding="utf-8") as f:
+            json.dump(sources, f)
+        tmp_sources.replace(self.sources_path)
+        # The table goes last: readers reload when it changes
+        tmp_index = self.index_path.with_name("parents.index.tmp.npz")
+        np.savez(tmp_index, offsets=offsets, data=np.array(data_name))
+        tmp_index.replace(self.index_path)
+
+    def add(self, parents):
+        """
+        Append parent passages.
+
+        Args:
+            parents (list): (parent_id, source, record dict) triples; ids are
+                numeric strings, unique across the store
+        """
+        if not parents:
+            return
+        with self._lock:
+            self._refresh()
+            self.root.mkdir(parents=True, exist_ok=True)
+            rows = []
+            with open(self.root / self.data_name, "ab") as f:
+                pos = f.seek(0, os.SEEK_END)
+                for parent_id, source, record in parents:
+                    data = json.dumps(record, ensure_ascii=False).encode("utf-8")
+                    f.write(data)
+                    rows.append((int(parent_id), pos, len(data)))
+                    pos += len(data)
+                    self.sources.setdefault(source, []).append(str(parent_id))
+
+            offsets = np.concatenate([self.offsets, np.array(rows, dtype="int64").T], axis=1)
+            offsets = offsets[:, np.argsort(offsets[0], kind="stable")]
+            self._write_table(offsets, self.sources, self.data_name)
+            self._stamp = None
+
+    def get(self, parent_ids):
+        """Parent records for the given ids, as {parent_id: record} (unknown ids omitted)"""
+        found = {}
+        with self._lock:
+            self._refresh()
+            if self._file is None:
+                return found
+            ids = self.offsets[0]
+            fd = self._file.fileno()
+            for parent_id in parent_ids:
+                i = int(np.searchsorted(ids, int(parent_id)))
+                if i < len(ids) and ids[i] == int(parent_id):
+                    found[parent_id] = json.loads(os.pread(fd, int(self.offsets[2, i]), int(self.offsets[1, i])))
+        return found
+
+    def items(self):
+        """Every stored parent as (parent_id, source, record dict), grouped by source"""
+        with self._lock:
+            self._refresh()
+            sources = dict(self.sources)
+        for source, ids in sources.items():
+            for parent_id, record in self.get(ids).items():
+                yield parent_id, source, record
+
+    def remove_source(self, source, keep=()):
+        """
+        Forget a source's parents, except ids in `keep`.
+
+        Returns:
+            int: Number of parents removed
+        """
+        with self._lock:
+            self._refresh()
+            ids = self.sources.get(source)
+            if not ids:
+                return 0
+            keep = set(keep)
+            sources = dict(self.sources)
+            kept = [i for i in ids if i in keep]
+            if kept:
+                sources[source] = kept
+            else:
+                del sources[source]
+            return self._drop({int(i) for i in ids if i not in keep}, sources)
+
+    def remove(self, parent_ids):
+        """Forget parents by id (e.g. those of chunks a backend rejected). Returns the number removed"""
+        removed = {str(i) for i in parent_ids}
+        if not removed:
+            return 0
+        with self._lock:
+            self._refresh()
+            sources = {}
+            for source, ids in self.sources.items():
+                kept = [i for i in ids if i not in removed]
+                if kept:
+                    sources[source] = kept
+            return self._drop({int(i) for i in removed}, sources)
+
+    def _drop(self, removed, sources):
+        # Caller holds self._lock and has refreshed the table
+        offsets = self.offsets[:, ~np.isin(self.offsets[0], list(removed))]
+        count = self.offsets.shape[1] - offsets.shape[1]
+        if not count:
+            return 0
+
+        data_name = self.data_name
+        if int(offsets[2].sum()) * 2 < (self.root / data_name).stat().st_size:
+            offsets, data_name = self._compact(offsets)
+        self._write_table(offsets, sources, data_name)
+        if data_name != self.data_name:
+            # Readers that still have the old file open keep reading it
+            (self.root / self.data_name).unlink()
+        self._stamp = None
+        return count
+
+    def _compact(self, offsets):
+        """Copy the live records to a new data file; returns (new table, new file name)"""
+        generation = int(self.data_name[len("parents-"):-len(".dat")]) + 1
+        data_name = f"parents-{generation}.dat"
+        new_offsets = offsets.copy()
+        pos = 0
+        with open(self.root / self.data_name, "rb") as src, open(self.root / data_name, "wb") as dst:
+            for i in range(offsets.shape[1]):
+                src.seek(int(offsets[1, i]))
+                dst.write(src.read(int(offsets[2, i])))
+                new_offsets[1, i] = pos
+                pos += int(offsets[2, i])
+        return new_offsets, data_name
+
+    def clear(self):
+        with self._lock:
+            for path in [self.index_path, self.sources_path, *self.root.glob("parents-*.dat")]:
+                path.unlink(missing_ok=True)
+            self._refresh()
+
+    def size_bytes(self):
+        paths = [self.index_path, self.sources_path, *self.root.glob("parents-*.dat")]
+        return sum(path.stat().st_size for path in paths if path.exists())
@@ -0,0 +1,110 @@
+import json
+import mmap
+import uuid
+import numpy as np
+from pathlib import Path
+
+
+def payload_paths(base_path):
+    """Return (data_path, offsets_path) for a payload store rooted at base_path"""
+    base = Path(base_path)
+    return base.with_suffix(".payloads"), base.with_suffix(".offsets.npy")
+
+
+def write_payloads(id_map, base_path):
+    """
+    Write chunk payloads as concatenated JSON records plus a sorted offset table.
+
+    Args:
+        id_map (dict): Mapping of numeric id (str or int) to chunk dict
+        base_path (str): Path the payload files are derived from
+    """
+    ids = sorted(int(k) for k in id_map)
+    write_payload_records(
+        ((i, json.dumps(id_map[str(i)], ensure_ascii=False).encode("utf-8")) for i in ids),
+        base_path,
+        count=len(ids)
+    )
+
+
+def write_payload_records(records, base_path, count=None):
+    """
+    Stream already-encoded payload records into a payload store.
+
+    Args:
+        records (iterable): (numeric_id, json_bytes) pairs in ascending id order
+        base_path (str): Path the payload files are derived from
+        count (int): Number of records, if known (avoids growing the table)
+    """
+    data_path, offsets_path = payload_paths(base_path)
+    table = [] if count is None else np.zeros((3, count), dtype="int64")
+
+    # Unique temp names: serving workers may all build missing files at once
+    tag = uuid.uuid4().hex[:12]
+    tmp_data = data_path.with_suffix(f"{data_path.suffix}.{tag}.tmp")
+    with open(tmp_data, "wb") as f:
+        pos = 0
+        for i, (numeric_id, record) in enumerate(records):
+            f.write(record)
+            if count is None:
+                table.append((numeric_id, pos, len(record)))
+            else:
+                table[:, i] = (numeric_id, pos, len(record))
+            pos += len(record)
+
+    offsets = np.array(table, dtype="int64").reshape(-1, 3).T if count is None else table
+    tmp_offsets = offsets_path.with_name(f"{offsets_path.name}.{tag}.tmp.npy")
+    np.save(tmp_offsets, offsets)
+    tmp_data.replace(data_path)
+    tmp_offsets.replace(offsets_path)
+
+
+class MmapPayloadStore:
+    """
+    Read-only, memory-mapped view of a payload store written by write_payloads.
+
+    Pages are shared through the OS page cache, so every process that opens
+    the same files reads from one copy.
+    """
+
+    def __init__(self, base_path):
+        data_path, offsets_path = payload_paths(base_path)
+        if not data_path.exists() or not offsets_path.exists():
+            raise FileNotFoundError(f"Payload store not found for: {base_path}")
+
+        self.offsets = np.load(offsets_path, mmap_mode="r")
+        self._file = open(data_path, "rb")
+        # mmap of an empty file is not allowed
+        self._data = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if data_path.stat().st_size else b""
+        )
+
+    def __len__(self):
+        return self.offsets.shape[1]
+
+    def record(self, i):
+        """Raw JSON bytes of the i-th record (in id order)"""
+        start, length = int(self.offsets[1, i]), int(self.offsets[2, i])
+        return self._data[start:start + length]
+
+    def get(self, numeric_id, default=None):
+        ids = self.offsets[0]
+        i = int(np.searchsorted(ids, int(numeric_id)))
+        if i >= len(ids) or ids[i] != int(numeric_id):
+            return default
+        return json.loads(self.record(i))
+
+    def items(self):
+        """Yield (str(id), chunk) pairs in id order, decoding one record at a time"""
+        for i in range(len(self)):
+            yield str(int(self.offsets[0, i])), json.loads(self.record(i))
+
+    def to_dict(self):
+        """Decode every record into an in-memory {str(id): chunk} map"""
+        return {str(int(self.offsets[0, i])): json.loads(self.record(i)) for i in range(len(self))}
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
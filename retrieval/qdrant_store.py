@@ -1,91 +1,322 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct
-from ingestion.embedding import get_embedding
+import atexit
+import threading
+import uuid
+import weakref
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import (
+    VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchValue, FilterSelector, QueryRequest,
+    SetPayload, SetPayloadOperation
+)
+from ingestion.embedding import get_embedding, get_embeddings
 from retrieval.base_store import BaseVectorStore
+from retrieval.collection_manager import CollectionNotFoundError
 from api.core.config import settings
 
 COLLECTION_NAME = "document_chunks"
 
+# One client per process, shared by every store so connections are pooled and reused
+_clients = {}
+_clients_lock = threading.Lock()
+# Collections known to exist, per client: {collection name: vector size}
+_collections = weakref.WeakKeyDictionary()
+
+
+def _in_process():
+    """True when QDRANT_LOCATION runs Qdrant inside this process (":memory:" or a directory)"""
+    return bool(settings.QDRANT_LOCATION) and not settings.QDRANT_LOCATION.startswith(("http://", "https://"))
+
+
+def _client_options():
+    location = settings.QDRANT_LOCATION
+    if location == ":memory:" or (location and not _in_process()):
+        return {"location": location}
+    if location:
+        # qdrant-client takes any other location for a server URL
+        return {"path": location}
+    options = {
+        "host": settings.QDRANT_HOST,
+        "port": settings.QDRANT_PORT,
+        "grpc_port": settings.QDRANT_GRPC_PORT,
+        "prefer_grpc": settings.QDRANT_PREFER_GRPC,
+        "timeout": settings.QDRANT_TIMEOUT
+    }
+    if settings.QDRANT_POOL_SIZE:
+        options["pool_size"] = settings.QDRANT_POOL_SIZE
+    return options
+
+
+def get_qdrant_client(async_client=False):
+    """
+    Process-wide Qdrant client built from settings.
+
+    Args:
+        async_client (bool): Return the AsyncQdrantClient instead. Not
+            available in in-process mode, where it would open a separate,
+            empty store
+
+    Returns:
+        QdrantClient or AsyncQdrantClient
+    """
+    if async_client and _in_process():
+        raise ValueError(
+            f"The async Qdrant client needs a Qdrant server; QDRANT_LOCATION={settings.QDRANT_LOCATION} "
+            "runs Qdrant in-process, so use the synchronous search methods"
+        )
+    with _clients_lock:
+        if async_client not in _clients:
+            client_class = AsyncQdrantClient if async_client else QdrantClient
+            _clients[async_client] = client_class(**_client_options())
+        return _clients[async_client]
+
+
+@atexit.register
+def _close_clients():
+    # An in-process client left to __del__ at interpreter shutdown fails noisily
+    for client in _clients.values():
+        if isinstance(client, QdrantClient):
+            client.close()
+
+
+def _with_payload(fields):
+    """Qdrant payload selector: everything for None, else just the listed keys"""
+    return True if fields is None else list(fields)
+
+
 class QdrantVectorStore(BaseVectorStore):
-    def __init__(self):
+    def __init__(self, collection_name=None, client=None, async_client=None, create=True):
+        self.collection_name = collection_name or COLLECTION_NAME
         self.dim = 384 if settings.EMBEDDING_PROVIDER == "local" else 1536
-        self.client = QdrantClient(
-            host=settings.QDRANT_HOST, 
-            port=settings.QDRANT_PORT
-        )
-        self._ensure_collection()
+        self.client = client or get_qdrant_client()
+        self._async_client = async_client
+        self._ensure_collection(create)
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = get_qdrant_client(async_client=True)
+        return self._async_client
 
-    def _ensure_collection(self):
-        """Create collection if it doesn't exist"""
+    def _ensure_collection(self, create=True):
+        """
+        Create collection if it doesn't exist (checked once per process).
+        With create=False a missing collection raises CollectionNotFoundError.
+        """
+        known = _collections.setdefault(self.client, {})
+        if self.collection_name in known:
+            return
         try:
-            collections = self.client.get_collections()
-            existing_names = [collection.name for collection in collections.collections]
-            
-            if COLLECTION_NAME not in existing_names:
+            exists = self.client.collection_exists(self.collection_name)
+        except Exception as e:
+            raise ValueError(f"Error ensuring Qdrant collection: {str(e)}")
+        if not exists and not create:
+            raise CollectionNotFoundError(f"Collection not found: {self.collection_name}")
+        try:
+            if exists:
+                size = self.client.get_collection(self.collection_name).config.params.vectors.size
+                if size != self.dim:
+                    raise ValueError(f"collection has {size}-dim vectors, embeddings have {self.dim}")
+            else:
                 self.client.create_collection(
-                    collection_name=COLLECTION_NAME,
+                    collection_name=self.collection_name,
                     vectors_config=VectorParams(
                         size=self.dim, 
                         distance=Distance.COSINE
                     )
                 )
-                print(f"✅ Created Qdrant collection: {COLLECTION_NAME}")
+                print(f"✅ Created Qdrant collection: {self.collection_name}")
         except Exception as e:
             raise ValueError(f"Error ensuring Qdrant collection: {str(e)}")
+        known[self.collection_name] = self.dim
 
-    def store(self, chunks):
-        """Store chunks in Qdrant"""
+    def store(self, chunks, vectors=None):
+        """
+        Store chunks in Qdrant.
+
+        Args:
+            chunks (list): Chunk dictionaries
+            vectors (np.array): Optional precomputed embeddings aligned with chunks
+        """
         if not chunks:
             raise ValueError("No chunks to store")
         
+        valid = [i for i, chunk in enumerate(chunks) if chunk.get("id") and chunk.get("text")]
+        if not valid:
+            raise ValueError("No valid chunks to store")
+        
+        if vectors is None:
+            vectors = get_embeddings([chunks[i]["text"] for i in valid])
+        else:
+            vectors = [vectors[i] for i in valid]
+        
         points = []
-        for i, chunk in enumerate(chunks):  # ← CHANGED: Use numeric index
-            if not chunk.get("id") or not chunk.get("text"):
-                continue
-                
+        for i, vector in zip(valid, vectors):
             point = PointStruct(
-                id=i,  # ← CHANGED: Use index instead of chunk["id"]
-                vector=get_embedding(chunk["text"]),
-                payload=chunk
+                # Qdrant only accepts ints or UUIDs; derive a stable UUID from the chunk id
+                id=str(uuid.uuid5(uuid.NAMESPACE_URL, chunks[i]["id"])),
+                vector=list(map(float, vector)),
+                payload=chunks[i]
             )
             points.append(point)
         
-        if not points:
-            raise ValueError("No valid chunks to store")
-        
         # Upsert points
         self.client.upsert(
-            collection_name=COLLECTION_NAME,
+            collection_name=self.collection_name,
             points=points,
             wait=True
         )
         
         print(f"✅ Stored {len(points)} chunks in Qdrant")
 
-    def search(self, query, top_k=3):
-        """Search for similar chunks in Qdrant"""
+    def search(self, query, top_k=3, mode=None, top_docs=None):
+        """Search for similar chunks in Qdrant (mode is ignored: HNSW already avoids a full scan)"""
         if not query or not query.strip():
             return []
         
         try:
             qvec = get_embedding(query)
-            results = self.client.search(
-                collection_name=COLLECTION_NAME,
-                query_vector=qvec,
+        except Exception as e:
+            raise ValueError(f"Qdrant search error: {str(e)}")
+        return self.search_by_vector(qvec, top_k)
+
+    def search_by_vector(self, vector, top_k=3, mode=None, top_docs=None, fields=None):
+        """
+        Search for chunks nearest to an already computed embedding.
+
+        Args:
+            vector: Query embedding
+            top_k (int): Number of results
+            fields (list): Payload fields to return, e.g. ["source", "chunk_number"];
+                None returns whole chunks
+
+        Returns:
+            list: (payload, cosine score) pairs, best first
+        """
+        try:
+            response = self.client.query_points(
+                collection_name=self.collection_name,
+                query=list(map(float, vector)),
                 limit=top_k,
-                with_payload=True
+                with_payload=_with_payload(fields)
             )
-            
-            return [(hit.payload, hit.score) for hit in results]
+            return [(hit.payload, hit.score) for hit in response.points]
             
         except Exception as e:
             raise ValueError(f"Qdrant search error: {str(e)}")
 
+    def search_batch_by_vector(self, vectors, top_k=3, mode=None, top_docs=None, fields=None):
+        """Search several query embeddings in one round trip; one result list per vector"""
+        requests = [
+            QueryRequest(query=list(map(float, vector)), limit=top_k, with_payload=_with_payload(fields))
+            for vector in vectors
+        ]
+        if not requests:
+            return []
+        try:
+            responses = self.client.query_batch_points(collection_name=self.collection_name, requests=requests)
+            return [[(hit.payload, hit.score) for hit in response.points] for response in responses]
+        except Exception as e:
+            raise ValueError(f"Qdrant search error: {str(e)}")
+
+    async def asearch_by_vector(self, vector, top_k=3, fields=None):
+        """search_by_vector on the async client, for callers running an event loop (server mode only)"""
+        client = self.async_client
+        try:
+            response = await client.query_points(
+                collection_name=self.collection_name,
+                query=list(map(float, vector)),
+                limit=top_k,
+                with_payload=_with_payload(fields)
+            )
+            return [(hit.payload, hit.score) for hit in response.points]
+        except Exception as e:
+            raise ValueError(f"Qdrant search error: {str(e)}")
+
+    def search_ids_by_vector(self, vector, top_k=3, mode=None, top_docs=None):
+        """(point id, score) pairs without payloads"""
+        try:
+            response = self.client.query_points(
+                collection_name=self.collection_name,
+                query=list(map(float, vector)),
+                limit=top_k,
+                with_payload=False
+            )
+            return [(str(hit.id), hit.score) for hit in response.points]
+        except Exception as e:
+            raise ValueError(f"Qdrant search error: {str(e)}")
+
+    def get_chunks(self, keys, fields=None):
+        """Payloads for point ids from search_ids_by_vector, as {id: chunk}"""
+        if not keys:
+            return {}
+        try:
+            points = self.client.retrieve(
+                collection_name=self.collection_name, ids=list(keys), with_payload=_with_payload(fields)
+            )
+            return {str(point.id): point.payload for point in points}
+        except Exception as e:
+            raise ValueError(f"Qdrant retrieve error: {str(e)}")
+
+    def _source_filter(self, source):
+        return Filter(must=[FieldCondition(key="source", match=MatchValue(value=source))])
+
+    def delete(self, source):
+        """Delete every chunk of a source document by payload filter"""
+        try:
+            count = self.client.count(
+                collection_name=self.collection_name,
+                count_filter=self._source_filter(source),
+                exact=True
+            ).count
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=FilterSelector(filter=self._source_filter(source)),
+                wait=True
+            )
+        except Exception as e:
+            raise ValueError(f"Error deleting from Qdrant: {str(e)}")
+        print(f"✅ Deleted {count} chunks of {source} from Qdrant")
+        return count
+
+    def replace_document(self, source, chunks, vectors=None):
+        """
+        Replace a source document's chunks.
+
+        New chunks are embedded before the old ones are deleted to keep the
+        window in which the document is missing short; Qdrant has no
+        multi-operation transactions.
+        """
+        if vectors is None:
+            vectors = get_embeddings([chunk["text"] for chunk in chunks])
+        self.delete(source)
+        self.store(chunks, vectors)
+
+    def update_payloads(self, updates):
+        """Merge fields into stored chunks' payloads in one batch request"""
+        if not updates:
+            return 0
+        operations = [
+            SetPayloadOperation(set_payload=SetPayload(
+                payload={k: v for k, v in update.items() if k not in ("id", "source")},
+                points=[str(uuid.uuid5(uuid.NAMESPACE_URL, update["id"]))]
+            ))
+            for update in updates
+        ]
+        try:
+            self.client.batch_update_points(collection_name=self.collection_name, update_operations=operations, wait=True)
+        except Exception as e:
+            raise ValueError(f"Error updating Qdrant payloads: {str(e)}")
+        return len(updates)
+
+    def memory_bytes(self):
+        """Vectors live in the Qdrant server, not this process"""
+        return 0
+
     def clear(self):
         """Clear the collection"""
         try:
-            self.client.delete_collection(COLLECTION_NAME)
-            print(f"✅ Deleted Qdrant collection: {COLLECTION_NAME}")
+            self.client.delete_collection(self.collection_name)
+            _collections.get(self.client, {}).pop(self.collection_name, None)
+            print(f"✅ Deleted Qdrant collection: {self.collection_name}")
             
             # Recreate collection
             self._ensure_collection()
@@ -0,0 +1,230 @@
+import hashlib
+import heapq
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+from .base_store import BaseVectorStore
+from .faiss_store import FaissVectorStore
+from .payload_store import MmapPayloadStore
+from ingestion.embedding import get_embedding, get_embeddings
+from api.core.config import settings
+
+
+class ShardedFaissVectorStore(BaseVectorStore):
+    """
+    FAISS store partitioned across K independent shards.
+
+    Each shard is a FaissVectorStore with its own snapshot directory, so a
+    shard can be rebuilt (or fail to write) without touching the others.
+    Searches fan out to every shard on a thread pool (FAISS releases the GIL)
+    and the per-shard top_k lists are merged.
+    """
+
+    def __init__(self, root=None, num_shards=None, shard_by=None, mmap=None):
+        self.root = Path(root or settings.FAISS_SHARD_DIR)
+        self.num_shards = num_shards or settings.FAISS_SHARDS
+        self.shard_by = shard_by or settings.FAISS_SHARD_BY
+        if self.shard_by not in ("hash", "source"):
+            raise ValueError(f"Unsupported FAISS_SHARD_BY: {self.shard_by}")
+
+        self.shards = [
+            FaissVectorStore(
+                index_path=str(self.root / f"shard_{i:03d}" / "faiss.index"),
+                map_path=str(self.root / f"shard_{i:03d}" / "chunks_map.json"),
+                mmap=mmap,
+                snapshot_dir=str(self.root / f"shard_{i:03d}")
+            )
+            for i in range(self.num_shards)
+        ]
+        self.dim = self.shards[0].dim
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def _executor(self):
+        # Created on demand, so a store used after close() still works
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.num_shards, thread_name_prefix="faiss-shard")
+            return self._pool
+
+    def close(self):
+        """Shut down the shard thread pool (searches already running finish)"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    @property
+    def version(self):
+        return tuple(shard.version for shard in self.shards)
+
+    def latest_version(self):
+        return tuple(shard.latest_version() for shard in self.shards)
+
+    def memory_bytes(self):
+        return sum(shard.memory_bytes() for shard in self.shards)
+
+    def shard_for(self, chunk):
+        """Return the shard number a chunk belongs to"""
+        key = chunk.get("source", "") if self.shard_by == "source" else chunk["id"]
+        return int(hashlib.md5(str(key).encode()).hexdigest(), 16) % self.num_shards
+
+    def _load_index(self):
+        list(self._executor.map(lambda shard: shard._load_index(), self.shards))
+
+    def _partition(self, chunks, vectors=None):
+        """Embed chunks once (unless vectors are given) and split them by shard: {shard id: (chunks, vectors)}"""
+        if not chunks:
+            raise ValueError("No chunks to store")
+
+        valid = [i for i, chunk in enumerate(chunks) if chunk.get("id") and chunk.get("text")]
+        if not valid:
+            raise ValueError("No valid chunks to store")
+
+        if vectors is None:
+            vectors_np = get_embeddings([chunks[i]["text"] for i in valid])
+        else:
+            vectors_np = np.asarray(vectors, dtype="float32")[valid]
+
+        parts = {}
+        for row, i in enumerate(valid):
+            parts.setdefault(self.shard_for(chunks[i]), []).append((chunks[i], row))
+        return {
+            shard_id: ([chunk for chunk, _ in members], vectors_np[[row for _, row in members]])
+            for shard_id, members in parts.items()
+        }
+
+    def store(self, chunks, vectors=None):
+        """Embed chunks once, partition them and store each part in its shard"""
+        parts = self._partition(chunks, vectors)
+        list(self._executor.map(lambda item: self.shards[item[0]].store(*item[1]), parts.items()))
+        print(f"✅ Stored {sum(len(part[0]) for part in parts.values())} chunks across {len(parts)} FAISS shards")
+
+    def append(self, chunks, vectors=None):
+        """Add chunks to the shards' in-memory indexes without publishing (see FaissVectorStore.append)"""
+        parts = self._partition(chunks, vectors)
+        return sum(self._executor.map(lambda item: self.shards[item[0]].append(*item[1]), parts.items()))
+
+    def flush(self):
+        """Publish every shard that has chunks appended"""
+        list(self._executor.map(lambda shard: shard.flush(), [shard for shard in self.shards if shard.index is not None]))
+
+    def search(self, query, top_k=3, mode=None, top_docs=None):
+        """Search all shards in parallel and merge the top_k results"""
+        if not query or not query.strip():
+            return []
+        return self.search_by_vector(get_embedding(query), top_k, mode, top_docs)
+
+    def search_by_vector(self, vector, top_k=3, mode=None, top_docs=None, fields=None):
+        # In two_stage mode each shard picks its own nearest documents
+        per_shard = self._executor.map(
+            lambda shard: shard.search_by_vector(vector, top_k, mode, top_docs, fields), self.shards
+        )
+        # L2 distances: smaller is better
+        return heapq.nsmallest(top_k, (hit for hits in per_shard for hit in hits), key=lambda hit: hit[1])
+
+    def search_ids_by_vector(self, vector, top_k=3, mode=None, top_docs=None):
+        per_shard = self._executor.map(
+            lambda shard: shard.search_ids_by_vector(vector, top_k, mode, top_docs), self.shards
+        )
+        return heapq.nsmallest(top_k, (hit for hits in per_shard for hit in hits), key=lambda hit: hit[1])
+
+    def get_chunks(self, keys, fields=None):
+        # Keys are FAISS ids, unique across shards; ask each shard for the ones still missing
+        chunks = {}
+        for shard in self.shards:
+            missing = [key for key in keys if key not in chunks]
+            if not missing:
+                break
+            chunks.update(shard.get_chunks(missing, fields))
+        return chunks
+
+    def _shards_for_source(self, source):
+        if self.shard_by == "source":
+            return [self.shards[self.shard_for({"source": source})]]
+        return self.shards
+
+    def delete(self, source, compact=False):
+        """Delete a source's chunks from every shard that can hold them"""
+        removed = sum(self._executor.map(lambda shard: shard.delete(source, compact), self._shards_for_source(source)))
+        print(f"✅ Deleted {removed} chunks of {source} across FAISS shards")
+        return removed
+
+    def replace_document(self, source, chunks, vectors=None):
+        """
+        Replace a source's chunks. Atomic with shard_by=source (one shard);
+        with hash sharding the old chunks are deleted shard by shard first.
+        """
+        if self.shard_by == "source":
+            self._shards_for_source(source)[0].replace_document(source, chunks, vectors)
+            return
+        if vectors is None:
+            vectors = get_embeddings([chunk["text"] for chunk in chunks])
+        self.delete(source)
+        self.store(chunks, vectors)
+
+    def update_payloads(self, updates):
+        """Merge fields into stored chunks, routing each update to its chunk's shard"""
+        parts = {}
+        for update in updates:
+            parts.setdefault(self.shard_for(update), []).append(update)
+        return sum(self._executor.map(lambda item: self.shards[item[0]].update_payloads(item[1]), parts.items()))
+
+    def rebuild_shard(self, shard_id):
+        """
+        Re-embed one shard from its stored payloads into a fresh snapshot.
+
+        Payloads come from the live version named by the shard's CURRENT
+        manifest, so a shard whose index file was corrupted can be recovered
+        without touching the others. Nothing is changed unless they load; the
+        rebuilt index is published as one new snapshot.
+
+        Returns:
+            tuple: (number of chunks stored, version rebuilt from)
+        """
+        if not 0 <= shard_id < self.num_shards:
+            raise ValueError(f"Shard {shard_id} does not exist (0-{self.num_shards - 1})")
+        shard = self.shards[shard_id]
+        with shard._writing():
+            manifest = shard.snapshots.current()
+            if manifest is None:
+                raise ValueError(f"Shard {shard_id} has no published snapshot to rebuild from")
+            chunks = self._snapshot_chunks(shard.snapshots.root / manifest["path"])
+            if not chunks:
+                raise ValueError(f"No payloads could be loaded from shard {shard_id} snapshot v{manifest['version']}")
+
+            shard._reset()
+            shard.version = manifest["version"]
+            added = shard._add(chunks)
+            shard._save()
+        print(f"✅ Rebuilt FAISS shard {shard_id} with {added} chunks from snapshot v{manifest['version']}, "
+              f"published as v{shard.version}")
+        return added, manifest["version"]
+
+    @staticmethod
+    def _snapshot_chunks(snapshot_path):
+        """Chunks stored in a snapshot directory (JSON map, else payload store), or [] if neither loads"""
+        map_path = snapshot_path / "chunks_map.json"
+        try:
+            with open(map_path, "r", encoding="utf-8") as f:
+                return list(json.load(f).values())
+        except (OSError, ValueError):
+            pass
+        try:
+            payloads = MmapPayloadStore(str(map_path))
+        except (OSError, ValueError):
+            return []
+        try:
+            return list(payloads.to_dict().values())
+        except ValueError:
+            return []
+        finally:
+            payloads.close()
+
+    def clear(self):
+        """Clear every shard"""
+        list(self._executor.map(lambda shard: shard.clear(), self.shards))
+        print(f"✅ Cleared {self.num_shards} FAISS shards")
@@ -0,0 +1,233 @@
+"""
+Single-file index snapshots for fast cold start.
+
+Layout (all sections 64-byte aligned)::
+
+    MAGIC
+    vectors           float32 [count, dim], raw (memory-mappable)
+    ids               int64 [count], ascending
+    faiss             serialized FAISS index
+    zdict             zstd dictionary trained on payloads (may be empty)
+    payload_offsets   int64 [count, 2] (offset, length) into payloads
+    payloads          per-chunk zstd-compressed JSON, in id order
+    parents           small_to_big parent passages: one zstd frame of JSON
+                      lines [parent_id, source, record] (may be empty)
+    header            JSON: format, dim, count, parents, section table, sha256
+    footer            <header offset u64><header length u32> MAGIC
+
+The checksum covers every byte before the header.
+"""
+
+import hashlib
+import io
+import json
+import mmap
+import struct
+from pathlib import Path
+
+import faiss
+import numpy as np
+import zstandard
+
+from .faiss_ids import id_map_vectors, without_ids
+
+MAGIC = b"RAGSNAP1"
+FORMAT_VERSION = 1
+ALIGN = 64
+FOOTER = struct.Struct("<QI8s")
+
+
+def _pad(f):
+    pos = f.tell()
+    if pos % ALIGN:
+        f.write(b"\0" * (ALIGN - pos % ALIGN))
+
+
+def _sha256(buf, end, block_size=16 << 20):
+    h = hashlib.sha256()
+    for start in range(0, end, block_size):
+        h.update(buf[start:min(end, start + block_size)])
+    return h.hexdigest()
+
+
+def export_snapshot(store, path, level=3, parents=None):
+    """
+    Write the live contents of a FaissVectorStore to a single snapshot file.
+
+    Args:
+        store (FaissVectorStore): Store to export (loaded on demand)
+        path (str): Output file
+        level (int): zstd compression level for payloads
+        parents (ParentStore): Parent passages of small_to_big chunks to include
+
+    Returns:
+        dict: The snapshot header
+    """
+    if store.index is None:
+        store._load_index()
+
+    index = store.index
+    if len(store.tombstones):
+        # Export a compacted copy; deleted vectors have no payload
+        index, _ = without_ids(index, store.tombstones)
+
+    ids, vectors = id_map_vectors(index)
+    order = np.argsort(ids, kind="stable")
+    ids, vectors = ids[order], vectors[order]
+
+    records = []
+    for numeric_id in ids:
+        chunk = store.id_map.get(str(int(numeric_id)))
+        if chunk is None:
+            raise ValueError(f"No payload for FAISS id {int(numeric_id)}")
+        records.append(json.dumps(chunk, ensure_ascii=False).encode("utf-8"))
+
+    try:
+        zdict = zstandard.train_dictionary(112_640, records[:10_000]) if len(records) >= 64 else None
+    except zstandard.ZstdError:
+        zdict = None
+    compressor = zstandard.ZstdCompressor(level=level, dict_data=zdict) if zdict else zstandard.ZstdCompressor(level=level)
+
+    faiss_bytes = faiss.serialize_index(index).tobytes()
+    sections = {}
+    tmp_path = Path(f"{path}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        _pad(f)
+
+        def section(name, data):
+            start = f.tell()
+            f.write(data)
+            sections[name] = [start, f.tell() - start]
+            _pad(f)
+
+        section("vectors", np.ascontiguousarray(vectors).tobytes())
+        section("ids", ids.tobytes())
+        section("faiss", faiss_bytes)
+        section("zdict", zdict.as_bytes() if zdict else b"")
+
+        # Offsets are relative to the payload section; reserve their space first
+        offsets = np.zeros((len(records), 2), dtype="int64")
+        offsets_start = f.tell()
+        f.write(offsets.tobytes())
+        sections["payload_offsets"] = [offsets_start, offsets.nbytes]
+        _pad(f)
+
+        payload_start = f.tell()
+        for i, record in enumerate(records):
+            compressed = compressor.compress(record)
+            offsets[i] = (f.tell() - payload_start, len(compressed))
+            f.write(compressed)
+        sections["payloads"] = [payload_start, f.tell() - payload_start]
+        _pad(f)
+
+        parents_start = f.tell()
+        parent_count = 0
+        if parents is not None and len(parents):
+            with zstandard.ZstdCompressor(level=level).stream_writer(f, closefd=False) as writer:
+                for parent in parents.items():
+                    writer.write(json.dumps(parent, ensure_ascii=False).encode("utf-8") + b"\n")
+                    parent_count += 1
+        sections["parents"] = [parents_start, f.tell() - parents_start]
+        _pad(f)
+        body_end = f.tell()
+
+        f.seek(offsets_start)
+        f.write(offsets.tobytes())
+
+    with open(tmp_path, "r+b") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            digest = _sha256(buf, body_end)
+
+        header = {
+            "format": FORMAT_VERSION,
+            "dim": int(vectors.shape[1]) if vectors.ndim == 2 else store.dim,
+            "count": int(len(ids)),
+            "parents": parent_count,
+            "sections": sections,
+            "sha256": digest
+        }
+        header_bytes = json.dumps(header).encode("utf-8")
+        f.seek(body_end)
+        f.write(header_bytes)
+        f.write(FOOTER.pack(body_end, len(header_bytes), MAGIC))
+
+    tmp_path.replace(path)
+    return header
+
+
+class SnapshotReader:
+    """
+    Memory-mapped reader for a snapshot file.
+
+    `vectors` and `ids` are numpy views over the mapped file (no copy);
+    payloads are decompressed one at a time on demand.
+    """
+
+    def __init__(self, path, verify=True):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._buf[:len(MAGIC)] != MAGIC or len(self._buf) < FOOTER.size:
+            raise ValueError(f"Not a snapshot file: {path}")
+        header_offset, header_len, magic = FOOTER.unpack(self._buf[-FOOTER.size:])
+        if magic != MAGIC:
+            raise ValueError(f"Truncated snapshot file: {path}")
+
+        self.header = json.loads(self._buf[header_offset:header_offset + header_len])
+        if self.header.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format: {self.header.get('format')}")
+        if verify and _sha256(self._buf, header_offset) != self.header["sha256"]:
+            raise ValueError(f"Snapshot checksum mismatch: {path}")
+
+        self.dim = self.header["dim"]
+        self.count = self.header["count"]
+        # Snapshots written before parents were exported have no such section
+        self.parent_count = self.header.get("parents", 0)
+        self.vectors = self._array("vectors", "float32").reshape(self.count, self.dim)
+        self.ids = self._array("ids", "int64")
+        self.payload_offsets = self._array("payload_offsets", "int64").reshape(self.count, 2)
+
+        zdict = self.section("zdict")
+        self._decompressor = (
+            zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(bytes(zdict)))
+            if len(zdict) else zstandard.ZstdDecompressor()
+        )
+
+    def section(self, name):
+        start, length = self.header["sections"][name]
+        return memoryview(self._buf)[start:start + length]
+
+    def _array(self, name, dtype):
+        start, length = self.header["sections"][name]
+        return np.frombuffer(self._buf, dtype=dtype, count=length // np.dtype(dtype).itemsize, offset=start)
+
+    @property
+    def faiss_bytes(self):
+        return self.section("faiss")
+
+    def payload_record(self, i):
+        """JSON bytes of the i-th payload (in id order)"""
+        payloads = self.section("payloads")
+        offset, length = self.payload_offsets[i]
+        return self._decompressor.decompress(payloads[offset:offset + length])
+
+    def iter_payload_records(self):
+        for i in range(self.count):
+            yield int(self.ids[i]), self.payload_record(i)
+
+    def iter_parents(self):
+        """(parent_id, source, record dict) for each exported parent passage"""
+        if not self.parent_count:
+            return
+        reader = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(self.section("parents")), encoding="utf-8")
+        for line in reader:
+            parent_id, source, record = json.loads(line)
+            yield parent_id, source, record
+
+    def close(self):
+        # Drop numpy views before unmapping
+        self.vectors = self.ids = self.payload_offsets = None
+        self._buf.close()
+        self._file.close()
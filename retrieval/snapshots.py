@@ -0,0 +1,115 @@
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows; writers are not serialized across processes
+    fcntl = None
+
+MANIFEST_NAME = "CURRENT"
+LOCK_NAME = "WRITE.lock"
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive flock on path (created if missing) for the duration of the block"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class SnapshotManager:
+    """
+    Versioned on-disk index snapshots.
+
+    Layout::
+
+        <root>/CURRENT          manifest pointing at the live version
+        <root>/v000001/...      one directory per published snapshot
+
+    Writers fill a fresh version directory and then publish it by atomically
+    replacing the manifest, so readers never see a half-written index.
+    Writers also hold writer_lock() from loading the live version until
+    publishing, so two processes never build on the same base.
+    """
+
+    def __init__(self, root, keep=3):
+        self.root = Path(root)
+        self.keep = keep
+
+    @property
+    def manifest_path(self):
+        return self.root / MANIFEST_NAME
+
+    def version_dir(self, version):
+        return self.root / f"v{version:06d}"
+
+    def writer_lock(self):
+        """Exclusive inter-process lock for a read-modify-publish cycle"""
+        return file_lock(self.root / LOCK_NAME)
+
+    def current(self):
+        """Return the manifest dict of the live snapshot, or None"""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def current_version(self):
+        manifest = self.current()
+        return manifest["version"] if manifest else None
+
+    def _versions(self):
+        if not self.root.exists():
+            return []
+        return sorted(
+            int(p.name[1:]) for p in self.root.iterdir()
+            if p.is_dir() and p.name.startswith("v") and p.name[1:].isdigit()
+        )
+
+    def prepare(self):
+        """Reserve a new version directory. Returns (version, path)."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        version = (self._versions() or [0])[-1] + 1
+        while True:
+            path = self.version_dir(version)
+            try:
+                path.mkdir()
+                return version, path
+            except FileExistsError:
+                version += 1
+
+    def publish(self, version, **extra):
+        """Atomically point the manifest at version and prune old snapshots"""
+        manifest = {
+            "version": version,
+            "path": self.version_dir(version).name,
+            "created_at": time.time(),
+            **extra
+        }
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+        self.prune()
+
+    def prune(self):
+        """Delete all but the newest `keep` snapshots (never the live one)"""
+        live = self.current_version()
+        for version in self._versions()[:-self.keep or None]:
+            if version != live:
+                shutil.rmtree(self.version_dir(version), ignore_errors=True)
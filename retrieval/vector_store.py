@@ -1,28 +1,285 @@
 from retrieval.faiss_store import FaissVectorStore
 from retrieval.qdrant_store import QdrantVectorStore
+from retrieval.sharded_faiss_store import ShardedFaissVectorStore
+from retrieval.collection_manager import CollectionNotFoundError, collection_dir, validate_collection
+from retrieval.parent_store import ParentStore, parent_store_path
+from retrieval.base_store import select_fields
+from ingestion.dedup import dedup_index_path, get_dedup_index
 from api.core.config import settings
 
 class VectorStore:
-    def __init__(self):
+    def __init__(self, mmap=None, collection=None, create=True):
+        # mmap=False forces a writable FAISS store even when FAISS_MMAP is on
+        self.mmap = mmap
+        # None selects the default collection
+        self.collection = validate_collection(collection) if collection else None
+        # create=False (read paths) raises CollectionNotFoundError for a missing named collection
+        self.create = create
+        self.backend = self._create_backend()
+        # Parent passages of small_to_big chunks
+        self.parents = ParentStore(parent_store_path(self.collection))
+        
+        print(f"✅ Using vector database: {settings.VECTOR_DB}"
+              + (f" (collection: {self.collection})" if self.collection else ""))
+
+    def _create_backend(self):
+        if self.collection and not self.create and settings.VECTOR_DB.startswith("faiss") \
+                and not collection_dir(self.collection).exists():
+            raise CollectionNotFoundError(f"Collection not found: {self.collection}")
 
         if settings.VECTOR_DB == "faiss":
-            self.backend = FaissVectorStore()
+            if self.collection:
+                root = collection_dir(self.collection)
+                return FaissVectorStore(
+                    str(root / "faiss.index"), str(root / "chunks_map.json"),
+                    mmap=self.mmap, snapshot_dir=str(root)
+                )
+            return FaissVectorStore(mmap=self.mmap)
+
+        elif settings.VECTOR_DB == "faiss_sharded":
+            if self.collection:
+                return ShardedFaissVectorStore(root=collection_dir(self.collection) / "shards", mmap=self.mmap)
+            return ShardedFaissVectorStore(mmap=self.mmap)
             
         elif settings.VECTOR_DB == "qdrant":
-            self.backend = QdrantVectorStore()
+            return QdrantVectorStore(collection_name=self.collection, create=self.create or not self.collection)
         else:
             raise ValueError(f"Unsupported VECTOR_DB: {settings.VECTOR_DB}")
-        
-        print(f"✅ Using vector database: {settings.VECTOR_DB}")
 
-    def store(self, chunks):
-        """Store chunks in the configured backend"""
-        return self.backend.store(chunks)
+    @property
+    def version(self):
+        """Snapshot version currently served (None for unversioned backends)"""
+        return getattr(self.backend, "version", None)
+
+    def latest_version(self):
+        """Newest published snapshot version on disk (None if unversioned)"""
+        latest_version = getattr(self.backend, "latest_version", None)
+        return latest_version() if latest_version else None
+
+    def reload(self):
+        """
+        Load the latest snapshot into a fresh backend and swap it in.
+
+        The old backend keeps serving until the new one is fully loaded, and
+        in-flight searches finish on whichever backend they started with. If
+        loading fails the exception propagates and the old backend stays live.
+
+        Returns:
+            The version now being served
+        """
+        backend = self._create_backend()
+        if hasattr(backend, "_load_index"):
+            backend._load_index()
+        old, self.backend = self.backend, backend
+        old.close()
+        return self.version
+
+    def load(self):
+        """
+        Load the current backend's index now rather than on the first search.
+
+        Returns:
+            The version now being served
+        """
+        if hasattr(self.backend, "_load_index"):
+            self.backend._load_index()
+        return self.version
+
+    def close(self):
+        """Release the backend's threads and connections"""
+        self.backend.close()
+
+    def _store_parents(self, chunks):
+        """
+        Move the parent passages carried by small_to_big chunks into the
+        parent store. Returns (chunks without them, ids of the parents added).
+        """
+        parents = [(chunk["parent_id"], chunk.get("source", ""), chunk["parent"]) for chunk in chunks if "parent" in chunk]
+        if not parents:
+            return chunks, []
+        self.parents.add(parents)
+        chunks = [{k: v for k, v in chunk.items() if k != "parent"} if "parent" in chunk else chunk for chunk in chunks]
+        return chunks, [parent_id for parent_id, _, _ in parents]
+
+    def store(self, chunks, vectors=None):
+        """Store chunks in the configured backend (parents of small_to_big chunks go to the parent store)"""
+        # Parents go first so no stored chunk is ever without one
+        chunks, parent_ids = self._store_parents(chunks)
+        try:
+            return self.backend.store(chunks, vectors)
+        except Exception:
+            # ...and are dropped again if the backend rejects their chunks
+            self.parents.remove(parent_ids)
+            raise
+
+    def append(self, chunks, vectors=None):
+        """
+        Bulk-load chunks. FAISS backends keep them in memory until flush();
+        other backends store them right away. Returns the number added.
+        """
+        chunks, _ = self._store_parents(chunks)
+        append = getattr(self.backend, "append", None)
+        if append is None:
+            self.backend.store(chunks, vectors)
+            return len(chunks)
+        return append(chunks, vectors)
+
+    def flush(self):
+        """Publish chunks held in memory by append()"""
+        flush = getattr(self.backend, "flush", None)
+        if flush is not None:
+            flush()
+
+    def _expanding(self, expand):
+        return expand if expand is not None else len(self.parents) > 0
+
+    def child_k(self, top_k, expand=None):
+        """Child chunks to search so that expand_parents can still fill top_k distinct parents"""
+        return top_k * settings.PARENT_FANOUT if self._expanding(expand) else top_k
+
+    def expand_parents(self, results, top_k):
+        """
+        Replace ranked child hits by their parent passages.
+
+        Each parent appears once, at the rank of its best child; only the
+        parents of the final top_k are read. Chunks without a parent (flat
+        chunking, or a parent that is gone) are returned as they are.
+
+        Args:
+            results (list): (chunk, score) pairs, best first
+            top_k (int): Number of results to return
+
+        Returns:
+            list: (chunk, score) pairs; an expanded chunk holds the parent's
+                text and pages, with the child's id, chunk_number and
+                "matched_text"
+        """
+        picked, seen = [], set()
+        for chunk, score in results:
+            key = chunk.get("parent_id") or ("chunk", chunk.get("id"))
+            if key in seen:
+                continue
+            seen.add(key)
+            picked.append((chunk, score))
+            if len(picked) == top_k:
+                break
+
+        parents = self.parents.get([chunk["parent_id"] for chunk, _ in picked if chunk.get("parent_id")])
+        expanded = []
+        for chunk, score in picked:
+            parent = parents.get(chunk.get("parent_id"))
+            if parent is None:
+                expanded.append((chunk, score))
+                continue
+            expanded.append(({
+                **chunk,
+                **parent,
+                "matched_text": chunk.get("text", "")
+            }, score))
+        return expanded
+
+    def search(self, query, top_k=3, mode=None, top_docs=None, expand=None):
+        """
+        Search chunks in the configured backend.
+
+        Args:
+            query (str): Question text
+            top_k (int): Number of results
+            mode (str): "full" or "two_stage" (nearest documents first, then
+                only their chunks); defaults to settings.SEARCH_MODE
+            top_docs (int): Documents searched in two_stage mode;
+                defaults to settings.SEARCH_TOP_DOCS
+            expand (bool): Return small_to_big parents instead of the child
+                chunks; None does so whenever the collection has parents
+        """
+        if not self._expanding(expand):
+            return self.backend.search(query, top_k, mode, top_docs)
+        return self.expand_parents(self.backend.search(query, self.child_k(top_k, True), mode, top_docs), top_k)
+
+    def search_by_vector(self, vector, top_k=3, mode=None, top_docs=None, fields=None, expand=None):
+        """Search chunks by a precomputed query embedding (fields limits the payload returned)"""
+        return self.search_batch_by_vector([vector], top_k, mode, top_docs, fields, expand)[0]
+
+    def search_batch_by_vector(self, vectors, top_k=3, mode=None, top_docs=None, fields=None, expand=None):
+        """Search several query embeddings at once; returns one result list per vector"""
+        if not self._expanding(expand):
+            if len(vectors) == 1:
+                return [self.backend.search_by_vector(vectors[0], top_k, mode, top_docs, fields)]
+            return self.backend.search_batch_by_vector(vectors, top_k, mode, top_docs, fields)
+
+        child_fields = None if fields is None else list(fields) + ["parent_id", "id"]
+        batch = self.backend.search_batch_by_vector(vectors, self.child_k(top_k, True), mode, top_docs, child_fields)
+        return [
+            [(select_fields(chunk, fields), score) for chunk, score in self.expand_parents(results, top_k)]
+            for results in batch
+        ]
+
+    def search_ids_by_vector(self, vector, top_k=3, mode=None, top_docs=None):
+        """Search returning (chunk key, score) pairs, leaving payloads unloaded"""
+        return self.backend.search_ids_by_vector(vector, top_k, mode, top_docs)
+
+    def get_chunks(self, keys, fields=None):
+        """Fetch payloads for chunk keys from search_ids_by_vector ({key: chunk})"""
+        return self.backend.get_chunks(keys, fields)
+
+    def delete(self, source, compact=False, dedup=True):
+        """
+        Delete every chunk of a source document (compact applies to FAISS backends).
+
+        Near-duplicates that ingest dropped from other documents in favour of
+        this source's chunks are stored first, so their content stays
+        searchable. dedup=False leaves the dedup index to a caller that has
+        already removed the source from it (see DedupIndex.remove_source).
+        """
+        index = None
+        if dedup and dedup_index_path(self.collection).exists():
+            index = get_dedup_index(self.collection)
+            forgotten, promoted = index.remove_source(source)
+            if promoted:
+                print(f"🧬 Storing {len(promoted)} near-duplicate chunks kept only through {source}")
+                self.store(promoted)
+        deleted = self.backend.delete(source, compact=True) if compact else self.backend.delete(source)
+        if index is not None and forgotten:
+            self.sync_alt_sources(index)
+            index.save()
+        self.parents.remove_source(source)
+        return deleted
+
+    def sync_alt_sources(self, dedup_index):
+        """
+        Write the alt_sources that dedup_index changed for already stored
+        chunks to their payloads. A failure is reported, not raised: the
+        chunks themselves are stored either way.
+
+        Returns:
+            int: Number of chunks updated
+        """
+        updates = dedup_index.pop_alt_source_updates()
+        if not updates:
+            return 0
+        try:
+            updated = self.backend.update_payloads(updates)
+        except Exception as e:
+            print(f"⚠️ Could not update alt_sources of {len(updates)} stored chunks: {e}")
+            return 0
+        print(f"🧬 Updated alt_sources of {updated} stored chunks")
+        return updated
 
-    def search(self, query, top_k=3):
-        """Search chunks in the configured backend"""
-        return self.backend.search(query, top_k)
+    def replace_document(self, source, chunks, vectors=None):
+        """Replace a source document's chunks with new ones"""
+        # New parents are written first and old ones dropped last, so no live chunk loses its parent
+        chunks, parent_ids = self._store_parents(chunks)
+        try:
+            result = self.backend.replace_document(source, chunks, vectors)
+        except Exception:
+            self.parents.remove(parent_ids)
+            raise
+        self.parents.remove_source(source, keep=parent_ids)
+        return result
 
     def clear(self):
         """Clear the vector database"""
-        return self.backend.clear()
\ No newline at end of file
+        result = self.backend.clear()
+        dedup_index_path(self.collection).unlink(missing_ok=True)
+        self.parents.clear()
+        return result